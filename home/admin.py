@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Feedback, Contact, Address, Restaurant, MenuCategory, Table,UserReview
+from .models import Feedback, Contact, Address, Restaurant, MenuCategory, Table,UserReview, OutboundEmail, NewsletterSubscriber, NewsletterCampaign
 
 
 # ------------------------
@@ -35,6 +35,37 @@ class ContactAdmin(admin.ModelAdmin):
     readonly_fields = ("submitted_at",)
 
 
+# ------------------------
+# Outbound Email Admin
+# ------------------------
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for the email outbox.
+    """
+    list_display = ("id", "subject", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("subject", "to")
+    ordering = ("-created_at",)
+    readonly_fields = ("created_at", "sent_at", "last_error")
+
+
+# ------------------------
+# Newsletter Admin
+# ------------------------
+@admin.register(NewsletterSubscriber)
+class NewsletterSubscriberAdmin(admin.ModelAdmin):
+    list_display = ("id", "email", "is_active", "subscribed_at")
+    list_filter = ("is_active",)
+    search_fields = ("email",)
+
+
+@admin.register(NewsletterCampaign)
+class NewsletterCampaignAdmin(admin.ModelAdmin):
+    list_display = ("id", "subject", "created_at", "completed_at")
+    readonly_fields = ("created_at", "completed_at")
+
+
 # ------------------------
 # Address Admin
 # ------------------------
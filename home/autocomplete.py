@@ -0,0 +1,199 @@
+# home/autocomplete.py
+"""
+Menu autocomplete.
+
+Every available menu item and category is indexed under each word suffix of
+its normalized name ("Chicken Tikka Masala" under "chicken tikka masala",
+"tikka masala" and "masala") in one sorted array, so the entries for a
+prefix are a contiguous range found with two bisects. Suggestions are
+ranked by popularity: units ordered (outside cancelled orders) for items, and the sum over their items
+for categories.
+
+Each lookup does a bounded amount of work. The top suggestions of every
+prefix with more than SCAN_LIMIT entries are precomputed when the index is
+built, and every other prefix has at most SCAN_LIMIT entries to scan.
+
+The index is immutable. Menu writes (see home.signals) mark it stale. The
+next lookup starts a rebuild in a background thread and keeps answering
+from the old index until the new one is swapped in whole. The index is also
+rebuilt every MENU_AUTOCOMPLETE_MAX_AGE seconds (default 600) to pick up
+popularity changes.
+"""
+import bisect
+import heapq
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Sum
+
+from .search import tokenize
+
+logger = logging.getLogger(__name__)
+
+MAX_SUGGESTIONS = 10
+SCAN_LIMIT = 256
+
+# (popularity, display text, type, id)
+Suggestion = Tuple[int, str, str, int]
+
+
+def _normalize(text: str) -> str:
+    return " ".join(tokenize(text))
+
+
+def _rank(suggestion: Suggestion):
+    popularity, text, kind, pk = suggestion
+    return (-popularity, len(text), text, kind, pk)
+
+
+def _top(suggestions, limit: int = MAX_SUGGESTIONS) -> List[Suggestion]:
+    """Best `limit` distinct suggestions."""
+    unique = {(kind, pk): (popularity, text, kind, pk) for popularity, text, kind, pk in suggestions}
+    return heapq.nsmallest(limit, unique.values(), key=_rank)
+
+
+class Autocomplete:
+    """Immutable prefix index of menu item and category names."""
+
+    def __init__(self, suggestions: List[Suggestion]):
+        """
+        Args:
+            suggestions: (popularity, display text, type, id) for every item and category.
+        """
+        entries = []
+        for suggestion in suggestions:
+            words = _normalize(suggestion[1]).split()
+            for start in range(len(words)):
+                entries.append((" ".join(words[start:]), suggestion))
+        entries.sort(key=lambda entry: entry[0])
+        self._keys = [key for key, _ in entries]
+        self._suggestions = [suggestion for _, suggestion in entries]
+        self._precomputed = self._precompute()
+        self.built_at = time.monotonic()
+
+    def _precompute(self) -> Dict[str, List[Suggestion]]:
+        """Top suggestions for every prefix with more than SCAN_LIMIT entries."""
+        precomputed = {}
+        ranges = [(0, len(self._keys))]
+        length = 1
+        while ranges:
+            larger = []
+            for low, high in ranges:
+                start = low
+                while start < high:
+                    if len(self._keys[start]) < length:
+                        start += 1  # equals the parent prefix, already covered
+                        continue
+                    prefix = self._keys[start][:length]
+                    end = bisect.bisect_left(self._keys, prefix + "\uffff", start, high)
+                    if end - start > SCAN_LIMIT:
+                        precomputed[prefix] = _top(self._suggestions[start:end])
+                        larger.append((start, end))
+                    start = end
+            ranges = larger
+            length += 1
+        return precomputed
+
+    def __len__(self):
+        return len(self._keys)
+
+    def suggest(self, query: str, limit: int = MAX_SUGGESTIONS) -> List[Suggestion]:
+        """Best suggestions whose name (or a later word of it) starts with `query`."""
+        prefix = _normalize(query)
+        if not prefix or limit <= 0:
+            return []
+        limit = min(limit, MAX_SUGGESTIONS)
+        top = self._precomputed.get(prefix)
+        if top is not None:
+            return top[:limit]
+        low = bisect.bisect_left(self._keys, prefix)
+        high = bisect.bisect_left(self._keys, prefix + "\uffff", low)
+        return _top(self._suggestions[low:high], limit)
+
+
+def build_autocomplete() -> Autocomplete:
+    """Build an index of available menu items and their categories (two queries)."""
+    from orders.models import OrderItem  # lazy import
+    from products.models import MenuItem  # lazy import
+
+    sold = dict(
+        OrderItem.objects.exclude(order__order_status="Cancelled")
+        .values("menu_item_id")
+        .annotate(units=Sum("quantity"))
+        .values_list("menu_item_id", "units")
+    )
+    suggestions, categories = [], {}
+    rows = MenuItem.objects.filter(is_available=True).values_list("id", "name", "category_id", "category__name")
+    for item_id, name, category_id, category_name in rows.iterator():
+        popularity = sold.get(item_id) or 0
+        suggestions.append((popularity, name, "item", item_id))
+        total, _ = categories.get(category_id, (0, category_name))
+        categories[category_id] = (total + popularity, category_name)
+    suggestions.extend(
+        (popularity, name, "category", category_id) for category_id, (popularity, name) in categories.items()
+    )
+    return Autocomplete(suggestions)
+
+
+_autocomplete: Optional[Autocomplete] = None
+_stale = False
+_rebuilding = threading.Lock()
+
+
+def _rebuild() -> None:
+    global _autocomplete
+    try:
+        _autocomplete = build_autocomplete()  # swapped in whole
+    except Exception:
+        logger.exception("Rebuilding the menu autocomplete index failed")
+    finally:
+        connections.close_all()  # this thread's connections
+        _rebuilding.release()
+
+
+def rebuild_autocomplete() -> Autocomplete:
+    """Rebuild the index now, in this thread."""
+    global _autocomplete, _stale
+    _stale = False
+    _autocomplete = build_autocomplete()
+    return _autocomplete
+
+
+def mark_stale() -> None:
+    """Note that the menu changed; the next lookup refreshes the index."""
+    global _stale
+    _stale = True
+
+
+def get_autocomplete() -> Autocomplete:
+    """
+    Return the current index. The first call builds it; after that a stale
+    or old index is refreshed in the background while it keeps serving.
+    """
+    global _stale
+    index = _autocomplete
+    if index is None:
+        with _rebuilding:
+            if _autocomplete is None:
+                rebuild_autocomplete()
+        return _autocomplete
+
+    max_age = getattr(settings, "MENU_AUTOCOMPLETE_MAX_AGE", 600)
+    if (_stale or time.monotonic() - index.built_at > max_age) and _rebuilding.acquire(blocking=False):
+        _stale = False
+        if getattr(settings, "MENU_AUTOCOMPLETE_BACKGROUND_REBUILD", True):
+            threading.Thread(target=_rebuild, name="menu-autocomplete-rebuild", daemon=True).start()
+        else:
+            _rebuilding.release()
+            return rebuild_autocomplete()
+    return index
+
+
+def reset_autocomplete() -> None:
+    """Drop the index; the next lookup rebuilds it."""
+    global _autocomplete, _stale
+    _autocomplete, _stale = None, False
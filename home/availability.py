@@ -0,0 +1,150 @@
+# home/availability.py
+"""
+Reservation availability engine.
+
+All tables and every reservation in a date range are loaded with one query
+each, and each table's day is turned into an occupancy bitmap: bit `i` is
+set when slot `i` (of `slot_minutes` each, counted from midnight) is booked.
+Checking whether a table is free for a booking is then a single AND against
+a precomputed mask, so a whole day or week can be answered in one pass
+without further queries.
+"""
+from datetime import date, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def _minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def slot_range(start: time, end: time, slot_minutes: int = 15) -> range:
+    """Slots covering [start, end); an end at or before the start runs to midnight."""
+    first = _minutes(start) // slot_minutes
+    end_minutes = _minutes(end)
+    if end_minutes <= _minutes(start):
+        end_minutes = MINUTES_PER_DAY
+    return range(first, -(-end_minutes // slot_minutes))  # round partial slots up
+
+
+def slot_mask(start: time, end: time, slot_minutes: int = 15) -> int:
+    """Bits covering [start, end) (see slot_range)."""
+    slots = slot_range(start, end, slot_minutes)
+    return ((1 << len(slots)) - 1) << slots.start
+
+
+def _time(minutes: int) -> time:
+    """Time `minutes` after midnight; the end of the day is 00:00, as for slot_range."""
+    return time(minutes // 60 % 24, minutes % 60)
+
+
+def end_label(end: time) -> str:
+    """"HH:MM" for the end of a slot, with the end of the day as "24:00"."""
+    return "24:00" if end == time(0, 0) else end.strftime("%H:%M")
+
+
+class AvailabilityEngine:
+    """
+    Occupancy of every table for `days` days starting at `start_date`.
+
+    Tables marked `is_available=False` are treated as out of service.
+    """
+
+    def __init__(self, start_date: date, days: int = 1, slot_minutes: int = 15):
+        from .models import Reservation, Table  # lazy import
+
+        if MINUTES_PER_DAY % slot_minutes:
+            raise ValueError("slot_minutes must divide a day evenly.")
+        self.start_date = start_date
+        self.days = days
+        self.slot_minutes = slot_minutes
+
+        # table_number -> capacity, smallest tables first
+        self.tables = dict(
+            Table.objects.filter(is_available=True).order_by("capacity", "table_number").values_list("table_number", "capacity")
+        )
+        # (day, table_number) -> occupancy bitmap
+        self._occupancy: Dict[Tuple[date, int], int] = {}
+        reservations = Reservation.objects.filter(
+            date__gte=start_date, date__lt=start_date + timedelta(days=days)
+        ).values_list("date", "table_number", "start_time", "end_time")
+        for day, table_number, start, end in reservations:
+            if table_number is not None:  # not yet seated
+                self.occupy(day, table_number, start, end)
+
+    # ------------------------
+    # Bitmap helpers
+    # ------------------------
+    def _mask(self, start: time, end: time) -> int:
+        return slot_mask(start, end, self.slot_minutes)
+
+    def occupy(self, day: date, table_number: int, start: time, end: time) -> None:
+        """Mark a table as booked for [start, end) (e.g. after a new reservation)."""
+        key = (day, table_number)
+        self._occupancy[key] = self._occupancy.get(key, 0) | self._mask(start, end)
+
+    def is_free(self, day: date, table_number: int, start: time, end: time) -> bool:
+        return not self._occupancy.get((day, table_number), 0) & self._mask(start, end)
+
+    # ------------------------
+    # Queries
+    # ------------------------
+    def free_tables(self, day: date, start: time, end: time, party_size: int = 1) -> List[int]:
+        """Tables that seat `party_size` and are free for [start, end), smallest first."""
+        mask = self._mask(start, end)
+        return [
+            table_number
+            for table_number, capacity in self.tables.items()
+            if capacity >= party_size and not self._occupancy.get((day, table_number), 0) & mask
+        ]
+
+    def free_slots(
+        self,
+        day: date,
+        party_size: int = 1,
+        duration_minutes: int = 60,
+        start_range: time = time(0, 0),
+        end_range: Optional[time] = None,
+        step_minutes: Optional[int] = None,
+        schedule=None,
+    ) -> List[Tuple[time, time, List[int]]]:
+        """
+        Candidate bookings of `duration_minutes` between `start_range` and
+        `end_range`, every `step_minutes` (default: the slot size), that at
+        least one suitable table can take. With a `schedule`
+        (home.schedule.OpeningSchedule), only bookings that fit inside the
+        opening hours are returned.
+
+        Returns:
+            list: (start_time, end_time, [free table numbers]) tuples.
+        """
+        step = step_minutes or self.slot_minutes
+        end_minutes = (_minutes(end_range) if end_range else 0) or MINUTES_PER_DAY  # 00:00 is midnight
+        candidates = [
+            (table_number, self._occupancy.get((day, table_number), 0))
+            for table_number, capacity in self.tables.items()
+            if capacity >= party_size
+        ]
+
+        slots = []
+        start = _minutes(start_range)
+        while start + duration_minutes <= end_minutes:
+            if schedule is not None and not schedule.covers(day, start, start + duration_minutes):
+                start += step
+                continue
+            first = start // self.slot_minutes
+            last = -(-(start + duration_minutes) // self.slot_minutes)
+            mask = ((1 << (last - first)) - 1) << first
+            free = [table_number for table_number, occupied in candidates if not occupied & mask]
+            if free:
+                slots.append((_time(start), _time(start + duration_minutes), free))
+            start += step
+        return slots
+
+    def free_slots_by_day(self, party_size: int = 1, duration_minutes: int = 60, **kwargs) -> Dict[date, list]:
+        """`free_slots` for every day the engine covers."""
+        return {
+            day: self.free_slots(day, party_size, duration_minutes, **kwargs)
+            for day in (self.start_date + timedelta(days=offset) for offset in range(self.days))
+        }
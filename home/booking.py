@@ -0,0 +1,131 @@
+# home/booking.py
+"""
+Race-free reservation booking.
+
+A booking is seated by home.seating.seat_reservation, the same engine that
+assigns walk-ins: it locks the day's reservations, pins the ones that hold a
+table and picks the smallest free table that seats the party.
+
+Every reservation holds one TableSlot row per 15-minute slot of its table,
+and (date, table_number, slot) is unique. That constraint stays the final
+guard: a concurrent booking the lock did not cover (e.g. the first one of a
+day) makes the slot insert fail as a whole, and the booking is rolled back
+and seated again against the day as it now is.
+"""
+import calendar
+from datetime import date, time, timedelta
+from typing import Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+
+from .availability import MINUTES_PER_DAY
+from .seating import seat_reservation
+
+SLOT_MINUTES = 15
+BOOKING_ATTEMPTS = 3
+
+
+class BookingError(Exception):
+    """Raised when a booking request cannot be accepted as made."""
+
+
+class BookingConflict(BookingError):
+    """Raised when no suitable table is free for the requested time."""
+
+
+def book(customer_name: str, day: date, start: time, end: time, party_size: int, table_number: Optional[int] = None):
+    """
+    Book the smallest free table that seats the party (or `table_number`).
+
+    Args:
+        customer_name (str): Name the booking is made under.
+        day (date): Day of the booking.
+        start (time): Start time, on a 15-minute boundary.
+        end (time): End time; a booking cannot run past midnight.
+        party_size (int): Number of guests.
+        table_number (int): Optional specific table.
+
+    Returns:
+        Reservation: The saved reservation, with `table_number` set.
+
+    Raises:
+        BookingError: If the time is invalid or outside the opening hours.
+        BookingConflict: If no suitable table is free.
+    """
+    from .models import Reservation  # lazy import
+    from .schedule import get_schedule  # lazy import
+
+    start_minutes = start.hour * 60 + start.minute
+    end_minutes = (end.hour * 60 + end.minute) or MINUTES_PER_DAY  # 00:00 is midnight
+    if end_minutes <= start_minutes:
+        raise BookingError("The booking must end after it starts.")
+    if start_minutes % SLOT_MINUTES or end_minutes % SLOT_MINUTES:
+        raise BookingError(f"Bookings start and end on {SLOT_MINUTES}-minute boundaries.")
+    if not get_schedule().covers(day, start_minutes, end_minutes):
+        raise BookingError("The restaurant is not open for the whole booking.")
+
+    for _ in range(BOOKING_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                reservation = Reservation.objects.create(
+                    customer_name=customer_name, date=day, start_time=start, end_time=end, party_size=party_size
+                )
+                if seat_reservation(reservation, table_number) is None:
+                    raise BookingConflict("No table is free for that time.")
+            return reservation
+        except IntegrityError:
+            # A concurrent booking took the slots since the day was read; seat again
+            continue
+    raise BookingConflict("No table is free for that time.")
+
+
+def month_calendar(year: int, month: int, party_size: int = 1):
+    """
+    Per-day availability for a month for parties of `party_size`.
+
+    Booked slots of every suitable table are counted per day in one
+    aggregate query and compared with the slots the restaurant is open.
+
+    Returns:
+        list: One dict per day with 'date', 'open_slots', 'booked_slots',
+              'free_slots' and 'status' ('closed', 'full', 'limited' or 'available').
+    """
+    from .models import Table, TableSlot  # lazy import
+    from .schedule import get_schedule  # lazy import
+
+    first = date(year, month, 1)
+    days = [first + timedelta(days=offset) for offset in range(calendar.monthrange(year, month)[1])]
+    tables = list(
+        Table.objects.filter(is_available=True, capacity__gte=party_size).values_list("table_number", flat=True)
+    )
+    booked = dict(
+        TableSlot.objects.filter(date__gte=first, date__lte=days[-1], table_number__in=tables)
+        .values("date")
+        .annotate(booked=Count("id"))
+        .values_list("date", "booked")
+    ) if tables else {}
+
+    schedule = get_schedule()
+    result = []
+    for day in days:
+        capacity = schedule.open_slots(day, SLOT_MINUTES) * len(tables)
+        taken = min(booked.get(day, 0), capacity)
+        if not capacity:
+            state = "closed"
+        elif taken >= capacity:
+            state = "full"
+        elif taken * 4 >= capacity * 3:
+            state = "limited"
+        else:
+            state = "available"
+        result.append(
+            {
+                "date": day,
+                "open_slots": capacity,
+                "booked_slots": taken,
+                "free_slots": capacity - taken,
+                "status": state,
+            }
+        )
+    return result
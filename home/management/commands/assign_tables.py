@@ -0,0 +1,32 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from home.seating import assign_tables
+
+
+class Command(BaseCommand):
+    """
+    Assign tables to a day's unassigned reservations; reservations that
+    already hold a table keep it.
+
+    Example:
+        python manage.py assign_tables --date 2025-11-07
+    """
+    help = "Assign tables to a day's reservations, maximising seated covers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", required=True, help="Day to assign (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        try:
+            day = date.fromisoformat(options["date"])
+        except ValueError:
+            raise CommandError("--date must be in YYYY-MM-DD format.")
+
+        plan = assign_tables(day)
+        self.stdout.write(self.style.SUCCESS(
+            f"Seated {len(plan.assignments) - len(plan.unseated)} reservations "
+            f"({plan.seated_covers} covers, {plan.wasted_seats} empty seats); "
+            f"{len(plan.unseated)} without a table."
+        ))
@@ -0,0 +1,61 @@
+import random
+import time as clock
+from datetime import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from home.seating import SeatingPlan
+
+
+class Command(BaseCommand):
+    """
+    Time the table-assignment engine on a synthetic day (no database access).
+
+    Example:
+        python manage.py benchmark_seating --tables 200 --bookings 2000
+    """
+    help = "Benchmark full-day and incremental table assignment on random bookings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tables", type=int, default=200, help="Number of tables")
+        parser.add_argument("--bookings", type=int, default=2000, help="Number of bookings in the day")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+    def handle(self, *args, **options):
+        if options["tables"] <= 0 or options["bookings"] <= 0:
+            raise CommandError("--tables and --bookings must be positive.")
+
+        rng = random.Random(options["seed"])
+        tables = [(number, rng.choice((2, 2, 2, 4, 4, 6, 8))) for number in range(1, options["tables"] + 1)]
+        bookings = []
+        for booking_id in range(options["bookings"]):
+            start = rng.randrange(11 * 4, 22 * 4)  # quarter hours from 11:00 to 21:45
+            end = min(start + rng.choice((4, 6, 8, 10)), 24 * 4 - 1)
+            party_size = rng.choice((1, 2, 2, 2, 3, 4, 4, 5, 6, 8))
+            bookings.append(
+                (booking_id, party_size, time(start // 4, start % 4 * 15), time(end // 4, end % 4 * 15))
+            )
+
+        started = clock.perf_counter()
+        plan = SeatingPlan.solve(tables, bookings)
+        solve_seconds = clock.perf_counter() - started
+
+        # Replay the day one booking at a time, as they would arrive
+        arrivals = bookings[:]
+        rng.shuffle(arrivals)
+        incremental = SeatingPlan(tables)
+        started = clock.perf_counter()
+        for booking in arrivals:
+            incremental.seat(*booking)
+        incremental_seconds = clock.perf_counter() - started
+
+        requested = sum(party_size for _, party_size, _, _ in bookings)
+        for label, result, seconds in (
+            ("Full solve", plan, solve_seconds),
+            ("Incremental", incremental, incremental_seconds),
+        ):
+            self.stdout.write(
+                f"{label}: {seconds * 1000:.1f} ms ({seconds / len(bookings) * 1e6:.0f} us/booking); "
+                f"{result.seated_covers}/{requested} covers seated, {len(result.unseated)} parties unseated, "
+                f"{result.wasted_seats} empty seats"
+            )
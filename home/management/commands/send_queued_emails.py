@@ -0,0 +1,59 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.email import deliver_queued_emails
+
+
+class Command(BaseCommand):
+    """
+    Drain the email outbox in batches over one reused mail connection,
+    opened by the first batch and closed when the command ends.
+
+    Examples:
+        python manage.py send_queued_emails                 # drain what is due, then exit
+        python manage.py send_queued_emails --loop --interval 5
+    """
+    help = "Deliver queued outbound emails in batches, retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Messages per batch")
+        parser.add_argument("--max-attempts", type=int, default=5, help="Attempts before a message is marked failed")
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new messages")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds to sleep when the queue is empty (with --loop)")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] <= 0 or options["max_attempts"] <= 0:
+            raise CommandError("--batch-size and --max-attempts must be positive.")
+
+        connection = get_connection()
+        totals = {"claimed": 0, "sent": 0, "retried": 0, "failed": 0, "seconds": 0.0}
+        try:
+            while True:
+                metrics = deliver_queued_emails(
+                    batch_size=options["batch_size"],
+                    max_attempts=options["max_attempts"],
+                    connection=connection,
+                )
+                for key in totals:
+                    totals[key] += metrics[key]
+                if metrics["claimed"]:
+                    self.stdout.write(
+                        f"Batch: {metrics['sent']} sent, {metrics['retried']} retried, "
+                        f"{metrics['failed']} failed in {metrics['seconds']:.2f}s"
+                    )
+                    continue
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+
+        rate = totals["sent"] / totals["seconds"] if totals["seconds"] else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {totals['sent']} emails ({rate:.0f}/s); "
+            f"{totals['retried']} scheduled for retry, {totals['failed']} failed."
+        ))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0016_newsletter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='party_size',
+            field=models.PositiveSmallIntegerField(default=1, help_text='Number of guests'),
+        ),
+        migrations.AlterField(
+            model_name='reservation',
+            name='table_number',
+            field=models.PositiveIntegerField(blank=True, help_text='Assigned table; empty until the party is seated (see home.seating)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['date', 'table_number'], name='reservation_date_table_idx'),
+        ),
+    ]
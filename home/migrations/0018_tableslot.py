@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+SLOT_MINUTES = 15
+
+
+def backfill_table_slots(apps, schema_editor):
+    """Give existing seated reservations their slot rows (first come, first kept)."""
+    Reservation = apps.get_model("home", "Reservation")
+    TableSlot = apps.get_model("home", "TableSlot")
+    rows = []
+    reservations = Reservation.objects.filter(table_number__isnull=False).order_by("id")
+    for reservation in reservations.iterator():
+        start = reservation.start_time.hour * 60 + reservation.start_time.minute
+        end = reservation.end_time.hour * 60 + reservation.end_time.minute
+        if end <= start:
+            end = 24 * 60
+        for slot in range(start // SLOT_MINUTES, -(-end // SLOT_MINUTES)):
+            rows.append(
+                TableSlot(reservation=reservation, date=reservation.date, table_number=reservation.table_number, slot=slot)
+            )
+    # Pre-existing double bookings keep the slots of the earlier reservation
+    TableSlot.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0017_reservation_party_size'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('table_number', models.PositiveIntegerField()),
+                ('slot', models.PositiveSmallIntegerField(help_text='15-minute slot of the day, counted from midnight')),
+                ('reservation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='home.reservation')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'table_number', 'slot'), name='unique_table_slot')],
+            },
+        ),
+        migrations.RunPython(backfill_table_slots, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 from datetime import datetime, timedelta, time
 from multiselectfield import MultiSelectField
 
 from products.models import MenuItem
-from .utils import is_restaurant_open  # Import your existing utility
 
 # ------------------------
 # Feedback Model
@@ -30,6 +30,98 @@ class Contact(models.Model):
         return f"{self.name} ({self.email})"
 
 
+# ------------------------
+# Outbound Email Model
+# ------------------------
+class OutboundEmail(models.Model):
+    """
+    Email queued by a request and delivered later, in batches, by the
+    `send_queued_emails` management command (see utils.email).
+    """
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list, help_text="List of recipient addresses")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Outbound Email"
+        verbose_name_plural = "Outbound Emails"
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="outbound_email_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+
+# ------------------------
+# Newsletter Models
+# ------------------------
+class NewsletterSubscriber(models.Model):
+    email = models.EmailField(unique=True)
+    is_active = models.BooleanField(default=True)
+    subscribed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Newsletter Subscriber"
+        verbose_name_plural = "Newsletter Subscribers"
+
+    def __str__(self):
+        return self.email
+
+
+class NewsletterCampaign(models.Model):
+    """
+    One newsletter send. The message is rendered once and stored here;
+    delivery is split into subscriber ID ranges (NewsletterDelivery), each
+    sent by one worker and checkpointed after every chunk so an interrupted
+    send can be resumed (see home.newsletter).
+    """
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Newsletter Campaign"
+        verbose_name_plural = "Newsletter Campaigns"
+
+    def __str__(self):
+        return self.subject
+
+
+class NewsletterDelivery(models.Model):
+    """Progress of one subscriber ID range of a campaign."""
+    campaign = models.ForeignKey(NewsletterCampaign, on_delete=models.CASCADE, related_name="deliveries")
+    last_subscriber_id = models.BigIntegerField(help_text="Checkpoint: highest subscriber ID already sent")
+    end_subscriber_id = models.BigIntegerField(help_text="Last subscriber ID in this range (inclusive)")
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["campaign", "end_subscriber_id"]
+
+    def __str__(self):
+        return f"{self.campaign_id}: ({self.last_subscriber_id}, {self.end_subscriber_id}]"
+
+
 # ------------------------
 # Address Model
 # ------------------------
@@ -187,54 +279,81 @@ class Reservation(models.Model):
     date = models.DateField()
     start_time = models.TimeField()
     end_time = models.TimeField()
-    table_number = models.PositiveIntegerField()
+    party_size = models.PositiveSmallIntegerField(default=1, help_text="Number of guests")
+    table_number = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Assigned table; empty until the party is seated (see home.seating)"
+    )
+
+    class Meta:
+        indexes = [models.Index(fields=["date", "table_number"], name="reservation_date_table_idx")]
 
     def __str__(self):
-        return f"Reservation for {self.customer_name} on {self.date} (Table {self.table_number})"
+        return f"Reservation for {self.customer_name} on {self.date} (Table {self.table_number or 'unassigned'})"
+
+    def slot_rows(self, slot_minutes=15):
+        """Unsaved TableSlot rows covering this reservation's table and time."""
+        from .availability import slot_range  # lazy import
+
+        return [
+            TableSlot(reservation=self, date=self.date, table_number=self.table_number, slot=slot)
+            for slot in slot_range(self.start_time, self.end_time, slot_minutes)
+        ]
 
     @classmethod
-    def find_available_slots(cls, date, start_range, end_range, slot_duration_minutes=60):
+    def find_available_slots(cls, date, start_range, end_range, slot_duration_minutes=60, party_size=1):
         """
         Finds available reservation slots within a given date and time range.
-        Uses the is_restaurant_open() utility to ensure slots are within operating hours.
+        Uses the compiled opening-hours schedule to keep slots within operating hours.
 
         Args:
             date (datetime.date): The date to check for available reservations.
             start_range (datetime.time): Start of the desired time range.
             end_range (datetime.time): End of the desired time range.
             slot_duration_minutes (int): Duration of each reservation slot in minutes.
+            party_size (int): Number of guests; only tables that seat them are considered.
 
         Returns:
-            list: A list of tuples (start_time, end_time) representing available slots.
+            list: A list of tuples (start_time, end_time) representing available slots,
+                  i.e. slots where at least one suitable table is free.
         """
+        from .availability import AvailabilityEngine  # lazy import
+        from .schedule import get_schedule  # lazy import
+
+        # One query for tables and one for the day's reservations
+        engine = AvailabilityEngine(date)
+        return [
+            (start, end)
+            for start, end, _ in engine.free_slots(
+                date,
+                party_size=party_size,
+                duration_minutes=slot_duration_minutes,
+                start_range=start_range,
+                end_range=end_range,
+                step_minutes=slot_duration_minutes,
+                schedule=get_schedule(),
+            )
+        ]
 
-        # Check if restaurant is open before proceeding
-        if not is_restaurant_open():
-            return []
-
-        # Fetch existing reservations for that date
-        existing_reservations = cls.objects.filter(date=date).order_by("start_time")
-
-        # Generate all possible slots within the provided range
-        slots = []
-        current_start = datetime.combine(date, start_range)
-        end_datetime = datetime.combine(date, end_range)
-
-        while current_start + timedelta(minutes=slot_duration_minutes) <= end_datetime:
-            current_end = current_start + timedelta(minutes=slot_duration_minutes)
 
-            # Check if this slot overlaps with any existing reservation
-            overlap = existing_reservations.filter(
-                start_time__lt=current_end.time(),
-                end_time__gt=current_start.time()
-            ).exists()
+class TableSlot(models.Model):
+    """
+    One 15-minute slot of one table held by a reservation. The unique
+    constraint makes double booking impossible: a booking inserts all of its
+    slots at once, and the insert fails if any of them is already taken.
+    """
+    reservation = models.ForeignKey(Reservation, on_delete=models.CASCADE, related_name="slots")
+    date = models.DateField()
+    table_number = models.PositiveIntegerField()
+    slot = models.PositiveSmallIntegerField(help_text="15-minute slot of the day, counted from midnight")
 
-            if not overlap:
-                slots.append((current_start.time(), current_end.time()))
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "table_number", "slot"], name="unique_table_slot"),
+        ]
 
-            current_start = current_end
+    def __str__(self):
+        return f"Table {self.table_number} on {self.date}, slot {self.slot}"
 
-        return slots
 
 class OpeningHour(models.Model):
     """
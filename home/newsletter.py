@@ -0,0 +1,148 @@
+# home/newsletter.py
+"""
+Newsletter fan-out.
+
+A campaign renders its message once and splits the active subscribers into
+contiguous ID ranges, one NewsletterDelivery per worker. Each worker streams
+its range in keyset-paginated chunks (so memory stays flat however many
+subscribers there are), sends through a single mail connection and records a
+checkpoint after every chunk. Re-running an interrupted campaign continues
+after the last checkpoint; at most one chunk per range may be sent twice.
+"""
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connections
+from django.db.models import F, Max, Min
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def create_campaign(subject: str, body: str, html_body: str = "", workers: int = 1):
+    """
+    Create a campaign covering every currently active subscriber.
+
+    Args:
+        subject (str): Email subject.
+        body (str): Rendered plain-text body.
+        html_body (str): Optional rendered HTML alternative.
+        workers (int): Number of ID ranges to split the subscribers into.
+
+    Returns:
+        NewsletterCampaign: The new campaign.
+    """
+    from .models import NewsletterCampaign, NewsletterDelivery, NewsletterSubscriber  # lazy import
+
+    campaign = NewsletterCampaign.objects.create(subject=subject, body=body, html_body=html_body)
+    bounds = NewsletterSubscriber.objects.filter(is_active=True).aggregate(first=Min("id"), last=Max("id"))
+    if bounds["first"] is None:
+        campaign.completed_at = timezone.now()
+        campaign.save(update_fields=["completed_at"])
+        return campaign
+
+    start, last = bounds["first"] - 1, bounds["last"]
+    workers = max(1, min(workers, last - start))
+    step = -(-(last - start) // workers)  # ceiling division
+    NewsletterDelivery.objects.bulk_create(
+        NewsletterDelivery(
+            campaign=campaign,
+            last_subscriber_id=low,
+            end_subscriber_id=min(low + step, last),
+        )
+        for low in range(start, last, step)
+    )
+    return campaign
+
+
+def send_delivery(delivery_id: int, chunk_size: int = 500) -> dict:
+    """
+    Send one subscriber range of a campaign, resuming from its checkpoint.
+
+    Returns:
+        dict: {'sent': int, 'failed': int} for this run.
+    """
+    from .models import NewsletterDelivery, NewsletterSubscriber  # lazy import
+
+    delivery = NewsletterDelivery.objects.select_related("campaign").get(pk=delivery_id)
+    totals = {"sent": 0, "failed": 0}
+    if delivery.completed_at:
+        return totals
+
+    campaign = delivery.campaign
+    from_email = settings.DEFAULT_FROM_EMAIL
+    subscribers = NewsletterSubscriber.objects.filter(
+        is_active=True, id__lte=delivery.end_subscriber_id
+    ).order_by("id")
+
+    connection = get_connection()
+    connection.open()
+    try:
+        checkpoint = delivery.last_subscriber_id
+        while True:
+            # One indexed `id > checkpoint` page per chunk: no cursor is held
+            # open across the checkpoint writes below.
+            chunk = list(subscribers.filter(id__gt=checkpoint).values_list("id", "email")[:chunk_size])
+            if not chunk:
+                break
+            sent = 0
+            for _, email in chunk:
+                message = EmailMultiAlternatives(campaign.subject, campaign.body, from_email, [email], connection=connection)
+                if campaign.html_body:
+                    message.attach_alternative(campaign.html_body, "text/html")
+                try:
+                    sent += message.send()
+                except Exception as exc:
+                    logger.warning("Newsletter %s: failed to send to %s: %s", campaign.pk, email, exc)
+                    # Start over with a fresh connection in case it was dropped
+                    connection.close()
+                    connection.open()
+
+            checkpoint = chunk[-1][0]
+            NewsletterDelivery.objects.filter(pk=delivery.pk).update(
+                last_subscriber_id=checkpoint,
+                sent_count=F("sent_count") + sent,
+                failed_count=F("failed_count") + len(chunk) - sent,
+            )
+            totals["sent"] += sent
+            totals["failed"] += len(chunk) - sent
+    finally:
+        connection.close()
+
+    NewsletterDelivery.objects.filter(pk=delivery.pk).update(completed_at=timezone.now())
+    return totals
+
+
+def _init_worker():
+    # Child processes started with "spawn" need Django set up again
+    import django
+
+    django.setup()
+
+
+def run_campaign(campaign, workers: int = 1, chunk_size: int = 500) -> dict:
+    """
+    Send every unfinished range of a campaign, in parallel across `workers`
+    processes (in this process when workers == 1).
+
+    Returns:
+        dict: {'sent': int, 'failed': int} for this run.
+    """
+    delivery_ids = list(campaign.deliveries.filter(completed_at__isnull=True).values_list("id", flat=True))
+    if workers <= 1 or len(delivery_ids) <= 1:
+        results = [send_delivery(delivery_id, chunk_size) for delivery_id in delivery_ids]
+    else:
+        # Never share database connections with forked children
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            results = list(pool.map(send_delivery, delivery_ids, [chunk_size] * len(delivery_ids)))
+
+    if not campaign.deliveries.filter(completed_at__isnull=True).exists():
+        campaign.completed_at = timezone.now()
+        campaign.save(update_fields=["completed_at"])
+    return {
+        "sent": sum(result["sent"] for result in results),
+        "failed": sum(result["failed"] for result in results),
+    }
@@ -0,0 +1,241 @@
+# home/schedule.py
+"""
+Compiled weekly opening-hours schedule.
+
+Opening hours are read once from the OpeningHour table (or, when that is
+empty, from `Restaurant.opening_hours`) and compiled into a sorted list of
+non-overlapping intervals measured in minutes from Monday 00:00 local time.
+Overnight spans (closing at or before the opening time) run into the next
+day, and Sunday night wraps around to Monday morning. Open/closed and
+next-opening lookups are then a binary search.
+
+Hours are expressed in settings.RESTAURANT_TIME_ZONE (falling back to
+TIME_ZONE when it is not set).
+
+The compiled schedule is cached per process. The OpeningHour/Restaurant save
+and delete signals (see home.signals) invalidate it in the process that made
+the edit, and every process recompiles it after OPENING_SCHEDULE_MAX_AGE
+seconds (default 60), so edits made elsewhere show up within that time.
+"""
+import bisect
+import logging
+import re
+import threading
+import time as clock
+import zoneinfo
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Used only when no opening hours are configured anywhere
+DEFAULT_OPENING_HOURS = {
+    "Monday": (time(9, 0), time(22, 0)),
+    "Tuesday": (time(9, 0), time(22, 0)),
+    "Wednesday": (time(9, 0), time(22, 0)),
+    "Thursday": (time(9, 0), time(22, 0)),
+    "Friday": (time(9, 0), time(22, 0)),
+    "Saturday": (time(10, 0), time(23, 0)),
+    "Sunday": (time(10, 0), time(22, 0)),
+}
+
+_TIME_FORMATS = ("%H:%M", "%H:%M:%S", "%I:%M %p", "%I:%M%p", "%I %p", "%I%p", "%H")
+_RANGE_SEPARATOR = re.compile(r"\s*(?:-|–|—|\bto\b)\s*", re.IGNORECASE)
+
+
+def _day_index(name: str) -> Optional[int]:
+    prefix = str(name).strip()[:3].lower()
+    for index, day in enumerate(DAY_NAMES):
+        if day[:3].lower() == prefix:
+            return index
+    return None
+
+
+def _parse_time(value) -> time:
+    if isinstance(value, time):
+        return value
+    text = str(value).strip().upper().replace(".", "")
+    for fmt in _TIME_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).time()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised time: {value!r}")
+
+
+def _parse_spans(value) -> List[Tuple[time, time]]:
+    """
+    Parse one day's entry from `Restaurant.opening_hours`. Accepts
+    "09:00-22:00", "9:00 AM - 10:00 PM", "Closed", {"open": ..., "close": ...}
+    or a list of any of these.
+    """
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [span for item in value for span in _parse_spans(item)]
+    if isinstance(value, dict):
+        opening = value.get("open") or value.get("opening_time")
+        closing = value.get("close") or value.get("closing_time")
+        return [(_parse_time(opening), _parse_time(closing))] if opening and closing else []
+    spans = []
+    for part in str(value).split(","):
+        if not part.strip() or part.strip().lower() == "closed":
+            continue
+        pieces = _RANGE_SEPARATOR.split(part.strip())
+        if len(pieces) != 2:
+            raise ValueError(f"Unrecognised opening hours: {part!r}")
+        spans.append((_parse_time(pieces[0]), _parse_time(pieces[1])))
+    return spans
+
+
+def _minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+class OpeningSchedule:
+    """Weekly opening intervals with O(log n) lookups."""
+
+    def __init__(self, day_spans, tz=None):
+        """
+        Args:
+            day_spans: Iterable of (weekday 0-6, opening time, closing time).
+            tz: Timezone the hours are expressed in (default: settings.RESTAURANT_TIME_ZONE,
+                falling back to settings.TIME_ZONE).
+        """
+        if tz is None and getattr(settings, "RESTAURANT_TIME_ZONE", None):
+            tz = zoneinfo.ZoneInfo(settings.RESTAURANT_TIME_ZONE)
+        self.tz = tz or timezone.get_default_timezone()
+        self.compiled_at = clock.monotonic()
+        intervals = []
+        for weekday, opening, closing in day_spans:
+            start = weekday * MINUTES_PER_DAY + _minutes(opening)
+            length = (_minutes(closing) - _minutes(opening)) % MINUTES_PER_DAY or MINUTES_PER_DAY
+            end = start + length
+            if end > MINUTES_PER_WEEK:
+                # Sunday night into Monday morning
+                intervals.append((0, end - MINUTES_PER_WEEK))
+                end = MINUTES_PER_WEEK
+            intervals.append((start, end))
+
+        merged = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self._starts = [start for start, _ in merged]
+        self._ends = [end for _, end in merged]
+
+    # ------------------------
+    # Helpers
+    # ------------------------
+    def _local(self, moment: datetime) -> datetime:
+        if timezone.is_naive(moment):
+            return timezone.make_aware(moment, self.tz)
+        return timezone.localtime(moment, self.tz)
+
+    @staticmethod
+    def _minute_of_week(local: datetime) -> int:
+        return local.weekday() * MINUTES_PER_DAY + local.hour * 60 + local.minute
+
+    def _covering(self, minute: int) -> Optional[int]:
+        """Index of the interval containing `minute`, or None."""
+        index = bisect.bisect_right(self._starts, minute) - 1
+        if index >= 0 and minute < self._ends[index]:
+            return index
+        return None
+
+    # ------------------------
+    # Queries
+    # ------------------------
+    def is_open(self, moment: datetime = None) -> bool:
+        """Whether the restaurant is open at `moment` (default: now)."""
+        local = self._local(moment or timezone.now())
+        return self._covering(self._minute_of_week(local)) is not None
+
+    def next_open(self, moment: datetime = None) -> Optional[datetime]:
+        """
+        The next time the restaurant opens at or after `moment` (default: now).
+        Returns `moment` itself while open, and None if it never opens.
+        """
+        if not self._starts:
+            return None
+        local = self._local(moment or timezone.now())
+        minute = self._minute_of_week(local)
+        if self._covering(minute) is not None:
+            return local
+
+        index = bisect.bisect_right(self._starts, minute)
+        target = self._starts[index] if index < len(self._starts) else self._starts[0] + MINUTES_PER_WEEK
+        week_start = datetime.combine(local.date() - timedelta(days=local.weekday()), time(0, 0))
+        return timezone.make_aware(week_start + timedelta(minutes=target), self.tz)
+
+    def covers(self, day: date, start: int, end: int) -> bool:
+        """Whether minutes [start, end) of `day` (local time) fall inside one opening interval."""
+        minute = day.weekday() * MINUTES_PER_DAY + start
+        index = self._covering(minute)
+        return index is not None and minute + (end - start) <= self._ends[index]
+
+    def open_slots(self, day: date, slot_minutes: int = 15) -> int:
+        """Number of whole `slot_minutes` slots of `day` inside the opening hours."""
+        return sum(
+            self.covers(day, start, start + slot_minutes)
+            for start in range(0, MINUTES_PER_DAY, slot_minutes)
+        )
+
+
+def _load_spans():
+    from .models import OpeningHour, Restaurant  # lazy import
+
+    spans = []
+    for day, opening, closing in OpeningHour.objects.values_list("day", "opening_time", "closing_time"):
+        weekday = _day_index(day)
+        if weekday is not None:
+            spans.append((weekday, opening, closing))
+    if spans:
+        return spans
+
+    restaurant = Restaurant.objects.only("opening_hours", "operating_days").first()
+    if restaurant and restaurant.opening_hours:
+        operating = {_day_index(day) for day in restaurant.operating_days or []}
+        for day, value in restaurant.opening_hours.items():
+            weekday = _day_index(day)
+            if weekday is None or (operating and weekday not in operating):
+                continue
+            try:
+                spans.extend((weekday, opening, closing) for opening, closing in _parse_spans(value))
+            except ValueError as exc:
+                logger.warning("Ignoring opening hours for %s: %s", day, exc)
+        return spans
+
+    return [(_day_index(day), opening, closing) for day, (opening, closing) in DEFAULT_OPENING_HOURS.items()]
+
+
+_schedule = None
+_lock = threading.Lock()
+
+
+def get_schedule() -> OpeningSchedule:
+    """Return the compiled schedule, (re)compiling it when missing or too old."""
+    global _schedule
+    schedule = _schedule
+    max_age = getattr(settings, "OPENING_SCHEDULE_MAX_AGE", 60)
+    if schedule is None or clock.monotonic() - schedule.compiled_at > max_age:
+        with _lock:
+            if _schedule is None or clock.monotonic() - _schedule.compiled_at > max_age:
+                _schedule = OpeningSchedule(_load_spans())
+            schedule = _schedule
+    return schedule
+
+
+def invalidate_schedule() -> None:
+    """Drop the compiled schedule; the next lookup recompiles it."""
+    global _schedule
+    _schedule = None
@@ -0,0 +1,420 @@
+# home/search.py
+"""
+In-memory menu search.
+
+Menu item names, descriptions and category names are split into normalized
+tokens and kept in an inverted index (token -> {item id: weight}), with name
+matches weighing more than category matches and those more than description
+matches. A query word that is not in the index is matched against the
+indexed words it is a prefix of ("pan" -> "paneer") and, through a second
+index from trigrams to words, against the words containing it ("ato" ->
+"tomato") and the words that share most of its trigrams (a typo).
+
+A query is answered from the index alone: the posting lists of each query
+word (or its closest spellings) are merged and the best `limit` items are
+picked with a heap. Items matching more of the query words rank first, then
+higher scores, then names alphabetically.
+
+Each process builds its index on first use with one query and keeps it
+current through the MenuItem/MenuCategory signals in home.signals. Writes
+made by other processes are picked up when the index is rebuilt after
+MENU_SEARCH_INDEX_MAX_AGE seconds (default 300). That rebuild runs in a
+background thread while the old index keeps serving; updates made to the old
+index in the meantime are replayed onto the new one before it is swapped in.
+"""
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, IntegerField, Value, When
+
+logger = logging.getLogger(__name__)
+
+FIELD_WEIGHTS = {"name": 3.0, "category": 2.0, "description": 1.0}
+MIN_SIMILARITY = 0.4
+MAX_EXPANSIONS = 5
+RESULT_CACHE_SIZE = 512
+RANKED_RESULTS = 100
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase `text` and strip accents ("Crème Brûlée" -> "creme brulee")."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD.findall(normalize(text))
+
+
+def trigrams(token: str) -> set:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _Forward:
+    """Journal of a replaced index: applies late updates to its replacement."""
+
+    def __init__(self, index: "SearchIndex"):
+        self.index = index
+
+    def append(self, update) -> None:
+        method, args = update
+        getattr(self.index, method)(*args)
+
+
+class SearchIndex:
+    """Inverted token index with trigram typo tolerance."""
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._trigrams: Dict[str, set] = defaultdict(set)  # trigram -> tokens
+        self._items: Dict[int, Tuple[str, str, Optional[int]]] = {}  # id -> (name, description, category id)
+        self._item_tokens: Dict[int, set] = {}
+        self._ranked_cache: Dict[str, List[int]] = {}  # token -> item ids, best first
+        self._results: "OrderedDict[tuple, list]" = OrderedDict()  # recent queries; cleared on every update
+        self.categories: Dict[int, str] = {}  # category id -> name
+        self._category_items: Dict[int, set] = defaultdict(set)
+        self._sorted_tokens: Optional[List[str]] = None  # for prefix lookups; rebuilt after the vocabulary changes
+        self._journal = None  # updates recorded while a replacement index is built
+        self._lock = threading.RLock()
+        self.built_at = time.monotonic()
+
+    def __len__(self):
+        return len(self._items)
+
+    # ------------------------
+    # Updates
+    # ------------------------
+    def add(self, item_id: int, name: str, description: str = "", category_id: int = None, category_name: str = None) -> None:
+        """Index (or re-index) one menu item."""
+        with self._lock:
+            self._record("add", item_id, name, description, category_id, category_name)
+            self._add(item_id, name, description, category_id, category_name)
+
+    def remove(self, item_id: int) -> None:
+        """Drop one menu item from the index (no-op if it isn't indexed)."""
+        with self._lock:
+            self._record("remove", item_id)
+            self._remove(item_id)
+
+    def rename_category(self, category_id: int, name: str) -> None:
+        """Re-index the items of a category after its name changed."""
+        with self._lock:
+            self._record("rename_category", category_id, name)
+            if self.categories.get(category_id) == name:
+                return
+            self.categories[category_id] = name
+            for item_id in list(self._category_items.get(category_id, ())):
+                item_name, description, _ = self._items[item_id]
+                self._add(item_id, item_name, description, category_id)
+
+    def _add(self, item_id, name, description, category_id, category_name=None) -> None:
+        # Called with the lock held; unlike `add`, not recorded
+        self._remove(item_id)
+        self._results.clear()
+        if category_name is not None and category_id is not None:
+            self.categories[category_id] = category_name
+        weights = Counter()
+        for field, text in (
+            ("name", name),
+            ("description", description),
+            ("category", self.categories.get(category_id, "")),
+        ):
+            for token in set(tokenize(text)):
+                weights[token] += FIELD_WEIGHTS[field]
+
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._sorted_tokens = None
+                for gram in trigrams(token):
+                    self._trigrams[gram].add(token)
+            postings[item_id] = weight
+            self._ranked_cache.pop(token, None)
+        self._items[item_id] = (name, description or "", category_id)
+        self._item_tokens[item_id] = set(weights)
+        self._category_items[category_id].add(item_id)
+
+    def _remove(self, item_id) -> None:
+        # Called with the lock held; unlike `remove`, not recorded
+        tokens = self._item_tokens.pop(item_id, None)
+        if tokens is None:
+            return
+        self._results.clear()
+        for token in tokens:
+            postings = self._postings[token]
+            postings.pop(item_id, None)
+            self._ranked_cache.pop(token, None)
+            if not postings:
+                del self._postings[token]
+                self._sorted_tokens = None
+                for gram in trigrams(token):
+                    self._trigrams[gram].discard(token)
+        _, _, category_id = self._items.pop(item_id)
+        self._category_items[category_id].discard(item_id)
+
+    def _record(self, method: str, *args) -> None:
+        # Called with the lock held
+        if self._journal is not None:
+            self._journal.append((method, args))
+
+    def start_journal(self) -> None:
+        """Record updates from now on, to be replayed with `replace_with`."""
+        with self._lock:
+            self._journal = []
+
+    def replace_with(self, index: "SearchIndex") -> None:
+        """
+        Replay the updates recorded since `start_journal` onto `index`, and
+        forward any later ones to it (for callers still holding this index).
+        """
+        with self._lock:
+            for method, args in self._journal or ():
+                getattr(index, method)(*args)
+            self._journal = _Forward(index)
+
+    # ------------------------
+    # Queries
+    # ------------------------
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """
+        Indexed spellings for a query word: itself, or the words it is a
+        prefix or substring of and its closest trigram matches.
+        """
+        if token in self._postings:
+            return [(token, 1.0)]
+        scored = {}
+        if len(token) >= 2:
+            if self._sorted_tokens is None:
+                self._sorted_tokens = sorted(self._postings)
+            start = bisect.bisect_left(self._sorted_tokens, token)
+            end = bisect.bisect_left(self._sorted_tokens, token + "\uffff", start)
+            for candidate in self._sorted_tokens[start:end]:
+                scored[candidate] = max(len(token) / len(candidate), MIN_SIMILARITY)
+        if len(token) >= 3:
+            # Words containing the query word have all of its inner trigrams
+            inner = [token[i:i + 3] for i in range(len(token) - 2)]
+            containing = set.intersection(*(self._trigrams.get(gram, set()) for gram in inner))
+            for candidate in containing:
+                if token in candidate and candidate not in scored:
+                    scored[candidate] = max(len(token) / len(candidate), MIN_SIMILARITY)
+            grams = trigrams(token)
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._trigrams.get(gram, ()))
+            for candidate, common in shared.items():
+                similarity = common / (len(grams) + len(candidate) + 1 - common)  # Jaccard; a token has len + 1 trigrams
+                if similarity >= MIN_SIMILARITY and similarity > scored.get(candidate, 0):
+                    scored[candidate] = similarity
+        best = heapq.nlargest(MAX_EXPANSIONS, scored.items(), key=lambda pair: (pair[1], pair[0]))
+        return [(candidate, similarity) for candidate, similarity in best]
+
+    def _rank_key(self, scores: Dict[int, float]):
+        return lambda item_id: (-scores[item_id], self._items[item_id][0])
+
+    def _ranked(self, token: str) -> List[int]:
+        """All items containing `token`, best first; cached until the token's postings change."""
+        ranked = self._ranked_cache.get(token)
+        if ranked is None:
+            postings = self._postings[token]
+            ranked = self._ranked_cache[token] = sorted(postings, key=self._rank_key(postings))
+        return ranked
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[int, float]]:
+        """
+        Rank menu items for `query`.
+
+        Returns:
+            list: Up to `limit` (item id, score) pairs, best first.
+        """
+        words = tuple(dict.fromkeys(tokenize(query)))
+        if not words or limit <= 0:
+            return []
+
+        with self._lock:
+            key = (words, limit)
+            results = self._results.get(key)
+            if results is None:
+                results = self._results[key] = self._search(words, limit)
+                if len(self._results) > RESULT_CACHE_SIZE:
+                    self._results.popitem(last=False)
+            else:
+                self._results.move_to_end(key)
+        return list(results)
+
+    def _search(self, words, limit: int) -> List[Tuple[int, float]]:
+        """`search` without the result cache."""
+        # Spellings to look up per query word; words nothing matches can't
+        # change the order, so they are dropped
+        per_word = [expansions for expansions in map(self._expand, words) if expansions]
+        if not per_word:
+            return []
+
+        if len(per_word) == 1:
+            # Merge the spellings' pre-ranked lists; an item's first
+            # appearance carries its best score
+            def entries(token, similarity):
+                postings = self._postings[token]
+                for item_id in self._ranked(token):
+                    yield (-postings[item_id] * similarity, self._items[item_id][0]), item_id
+
+            ranked = heapq.merge(*[entries(token, similarity) for token, similarity in per_word[0]])
+            top = {}
+            for (score, _), item_id in ranked:
+                top.setdefault(item_id, -score)
+                if len(top) == limit:
+                    break
+            return [(item_id, round(score, 3)) for item_id, score in top.items()]
+
+        def members(expansions):
+            if len(expansions) == 1:
+                return self._postings[expansions[0][0]].keys()
+            return set().union(*(self._postings[token].keys() for token, _ in expansions))
+
+        # Items matching every word rank first; when there are enough of
+        # them only they need scoring
+        sets = sorted(map(members, per_word), key=len)
+        both = set(sets[0])
+        for other in sets[1:]:
+            both = set(filter(other.__contains__, both))
+        if len(both) >= limit:
+            scores = dict.fromkeys(both, 0.0)
+            for expansions in per_word:
+                if len(expansions) == 1:
+                    token, similarity = expansions[0]
+                    postings = self._postings[token]
+                    for item_id in both:
+                        scores[item_id] += postings[item_id] * similarity
+                    continue
+                best = dict.fromkeys(both, 0.0)
+                for token, similarity in expansions:
+                    postings = self._postings[token]
+                    for item_id in both.intersection(postings.keys()):
+                        best[item_id] = max(best[item_id], postings[item_id] * similarity)
+                for item_id, value in best.items():
+                    scores[item_id] += value
+            # Only items tied with or above the limit-th best score need a full sort
+            cutoff = heapq.nlargest(limit, scores.values())[-1]
+            top = sorted(
+                (item_id for item_id, value in scores.items() if value >= cutoff), key=self._rank_key(scores)
+            )[:limit]
+            return [(item_id, round(scores[item_id], 3)) for item_id in top]
+
+        scores, matched = Counter(), Counter()
+        for expansions in per_word:
+            best = {}
+            for token, similarity in expansions:
+                for item_id, weight in self._postings[token].items():
+                    if weight * similarity > best.get(item_id, 0):
+                        best[item_id] = weight * similarity
+            scores.update(best)
+            matched.update(best.keys())
+        top = heapq.nsmallest(
+            limit, scores, key=lambda item_id: (-matched[item_id], -scores[item_id], self._items[item_id][0])
+        )
+        return [(item_id, round(scores[item_id], 3)) for item_id in top]
+
+
+def build_index() -> SearchIndex:
+    """Build a fresh index of every menu item with one query."""
+    from products.models import MenuItem  # lazy import
+
+    index = SearchIndex()
+    rows = MenuItem.objects.values_list("id", "name", "description", "category_id", "category__name")
+    for item_id, name, description, category_id, category_name in rows.iterator():
+        index.add(item_id, name, description, category_id, category_name)
+    return index
+
+
+_index = None
+_lock = threading.Lock()
+_rebuilding = threading.Lock()
+
+
+def _rebuild(old: SearchIndex) -> None:
+    """Build a replacement for `old`, bring it up to date and swap it in."""
+    global _index
+    try:
+        index = build_index()
+        with _lock:
+            old.replace_with(index)
+            if _index is old:
+                _index = index  # swapped in whole, so readers never see a half-built index
+    except Exception:
+        logger.exception("Rebuilding the menu search index failed")
+    finally:
+        _rebuilding.release()
+
+
+def _rebuild_in_background(old: SearchIndex) -> None:
+    try:
+        _rebuild(old)
+    finally:
+        connections.close_all()  # this thread's connections
+
+
+def get_index() -> SearchIndex:
+    """
+    Return this process's index. The first call builds it; after that an
+    index older than MENU_SEARCH_INDEX_MAX_AGE is rebuilt in the background
+    while it keeps serving.
+    """
+    global _index
+    index = _index
+    if index is None:
+        with _lock:
+            if _index is None:
+                _index = build_index()
+            return _index
+
+    max_age = getattr(settings, "MENU_SEARCH_INDEX_MAX_AGE", 300)
+    if time.monotonic() - index.built_at > max_age and _rebuilding.acquire(blocking=False):
+        index.start_journal()
+        if getattr(settings, "MENU_SEARCH_BACKGROUND_REBUILD", True):
+            threading.Thread(
+                target=_rebuild_in_background, args=(index,), name="menu-search-rebuild", daemon=True
+            ).start()
+        else:
+            _rebuild(index)
+            return _index
+    return index
+
+
+def current_index() -> Optional[SearchIndex]:
+    """This process's index if it has been built (signals only update a built index)."""
+    return _index
+
+
+def reset_index() -> None:
+    """Drop the index; the next search rebuilds it."""
+    global _index
+    _index = None
+
+
+def search_queryset(queryset, query: str):
+    """
+    Filter `queryset` (of MenuItem) to the best RANKED_RESULTS matches of
+    the index for `query`, in rank order. Prefixes and substrings of words
+    are matched by the index, so the database only looks items up by id.
+    """
+    ids = [item_id for item_id, _ in get_index().search(query, RANKED_RESULTS)]
+    if not ids:
+        return queryset.none()
+    rank = Case(
+        *[When(pk=item_id, then=Value(position)) for position, item_id in enumerate(ids)],
+        default=Value(len(ids)),
+        output_field=IntegerField(),
+    )
+    return queryset.filter(pk__in=ids).order_by(rank, "name")
@@ -0,0 +1,311 @@
+# home/seating.py
+"""
+Table assignment for reservations.
+
+A SeatingPlan holds one day: every table's occupancy as a bitmap of
+15-minute slots (as in home.availability) and the bookings seated at it.
+Seating a booking picks the smallest free table that fits the party, so
+large tables are kept for large parties. When no suitable table is free,
+the plan tries to make room by moving the bookings that block one suitable
+table onto other free tables (best fit again) before giving up, so a new
+booking never re-solves the whole day.
+
+Assignments are saved together with the reservations' TableSlot rows (see
+home.booking), so the slot occupancy always matches the seating plan.
+
+Solving a day keeps the reservations that already hold a table where they
+are (a booking confirmed through home.booking owns its slots) and seats the
+rest largest party first (they have the fewest tables to choose from) and,
+within a size, earliest first, which maximises seated covers while keeping
+per-booking waste (capacity - party size) small.
+"""
+import bisect
+from datetime import date, time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+
+from .availability import MINUTES_PER_DAY, slot_mask
+
+
+class SeatingPlan:
+    """Table assignments for one day."""
+
+    def __init__(self, tables: Iterable[Tuple[int, int]], slot_minutes: int = 15):
+        """
+        Args:
+            tables: (table_number, capacity) pairs of the tables in service.
+            slot_minutes (int): Booking granularity in minutes.
+        """
+        self.slot_minutes = slot_minutes
+        # (capacity, table_number), smallest tables first; a table's position
+        # in this list is its bit in the per-slot free sets below
+        self._tables = sorted((capacity, table_number) for table_number, capacity in tables)
+        self._sizes = [capacity for capacity, _ in self._tables]
+        self._bit = {table_number: 1 << index for index, (_, table_number) in enumerate(self._tables)}
+        self.capacities = {table_number: capacity for capacity, table_number in self._tables}
+        # slot -> bitset of the tables free during that slot
+        self._free = [(1 << len(self._tables)) - 1] * (MINUTES_PER_DAY // slot_minutes)
+        self._seated: Dict[int, Dict[object, int]] = {table_number: {} for table_number in self.capacities}
+        self._bookings: Dict[object, Tuple[int, int]] = {}  # booking id -> (party size, mask)
+        self.assignments: Dict[object, Optional[int]] = {}  # booking id -> table number or None
+        # booking id -> whether it could move to another table; valid until the plan changes
+        self._movable: Dict[object, bool] = {}
+        self._fixed = set()  # bookings that must keep their table
+
+    # ------------------------
+    # Bookkeeping
+    # ------------------------
+    @staticmethod
+    def _slots(mask: int) -> range:
+        return range((mask & -mask).bit_length() - 1, mask.bit_length())
+
+    def _occupy(self, booking_id, table_number: int) -> None:
+        _, mask = self._bookings[booking_id]
+        keep = ~self._bit[table_number]
+        for slot in self._slots(mask):
+            self._free[slot] &= keep
+        self._seated[table_number][booking_id] = mask
+        self.assignments[booking_id] = table_number
+
+    def _vacate(self, booking_id) -> Optional[int]:
+        table_number = self.assignments.get(booking_id)
+        if table_number is not None:
+            _, mask = self._bookings[booking_id]
+            bit = self._bit[table_number]
+            for slot in self._slots(mask):
+                self._free[slot] |= bit
+            del self._seated[table_number][booking_id]
+            self.assignments[booking_id] = None
+        return table_number
+
+    def _best_fit(self, party_size: int, mask: int, allowed: int = -1) -> Optional[int]:
+        """Smallest of the `allowed` tables that seats `party_size` and is free for `mask`."""
+        candidates = (-1 << bisect.bisect_left(self._sizes, party_size)) & allowed
+        for slot in self._slots(mask):
+            candidates &= self._free[slot]
+            if not candidates:
+                return None
+        if candidates <= 0:
+            return None
+        return self._tables[(candidates & -candidates).bit_length() - 1][1]
+
+    def _can_move(self, booking_id) -> bool:
+        if booking_id in self._fixed:
+            return False
+        movable = self._movable.get(booking_id)
+        if movable is None:
+            movable = self._movable[booking_id] = self._best_fit(*self._bookings[booking_id]) is not None
+        return movable
+
+    def _make_room(self, booking_id, allowed: int = -1) -> Optional[int]:
+        """
+        Free a suitable table for `booking_id` by moving the bookings that
+        block it to other tables. Returns the table, or None (plan unchanged).
+        """
+        party_size, mask = self._bookings[booking_id]
+        for index in range(bisect.bisect_left(self._sizes, party_size), len(self._tables)):
+            if not allowed >> index & 1:
+                continue
+            table_number = self._tables[index][1]
+            blocking = [other for other, other_mask in self._seated[table_number].items() if other_mask & mask]
+            # Cheap check first: every blocker needs somewhere else to go
+            if not all(self._can_move(other) for other in blocking):
+                continue
+            for other in blocking:
+                self._vacate(other)
+            self._occupy(booking_id, table_number)
+
+            moved = []
+            for other in sorted(blocking, key=lambda other: -self._bookings[other][0]):
+                target = self._best_fit(*self._bookings[other])
+                if target is None:
+                    break
+                self._occupy(other, target)
+                moved.append(other)
+            else:
+                self._movable.clear()
+                return table_number
+
+            # Blockers competed for the same table: undo and try the next one
+            for other in moved:
+                self._vacate(other)
+            self._vacate(booking_id)
+            for other in blocking:
+                self._occupy(other, table_number)
+        return None
+
+    # ------------------------
+    # Public API
+    # ------------------------
+    def place(self, booking_id, party_size: int, start: time, end: time, table_number: int, fixed: bool = False) -> None:
+        """
+        Record an existing assignment as-is (e.g. when loading a day). A
+        `fixed` booking is never moved to make room for another.
+        """
+        self._bookings[booking_id] = (party_size, slot_mask(start, end, self.slot_minutes))
+        self._occupy(booking_id, table_number)
+        if fixed:
+            self._fixed.add(booking_id)
+        self._movable.clear()
+
+    def seat(self, booking_id, party_size: int, start: time, end: time, table_number: int = None) -> Optional[int]:
+        """
+        Seat a new booking (at `table_number` only, if given), moving
+        already-seated bookings between tables if that is the only way to fit it.
+
+        Returns:
+            int | None: The table number, or None if the party cannot be seated.
+        """
+        allowed = -1 if table_number is None else self._bit.get(table_number, 0)
+        self._bookings[booking_id] = (party_size, slot_mask(start, end, self.slot_minutes))
+        self.assignments[booking_id] = None
+        table_number = self._best_fit(*self._bookings[booking_id], allowed)
+        if table_number is not None:
+            self._occupy(booking_id, table_number)
+            self._movable.clear()
+            return table_number
+        return self._make_room(booking_id, allowed)
+
+    def release(self, booking_id) -> None:
+        """Remove a booking (e.g. after a cancellation)."""
+        self._vacate(booking_id)
+        self._bookings.pop(booking_id, None)
+        self.assignments.pop(booking_id, None)
+        self._fixed.discard(booking_id)
+        self._movable.clear()
+
+    @classmethod
+    def solve(cls, tables, bookings, slot_minutes: int = 15, fixed=()) -> "SeatingPlan":
+        """
+        Assign tables for a whole day.
+
+        Args:
+            tables: (table_number, capacity) pairs.
+            bookings: (booking_id, party_size, start_time, end_time) tuples to seat.
+            fixed: (booking_id, party_size, start_time, end_time, table_number)
+                tuples of bookings that keep their table.
+        """
+        plan = cls(tables, slot_minutes)
+        for booking_id, party_size, start, end, table_number in fixed:
+            plan.place(booking_id, party_size, start, end, table_number, fixed=True)
+        for booking_id, party_size, start, end in sorted(bookings, key=lambda b: (-b[1], b[2])):
+            plan.seat(booking_id, party_size, start, end)
+        return plan
+
+    # ------------------------
+    # Metrics
+    # ------------------------
+    @property
+    def unseated(self) -> List:
+        return [booking_id for booking_id, table_number in self.assignments.items() if table_number is None]
+
+    @property
+    def seated_covers(self) -> int:
+        return sum(
+            self._bookings[booking_id][0]
+            for booking_id, table_number in self.assignments.items()
+            if table_number is not None
+        )
+
+    @property
+    def wasted_seats(self) -> int:
+        """Empty chairs at occupied tables, summed over seated bookings."""
+        return sum(
+            self.capacities[table_number] - self._bookings[booking_id][0]
+            for booking_id, table_number in self.assignments.items()
+            if table_number is not None
+        )
+
+
+def _tables():
+    from .models import Table  # lazy import
+
+    return Table.objects.filter(is_available=True).values_list("table_number", "capacity")
+
+
+def _save_assignments(plan: SeatingPlan, reservations) -> List:
+    """
+    Save the reservations whose table changed, moving their TableSlot rows
+    with them; returns the changed reservations. A reservation that holds a
+    table never loses it.
+    """
+    from .models import Reservation, TableSlot  # lazy import
+
+    changed = []
+    for reservation in reservations:
+        table_number = plan.assignments.get(reservation.pk)
+        if table_number is None:
+            continue
+        if reservation.table_number != table_number:
+            reservation.table_number = table_number
+            changed.append(reservation)
+    if changed:
+        Reservation.objects.bulk_update(changed, ["table_number"])
+        # Release every moved slot before claiming the new ones, so swaps don't collide
+        TableSlot.objects.filter(reservation__in=changed).delete()
+        TableSlot.objects.bulk_create(
+            [slot for reservation in changed if reservation.table_number is not None for slot in reservation.slot_rows()]
+        )
+    return changed
+
+
+def assign_tables(day: date) -> SeatingPlan:
+    """
+    Assign tables to the reservations on `day` that have none and save the
+    result. Reservations that already hold a table in service keep it.
+
+    Returns:
+        SeatingPlan: The solved plan (see `unseated` for parties without a table).
+    """
+    from .models import Reservation  # lazy import
+
+    with transaction.atomic():
+        reservations = list(
+            Reservation.objects.select_for_update()
+            .filter(date=day)
+            .only("id", "party_size", "start_time", "end_time", "table_number")
+        )
+        tables = list(_tables())
+        in_service = {table_number for table_number, _ in tables}
+        plan = SeatingPlan.solve(
+            tables,
+            [(r.pk, r.party_size, r.start_time, r.end_time) for r in reservations if r.table_number not in in_service],
+            fixed=[
+                (r.pk, r.party_size, r.start_time, r.end_time, r.table_number)
+                for r in reservations
+                if r.table_number in in_service
+            ],
+        )
+        _save_assignments(plan, reservations)
+    return plan
+
+
+def seat_reservation(reservation, table_number: int = None) -> Optional[int]:
+    """
+    Give a saved reservation a table (`table_number`, if given). The other
+    reservations of its day that hold a table are pinned to it, so confirmed
+    bookings never move.
+
+    Returns:
+        int | None: The assigned table number, or None if no table fits.
+    """
+    from .models import Reservation  # lazy import
+
+    with transaction.atomic():
+        day = list(
+            Reservation.objects.select_for_update()
+            .filter(date=reservation.date)
+            .only("id", "party_size", "start_time", "end_time", "table_number")
+        )
+        plan = SeatingPlan(_tables())
+        for other in day:
+            if other.pk != reservation.pk and other.table_number in plan.capacities:
+                plan.place(other.pk, other.party_size, other.start_time, other.end_time, other.table_number, fixed=True)
+
+        table_number = plan.seat(
+            reservation.pk, reservation.party_size, reservation.start_time, reservation.end_time, table_number
+        )
+        _save_assignments(plan, [other for other in day if other.pk in plan.assignments])
+    reservation.table_number = table_number
+    return table_number
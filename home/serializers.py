@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import MenuCategory, Contact,Table,UserReview,Restaurant,OpeningHour
+from django.utils import timezone
+from .models import MenuCategory, Contact,Table,UserReview,Restaurant,OpeningHour,NewsletterSubscriber,Reservation
 from products.models import MenuItem
 from utils.validation_utils import is_valid_email
 
@@ -107,7 +108,14 @@ class NewsletterSubscriptionSerializer(serializers.Serializer):
     def validate_email(self, value):
         if not is_valid_email(value):
             raise serializers.ValidationError("Invalid email address format.")
-        return value
+        return value.lower()
+
+    def create(self, validated_data):
+        """Subscribe the address, re-activating it if it unsubscribed earlier."""
+        subscriber, _ = NewsletterSubscriber.objects.update_or_create(
+            email=validated_data["email"], defaults={"is_active": True}
+        )
+        return subscriber
 
 class OpeningHoursSerializer(serializers.ModelSerializer):
     class Meta:
@@ -119,3 +127,41 @@ class MenuItemSearchSerializer(serializers.ModelSerializer):
     class Meta:
         model = MenuItem
         fields = ["id", "name", "image"]  # Only return essential fields
+
+
+class ReservationAvailabilityQuerySerializer(serializers.Serializer):
+    """Query parameters for the reservation availability endpoint."""
+    date = serializers.DateField()
+    days = serializers.IntegerField(min_value=1, max_value=31, default=1)
+    party_size = serializers.IntegerField(min_value=1, max_value=50, default=2)
+    duration = serializers.IntegerField(min_value=15, max_value=8 * 60, default=60)
+    start = serializers.TimeField(required=False)
+    end = serializers.TimeField(required=False)
+
+
+class ReservationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Reservation
+        fields = ["id", "customer_name", "date", "start_time", "end_time", "party_size", "table_number"]
+        read_only_fields = fields
+
+
+class ReservationBookingSerializer(serializers.Serializer):
+    """Input for the reservation booking endpoint."""
+    customer_name = serializers.CharField(max_length=100)
+    date = serializers.DateField()
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+    party_size = serializers.IntegerField(min_value=1, max_value=50)
+    table_number = serializers.IntegerField(min_value=1, required=False)
+
+    def validate_date(self, value):
+        if value < timezone.localdate():
+            raise serializers.ValidationError("Reservations cannot be made for past dates.")
+        return value
+
+
+class ReservationCalendarQuerySerializer(serializers.Serializer):
+    """Query parameters for the reservation month calendar."""
+    month = serializers.RegexField(r"^\d{4}-(0[1-9]|1[0-2])$", error_messages={"invalid": "Use YYYY-MM."})
+    party_size = serializers.IntegerField(min_value=1, max_value=50, default=2)
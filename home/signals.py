@@ -0,0 +1,65 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from products.models import MenuItem
+from .models import MenuCategory, OpeningHour, Restaurant
+from .autocomplete import mark_stale
+from .schedule import invalidate_schedule
+from .search import current_index
+
+
+@receiver(post_save, sender=OpeningHour)
+@receiver(post_delete, sender=OpeningHour)
+@receiver(post_save, sender=Restaurant)
+@receiver(post_delete, sender=Restaurant)
+def invalidate_opening_schedule(sender, **kwargs):
+    # Drop now, and again after commit in case a reader recompiled in between
+    invalidate_schedule()
+    transaction.on_commit(invalidate_schedule)
+
+
+@receiver(post_save, sender=MenuItem)
+def index_menu_item(sender, instance, **kwargs):
+    """Keep the menu search index current (only once the write is committed)."""
+    def update():
+        index = current_index()
+        if index is not None:
+            category = None
+            if instance.category_id not in index.categories:
+                category = MenuCategory.objects.filter(pk=instance.category_id).values_list("name", flat=True).first()
+            index.add(instance.pk, instance.name, instance.description, instance.category_id, category)
+
+    transaction.on_commit(update)
+
+
+@receiver(post_delete, sender=MenuItem)
+def unindex_menu_item(sender, instance, **kwargs):
+    item_id = instance.pk  # delete() clears instance.pk before the commit callback runs
+
+    def update():
+        index = current_index()
+        if index is not None:
+            index.remove(item_id)
+
+    transaction.on_commit(update)
+
+
+@receiver(post_save, sender=MenuCategory)
+def reindex_menu_category(sender, instance, created, **kwargs):
+    if created:
+        return
+
+    def update():
+        index = current_index()
+        if index is not None:
+            index.rename_category(instance.pk, instance.name)
+
+    transaction.on_commit(update)
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+@receiver(post_save, sender=MenuCategory)
+@receiver(post_delete, sender=MenuCategory)
+def refresh_menu_autocomplete(sender, **kwargs):
+    transaction.on_commit(mark_stale)
@@ -1,3 +1,508 @@
-from django.test import TestCase
+import zoneinfo
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.db import SessionStore
+from django.core import mail
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from rest_framework.test import APIRequestFactory
+
+from orders.models import Order, OrderItem
+from products.models import MenuItem
+from utils.email import deliver_queued_emails, queue_email, send_order_confirmation_email
+from .autocomplete import get_autocomplete, reset_autocomplete
+from .availability import AvailabilityEngine
+from .booking import BookingConflict, book, month_calendar
+from .models import (
+    Contact,
+    MenuCategory,
+    NewsletterCampaign,
+    NewsletterDelivery,
+    NewsletterSubscriber,
+    OpeningHour,
+    OutboundEmail,
+    Reservation,
+    Restaurant,
+    Table,
+    TableSlot,
+)
+from .newsletter import create_campaign, run_campaign
+from .seating import SeatingPlan, assign_tables, seat_reservation
+from .schedule import OpeningSchedule, get_schedule, invalidate_schedule
+from . import search
+from .search import get_index, reset_index, search_queryset
+from .serializers import NewsletterSubscriptionSerializer
+from .utils import is_restaurant_open
+from .views import (
+    MenuAutocompleteAPIView,
+    MenuItemSearchAPIView,
+    ReservationAvailabilityAPIView,
+    ReservationBookingAPIView,
+    contact_view,
+)
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class EmailOutboxTest(TestCase):
+    def test_contact_form_queues_notification(self):
+        request = RequestFactory().post(
+            "/contact/", {"name": "Asha", "email": "asha@example.com", "message": "Hello"}
+        )
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+
+        response = contact_view(request)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Contact.objects.filter(email="asha@example.com").exists())
+        queued = OutboundEmail.objects.get()
+        self.assertIn("Asha", queued.subject)
+        self.assertEqual(len(mail.outbox), 0)  # nothing sent during the request
+
+    def test_worker_drains_queue_over_one_connection(self):
+        for i in range(3):
+            queue_email(f"Hi {i}", "Body", [f"user{i}@example.com"])
+        self.assertTrue(send_order_confirmation_email(7, "buyer@example.com", "1 x Pizza")["success"])
+
+        out = StringIO()
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.close") as close:
+            call_command("send_queued_emails", "--batch-size", "2", stdout=out)
+        close.assert_called_once_with()  # kept open across both batches
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertIn("Sent 4 emails", out.getvalue())
+        self.assertFalse(OutboundEmail.objects.exclude(status=OutboundEmail.SENT).exists())
+
+    def test_failures_back_off_then_give_up(self):
+        email = queue_email("Hi", "Body", ["user@example.com"])
+        with mock.patch("django.core.mail.EmailMessage.send", side_effect=OSError("boom")):
+            metrics = deliver_queued_emails(max_attempts=2)
+            self.assertEqual(metrics["retried"], 1)
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts, email.last_error), (OutboundEmail.PENDING, 1, "boom"))
+            self.assertGreater(email.next_attempt_at, timezone.now())
+
+            # Not due yet, then due again and out of attempts
+            self.assertEqual(deliver_queued_emails(max_attempts=2)["claimed"], 0)
+            OutboundEmail.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+            self.assertEqual(deliver_queued_emails(max_attempts=2)["failed"], 1)
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboundEmail.FAILED)
+        self.assertEqual(len(mail.outbox), 0)
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class NewsletterFanOutTest(TestCase):
+    def setUp(self):
+        NewsletterSubscriber.objects.bulk_create(
+            NewsletterSubscriber(email=f"reader{i}@example.com") for i in range(10)
+        )
+        NewsletterSubscriber.objects.filter(email="reader3@example.com").update(is_active=False)
+
+    def test_subscription_is_persisted_and_reactivated(self):
+        serializer = NewsletterSubscriptionSerializer(data={"email": "Reader3@Example.com"})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+        self.assertTrue(NewsletterSubscriber.objects.get(email="reader3@example.com").is_active)
+
+    def test_command_sends_to_active_subscribers_in_chunks(self):
+        out = StringIO()
+        call_command("send_newsletter", "--subject", "Specials", "--body", "Hello", "--chunk-size", "4", stdout=out)
+        self.assertEqual(len(mail.outbox), 9)
+        self.assertEqual({m.to[0] for m in mail.outbox} & {"reader3@example.com"}, set())
+        self.assertIsNotNone(NewsletterCampaign.objects.get().completed_at)
+        self.assertIn("sent 9 emails", out.getvalue())
+
+    def test_interrupted_campaign_resumes_from_checkpoint(self):
+        campaign = create_campaign("Specials", "Hello", workers=3)
+        self.assertEqual(campaign.deliveries.count(), 3)
+
+        # Pretend the first range crashed after its first chunk of two
+        first = campaign.deliveries.first()
+        ids = list(NewsletterSubscriber.objects.filter(id__gt=first.last_subscriber_id).order_by("id").values_list("id", flat=True)[:2])
+        NewsletterDelivery.objects.filter(pk=first.pk).update(last_subscriber_id=ids[-1], sent_count=2)
+
+        totals = run_campaign(campaign, chunk_size=2)
+        self.assertEqual(totals, {"sent": 7, "failed": 0})
+        self.assertEqual(len(mail.outbox), 7)
+        campaign.refresh_from_db()
+        self.assertIsNotNone(campaign.completed_at)
+
+        # Nothing left to send
+        self.assertEqual(run_campaign(campaign), {"sent": 0, "failed": 0})
+
+
+class AvailabilityEngineTest(TestCase):
+    def setUp(self):
+        self.day = date(2025, 11, 7)
+        Table.objects.create(table_number=1, capacity=2)
+        Table.objects.create(table_number=2, capacity=4)
+        Table.objects.create(table_number=3, capacity=8, is_available=False)
+        Reservation.objects.create(
+            customer_name="A", date=self.day, start_time=time(19, 0), end_time=time(20, 30), table_number=2
+        )
+        Reservation.objects.create(
+            customer_name="B", date=self.day + timedelta(days=1), start_time=time(18, 0), end_time=time(19, 0), table_number=1
+        )
+
+    def test_free_tables_respect_capacity_and_bookings(self):
+        engine = AvailabilityEngine(self.day)
+        self.assertEqual(engine.free_tables(self.day, time(19, 30), time(20, 0), party_size=1), [1])
+        self.assertEqual(engine.free_tables(self.day, time(20, 30), time(21, 0), party_size=3), [2])
+        self.assertEqual(engine.free_tables(self.day, time(19, 0), time(20, 0), party_size=3), [])
+
+    def test_week_is_answered_with_two_queries(self):
+        with self.assertNumQueries(2):
+            engine = AvailabilityEngine(self.day, days=7)
+            by_day = engine.free_slots_by_day(party_size=3, duration_minutes=60, start_range=time(18, 0), end_range=time(22, 0))
+        self.assertEqual(len(by_day), 7)
+        starts = [start for start, _, _ in by_day[self.day]]
+        self.assertIn(time(18, 0), starts)
+        self.assertNotIn(time(18, 15), starts)  # would overlap 19:00-20:30 on table 2
+        self.assertIn(time(20, 30), starts)
+        self.assertEqual(len(by_day[self.day + timedelta(days=1)]), 13)
+
+    def test_find_available_slots_uses_tables(self):
+        invalidate_schedule()  # default hours: Friday 09:00-22:00
+        slots = Reservation.find_available_slots(self.day, time(19, 0), time(21, 0), party_size=3)
+        self.assertEqual(slots, [])
+        slots = Reservation.find_available_slots(self.day, time(19, 0), time(21, 0), party_size=2)
+        self.assertEqual(slots, [(time(19, 0), time(20, 0)), (time(20, 0), time(21, 0))])
+        # Clipped to the opening hours of the requested day
+        slots = Reservation.find_available_slots(self.day, time(20, 0), time(23, 59), party_size=2)
+        self.assertEqual(slots, [(time(20, 0), time(21, 0)), (time(21, 0), time(22, 0))])
+
+    def test_slots_run_to_a_midnight_closing(self):
+        invalidate_schedule()
+        self.addCleanup(invalidate_schedule)
+        OpeningHour.objects.create(day="Friday", opening_time=time(20, 0), closing_time=time(0, 0))
+        slots = Reservation.find_available_slots(self.day, time(22, 0), time(0, 0), party_size=2)
+        self.assertEqual(slots, [(time(22, 0), time(23, 0)), (time(23, 0), time(0, 0))])
+
+        request = APIRequestFactory().get("/api/reservations/availability/", {"date": self.day.isoformat(), "start": "23:00"})
+        response = ReservationAvailabilityAPIView.as_view()(request)
+        self.assertEqual(response.data["days"][0]["slots"], [{"start": "23:00", "end": "24:00", "tables": [1, 2]}])
+
+
+@override_settings(TIME_ZONE="UTC")
+class OpeningScheduleTest(TestCase):
+    def setUp(self):
+        invalidate_schedule()
+        self.addCleanup(invalidate_schedule)
+        self.tz = zoneinfo.ZoneInfo("UTC")
+
+    def at(self, day, hour, minute=0):
+        return datetime(2025, 11, day, hour, minute, tzinfo=self.tz)  # 2025-11-03 is a Monday
+
+    @override_settings(RESTAURANT_TIME_ZONE="Asia/Kolkata", OPENING_SCHEDULE_MAX_AGE=-1)
+    def test_hours_use_the_restaurant_time_zone_and_are_recompiled_when_old(self):
+        OpeningHour.objects.create(day="Monday", opening_time=time(9, 0), closing_time=time(17, 0))
+        schedule = get_schedule()
+        self.assertEqual(str(schedule.tz), "Asia/Kolkata")
+        self.assertTrue(schedule.is_open(self.at(3, 4, 0)))  # 09:30 in Kolkata
+        # An edit made by another process (no signal here) is picked up
+        OpeningHour.objects.filter(day="Monday").update(opening_time=time(10, 0))
+        self.assertFalse(get_schedule().is_open(self.at(3, 4, 0)))
+
+    def test_overnight_and_week_wrap(self):
+        schedule = OpeningSchedule(
+            [(4, time(18, 0), time(2, 0)), (6, time(20, 0), time(1, 0))], tz=self.tz
+        )
+        self.assertTrue(schedule.is_open(self.at(7, 23)))  # Friday night
+        self.assertTrue(schedule.is_open(self.at(8, 1, 59)))  # Saturday small hours
+        self.assertFalse(schedule.is_open(self.at(8, 2)))
+        self.assertTrue(schedule.is_open(self.at(3, 0, 30)))  # Sunday night into Monday
+        self.assertFalse(schedule.is_open(self.at(3, 1)))
+        self.assertEqual(schedule.next_open(self.at(8, 12)), self.at(9, 20))
+        self.assertEqual(schedule.next_open(self.at(9, 21)), self.at(9, 21))
+        # After Sunday's opening the next one is Friday of the following week
+        self.assertEqual(schedule.next_open(self.at(3, 2)), self.at(7, 18))
+        self.assertTrue(schedule.covers(date(2025, 11, 7), 22 * 60, 24 * 60))
+        self.assertFalse(schedule.covers(date(2025, 11, 7), 17 * 60, 19 * 60))
+
+    def test_compiled_from_opening_hour_rows_and_invalidated_on_save(self):
+        hours = OpeningHour.objects.create(day="Monday", opening_time=time(11, 0), closing_time=time(15, 0))
+        self.assertTrue(is_restaurant_open(self.at(3, 12)))
+        self.assertFalse(is_restaurant_open(self.at(4, 12)))  # no row for Tuesday
+
+        hours.closing_time = time(11, 30)
+        hours.save()
+        self.assertFalse(is_restaurant_open(self.at(3, 12)))
+
+    def test_restaurant_opening_hours_strings(self):
+        Restaurant.objects.create(
+            name="Test",
+            phone="1",
+            opening_hours={"Monday": "9:00 AM - 10:00 PM", "Tuesday": "Closed", "Friday": "18:00-02:00", "Sunday": "soon"},
+        )
+        schedule = get_schedule()
+        self.assertTrue(schedule.is_open(self.at(3, 21, 59)))
+        self.assertFalse(schedule.is_open(self.at(4, 12)))
+        self.assertTrue(schedule.is_open(self.at(8, 1)))
+        self.assertFalse(schedule.is_open(self.at(9, 12)))  # unparseable entry is skipped
+
+
+class SeatingPlanTest(TestCase):
+    def test_best_fit_keeps_big_tables_for_big_parties(self):
+        plan = SeatingPlan.solve(
+            [(1, 8), (2, 2), (3, 4)],
+            [("couple", 2, time(19, 0), time(21, 0)), ("six", 6, time(19, 0), time(21, 0)), ("four", 4, time(20, 0), time(22, 0))],
+        )
+        self.assertEqual(plan.assignments, {"six": 1, "four": 3, "couple": 2})
+        self.assertEqual(plan.seated_covers, 12)
+        self.assertEqual(plan.wasted_seats, 2)
+
+    def test_new_booking_moves_a_smaller_party(self):
+        plan = SeatingPlan([(1, 4), (2, 2)])
+        plan.place("couple", 2, time(19, 0), time(21, 0), 1)
+        self.assertEqual(plan.seat("four", 4, time(20, 0), time(22, 0)), 1)
+        self.assertEqual(plan.assignments["couple"], 2)
+
+        # No room left, and nothing changes
+        self.assertIsNone(plan.seat("other", 2, time(20, 0), time(21, 0)))
+        self.assertEqual(plan.assignments, {"couple": 2, "four": 1, "other": None})
+
+    def test_seat_reservation_keeps_booked_tables(self):
+        day = date(2025, 11, 7)
+        Table.objects.create(table_number=1, capacity=4)
+        Table.objects.create(table_number=2, capacity=2)
+        couple = Reservation.objects.create(
+            customer_name="A", date=day, start_time=time(19, 0), end_time=time(21, 0), party_size=2, table_number=1
+        )
+        TableSlot.objects.bulk_create(couple.slot_rows())
+        four = Reservation.objects.create(
+            customer_name="B", date=day, start_time=time(19, 0), end_time=time(20, 0), party_size=4
+        )
+        # Only moving the couple would free the big table, and a booked table is never taken away
+        self.assertIsNone(seat_reservation(four))
+        couple.refresh_from_db()
+        four.refresh_from_db()
+        self.assertEqual((couple.table_number, four.table_number), (1, None))
+        self.assertEqual(set(couple.slots.values_list("table_number", flat=True)), {1})
+
+        two = Reservation.objects.create(
+            customer_name="C", date=day, start_time=time(19, 0), end_time=time(20, 0), party_size=2
+        )
+        self.assertEqual(seat_reservation(two), 2)
+        self.assertEqual(two.slots.filter(table_number=2).count(), 4)
+
+    def test_assign_tables_command(self):
+        day = date(2025, 11, 7)
+        Table.objects.create(table_number=1, capacity=2)
+        for name in "AB":
+            Reservation.objects.create(customer_name=name, date=day, start_time=time(19, 0), end_time=time(20, 0), party_size=2)
+        out = StringIO()
+        call_command("assign_tables", "--date", "2025-11-07", stdout=out)
+        self.assertIn("Seated 1 reservations", out.getvalue())
+        self.assertEqual(Reservation.objects.filter(table_number=1).count(), 1)
+
+    def test_assign_tables_keeps_booked_tables(self):
+        invalidate_schedule()
+        self.addCleanup(invalidate_schedule)
+        day = timezone.localdate() + timedelta(days=7)
+        Table.objects.create(table_number=1, capacity=2)
+        Table.objects.create(table_number=2, capacity=4)
+        booked = book("A", day, time(19, 0), time(20, 0), 2, table_number=2)
+        walk_in = Reservation.objects.create(
+            customer_name="B", date=day, start_time=time(19, 0), end_time=time(20, 0), party_size=4
+        )
+        plan = assign_tables(day)
+        self.assertEqual(plan.unseated, [walk_in.pk])
+        booked.refresh_from_db()
+        self.assertEqual(booked.table_number, 2)
+        self.assertEqual(booked.slots.count(), 4)
+
+
+class ReservationBookingTest(TestCase):
+    def setUp(self):
+        invalidate_schedule()  # default hours
+        self.addCleanup(invalidate_schedule)
+        self.day = timezone.localdate() + timedelta(days=7)
+        Table.objects.create(table_number=1, capacity=2)
+        Table.objects.create(table_number=2, capacity=4)
+
+    def test_bookings_fill_smallest_tables_then_conflict(self):
+        first = book("A", self.day, time(19, 0), time(20, 30), 2)
+        second = book("B", self.day, time(20, 0), time(21, 0), 2)
+        self.assertEqual((first.table_number, second.table_number), (1, 2))
+        self.assertEqual(first.slots.count(), 6)
+        with self.assertRaises(BookingConflict):
+            book("C", self.day, time(20, 15), time(20, 45), 1)
+        # Back-to-back bookings don't overlap
+        self.assertEqual(book("D", self.day, time(20, 30), time(21, 30), 2).table_number, 1)
+
+    def test_slot_taken_between_lookup_and_insert_is_seated_again(self):
+        book("A", self.day, time(19, 0), time(20, 0), 2, table_number=1)
+        attempts = []
+
+        def taken_by_a_concurrent_booking(reservation, table_number=None):
+            attempts.append(reservation.pk)
+            if len(attempts) == 1:
+                raise IntegrityError("UNIQUE constraint failed: home_tableslot")
+            return seat_reservation(reservation, table_number)
+
+        with mock.patch("home.booking.seat_reservation", side_effect=taken_by_a_concurrent_booking):
+            reservation = book("B", self.day, time(19, 30), time(20, 30), 2)
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(reservation.table_number, 2)
+        self.assertEqual(Reservation.objects.count(), 2)  # the failed attempt was rolled back
+
+    def test_requested_table_must_seat_the_party(self):
+        self.assertEqual(book("A", self.day, time(19, 0), time(20, 0), 2, table_number=2).table_number, 2)
+        with self.assertRaises(BookingConflict):
+            book("B", self.day, time(19, 0), time(20, 0), 3, table_number=1)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_booking_endpoint(self):
+        view = ReservationBookingAPIView.as_view()
+        payload = {"customer_name": "A", "date": self.day.isoformat(), "start_time": "19:00", "end_time": "20:00", "party_size": 4}
+        response = view(APIRequestFactory().post("/api/reservations/", payload, format="json"))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["table_number"], 2)
+        response = view(APIRequestFactory().post("/api/reservations/", payload, format="json"))
+        self.assertEqual(response.status_code, 409)
+        payload["start_time"], payload["end_time"] = "23:00", "23:45"  # after closing
+        response = view(APIRequestFactory().post("/api/reservations/", payload, format="json"))
+        self.assertEqual(response.status_code, 400)
+
+    def test_month_calendar_uses_one_aggregate_query(self):
+        OpeningHour.objects.create(day="Monday", opening_time=time(18, 0), closing_time=time(20, 0))
+        monday = self.day - timedelta(days=self.day.weekday())
+        if monday < timezone.localdate():
+            monday += timedelta(days=7)
+        book("A", monday, time(18, 0), time(20, 0), 2)
+        get_schedule()
+
+        with self.assertNumQueries(2):  # suitable tables + slot counts
+            days = {row["date"]: row for row in month_calendar(monday.year, monday.month, party_size=1)}
+        self.assertEqual(days[monday]["open_slots"], 16)
+        self.assertEqual(days[monday]["booked_slots"], 8)
+        self.assertEqual(days[monday]["status"], "available")
+        self.assertEqual(days[monday + timedelta(days=1)]["status"], "closed")
+        self.assertEqual(month_calendar(monday.year, monday.month, party_size=3)[monday.day - 1]["status"], "available")
+
+        book("B", monday, time(18, 0), time(20, 0), 4)
+        self.assertEqual(month_calendar(monday.year, monday.month, party_size=3)[monday.day - 1]["status"], "full")
+
+
+class MenuSearchTest(TestCase):
+    def setUp(self):
+        reset_index()
+        self.addCleanup(reset_index)
+        self.mains = MenuCategory.objects.create(name="Mains")
+        self.desserts = MenuCategory.objects.create(name="Desserts")
+        self.tikka = MenuItem.objects.create(name="Chicken Tikka", description="Smoky and spicy", price="250.00", category=self.mains)
+        self.soup = MenuItem.objects.create(name="Tomato Soup", description="With a little chicken stock", price="120.00", category=self.mains)
+        self.brulee = MenuItem.objects.create(name="Crème Brûlée", description="Vanilla custard", price="180.00", category=self.desserts)
+
+    def ids(self, query, limit=20):
+        return [item_id for item_id, _ in get_index().search(query, limit)]
+
+    def test_ranking_and_typo_tolerance(self):
+        self.assertEqual(self.ids("chicken"), [self.tikka.pk, self.soup.pk])  # name beats description
+        self.assertEqual(self.ids("chiken"), [self.tikka.pk, self.soup.pk])
+        self.assertEqual(self.ids("creme brulee"), [self.brulee.pk])
+        self.assertEqual(self.ids("dessert"), [self.brulee.pk])
+        self.assertEqual(self.ids("spicy chicken"), [self.tikka.pk, self.soup.pk])  # all words first
+        self.assertEqual(self.ids("xyz"), [])
+
+    def test_prefixes_and_substrings_match(self):
+        paneer = MenuItem.objects.create(name="Paneer Tikka", price="220.00", category=self.mains)
+        reset_index()
+        self.assertEqual(self.ids("pan"), [paneer.pk])
+        self.assertEqual(self.ids("tik"), [self.tikka.pk, paneer.pk])
+        self.assertEqual(self.ids("ato"), [self.soup.pk])
+        self.assertEqual(self.ids("rulee"), [self.brulee.pk])
+
+    def test_queryset_looks_items_up_by_id(self):
+        results = search_queryset(MenuItem.objects.all(), "ato")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(list(results), [self.soup])
+        self.assertNotIn("LIKE", queries[0]["sql"].upper())
+        self.assertEqual(list(search_queryset(MenuItem.objects.all(), "xyz")), [])
+
+    @override_settings(MENU_SEARCH_INDEX_MAX_AGE=-1, MENU_SEARCH_BACKGROUND_REBUILD=False)
+    def test_rebuild_keeps_updates_made_meanwhile(self):
+        old = get_index()
+        build = search.build_index
+
+        def build_while_soup_is_removed():
+            index = build()
+            old.remove(self.soup.pk)  # lands on the old index after the new one read the menu
+            return index
+
+        with mock.patch("home.search.build_index", side_effect=build_while_soup_is_removed):
+            new = get_index()
+        self.assertIsNot(new, old)
+        self.assertEqual(new.search("tomato"), [])
+
+        old.remove(self.tikka.pk)  # a late update to the old index reaches the new one
+        self.assertEqual(new.search("chicken"), [])
+
+    def test_index_follows_menu_writes(self):
+        get_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            naan = MenuItem.objects.create(name="Garlic Naan", price="60.00", category=self.mains)
+        self.assertEqual(self.ids("garlic"), [naan.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.desserts.name = "Sweets"
+            self.desserts.save()
+        self.assertEqual(self.ids("sweets"), [self.brulee.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tikka.delete()
+        self.assertEqual(self.ids("chicken"), [self.soup.pk])
+
+    def test_search_endpoint(self):
+        request = APIRequestFactory().get("/menu/search/", {"q": "tikka chiken", "limit": 1})
+        response = MenuItemSearchAPIView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(response.data["results"][0]["name"], "Chicken Tikka")
+        self.assertIn("score", response.data["results"][0])
+
+
+@override_settings(MENU_AUTOCOMPLETE_BACKGROUND_REBUILD=False)
+class MenuAutocompleteTest(TestCase):
+    def setUp(self):
+        reset_autocomplete()
+        self.addCleanup(reset_autocomplete)
+        mains = MenuCategory.objects.create(name="Chef Specials")
+        self.tikka = MenuItem.objects.create(name="Chicken Tikka", price="250.00", category=mains)
+        self.chilli = MenuItem.objects.create(name="Chilli Paneer", price="220.00", category=mains)
+        self.chai = MenuItem.objects.create(name="Chai", price="40.00", category=mains, is_available=False)
+        order = Order.objects.create(customer=User.objects.create_user("diner", password="pw"))
+        OrderItem.objects.create(order=order, menu_item=self.chilli, quantity=3)
+        OrderItem.objects.create(order=order, menu_item=self.tikka, quantity=1)
+        self.mains = mains
+
+    def texts(self, query, limit=10):
+        return [text for _, text, _, _ in get_autocomplete().suggest(query, limit)]
+
+    def test_prefixes_ranked_by_popularity(self):
+        self.assertEqual(self.texts("ch"), ["Chef Specials", "Chilli Paneer", "Chicken Tikka"])
+        self.assertEqual(self.texts("CHI"), ["Chilli Paneer", "Chicken Tikka"])
+        self.assertEqual(self.texts("tik"), ["Chicken Tikka"])  # later words match too
+        self.assertEqual(self.texts("ch", limit=1), ["Chef Specials"])
+        self.assertEqual(self.texts("chai"), [])  # unavailable
+
+    def test_menu_changes_swap_in_a_new_index(self):
+        old = get_autocomplete()
+        with self.captureOnCommitCallbacks(execute=True):
+            MenuItem.objects.create(name="Chana Masala", price="180.00", category=self.mains)
+        self.assertIsNot(get_autocomplete(), old)
+        self.assertIn("Chana Masala", self.texts("chana"))
+
+    def test_autocomplete_endpoint(self):
+        request = APIRequestFactory().get("/api/menu/autocomplete/", {"q": "chi", "limit": 1})
+        response = MenuAutocompleteAPIView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["suggestions"], [{"text": "Chilli Paneer", "type": "item", "id": self.chilli.pk}])
@@ -18,10 +18,15 @@ from .views import (
     UserReviewCreateView,
     MenuItemReviewListView,
     RestaurantInfoView,
+    NewsletterSubscribeAPIView,
+    ReservationAvailabilityAPIView,
+    ReservationBookingAPIView,
+    ReservationCalendarAPIView,
     EmailValidationView,
     MenuCategoryListView,
     OpeningHourListAPIView,
-    MenuItemSearchAPIView
+    MenuItemSearchAPIView,
+    MenuAutocompleteAPIView,
 )
 
 # DRF Router for ViewSets
@@ -65,8 +70,13 @@ urlpatterns = [
         MenuItemReviewListView.as_view(),
         name="menu_item_reviews"
     ),
+    path("api/reservations/", ReservationBookingAPIView.as_view(), name="reservation-book"),
+    path("api/reservations/calendar/", ReservationCalendarAPIView.as_view(), name="reservation-calendar"),
+    path("api/reservations/availability/", ReservationAvailabilityAPIView.as_view(), name="reservation-availability"),
+    path("api/newsletter/subscribe/", NewsletterSubscribeAPIView.as_view(), name="newsletter-subscribe"),
     path("validate-email/", EmailValidationView.as_view(), name="validate-email"),
     path("categories/", MenuCategoryListView.as_view(), name="menu-category-list"),
     path("opening-hours/", OpeningHourListAPIView.as_view(), name="opening-hours"),
     path("menu/search/", MenuItemSearchAPIView.as_view(), name="menu-item-search"),
+    path("api/menu/autocomplete/", MenuAutocompleteAPIView.as_view(), name="menu-autocomplete"),
 ]
@@ -2,7 +2,8 @@ from django.core.mail import EmailMessage
 from django.conf import settings
 import logging
 import asyncio
-from datetime import datetime, time
+from datetime import datetime
+from utils.pricing import discounted_unit_price, from_minor, to_basis_points, to_minor
 
 logger = logging.getLogger(__name__)
 
@@ -32,39 +33,17 @@ async def send_email_async(subject: str, body: str, recipient_list: list, from_e
         return False
 
 
-def is_restaurant_open() -> bool:
+def is_restaurant_open(moment: datetime = None) -> bool:
     """
-    Check if the restaurant is currently open based on predefined operating hours.
+    Check if the restaurant is open at `moment` (default: now), using the
+    compiled opening-hours schedule (see home.schedule).
 
     Returns:
         bool: True if the restaurant is open, False otherwise.
     """
-    # Get current day (0=Monday, 6=Sunday) and current time
-    now = datetime.now()
-    current_day = now.weekday()
-    current_time = now.time()
-
-    # Define operating hours
-    # Example: Open 9:00 AM to 10:00 PM (same hours every day)
-    opening_hours = {
-        0: (time(9, 0), time(22, 0)),  # Monday
-        1: (time(9, 0), time(22, 0)),  # Tuesday
-        2: (time(9, 0), time(22, 0)),  # Wednesday
-        3: (time(9, 0), time(22, 0)),  # Thursday
-        4: (time(9, 0), time(22, 0)),  # Friday
-        5: (time(10, 0), time(23, 0)), # Saturday
-        6: (time(10, 0), time(22, 0)), # Sunday
-    }
-
-    # Get today's open and close time
-    open_time, close_time = opening_hours.get(current_day, (None, None))
-
-    # If no hours defined, restaurant is closed
-    if not open_time or not close_time:
-        return False
+    from .schedule import get_schedule  # lazy import to avoid circular imports
 
-    # Check if current time is within operating hours
-    return open_time <= current_time <= close_time
+    return get_schedule().is_open(moment)
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -84,21 +63,18 @@ def calculate_discount(original_price, discount_percentage):
         ValueError: If inputs are invalid (e.g., negative price or invalid percentage).
     """
     try:
-        # ✅ Convert input to float for safety
-        original_price = float(original_price)
-        discount_percentage = float(discount_percentage)
+        # ✅ Work in paise/basis points to avoid float rounding
+        price = to_minor(original_price)
+        discount_bp = to_basis_points(discount_percentage)
 
         # ✅ Validate inputs
-        if original_price < 0:
+        if price < 0:
             raise ValueError("Original price cannot be negative.")
-        if not (0 <= discount_percentage <= 100):
-            raise ValueError("Discount percentage must be between 0 and 100.")
 
         # ✅ Calculate discounted price
-        discounted_price = original_price * (1 - discount_percentage / 100)
-        return round(discounted_price, 2)
+        return float(from_minor(discounted_unit_price(price, discount_bp)))
 
-    except (ValueError, TypeError) as e:
+    except (ValueError, TypeError, ArithmeticError) as e:
         logger.warning(f"Invalid discount calculation input: price={original_price}, discount={discount_percentage}. Error: {e}")
         return original_price  # Return original price as fallback
     except Exception as e:
@@ -5,7 +5,7 @@ from django.contrib import messages
 from django.shortcuts import get_object_or_404
 
 # Django REST Framework modules
-from rest_framework import viewsets, generics, status, filters, permissions
+from rest_framework import viewsets, generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
@@ -15,10 +15,16 @@ from rest_framework.generics import ListAPIView
 # Local modules
 from .forms import ContactForm, FeedbackForm
 from .models import MenuCategory, Contact
-from .serializers import MenuCategorySerializer, MenuItemSerializer, ContactSerializer,TableSerializer,DailySpecialSerializer,UserReviewSerializer,RestaurantSerializer,OpeningHourSerializer
-from .utils import send_email_async
+from .serializers import MenuCategorySerializer, MenuItemSerializer, ContactSerializer,TableSerializer,DailySpecialSerializer,UserReviewSerializer,RestaurantSerializer,OpeningHoursSerializer,MenuItemSearchSerializer,NewsletterSubscriptionSerializer,ReservationAvailabilityQuerySerializer,ReservationBookingSerializer,ReservationCalendarQuerySerializer,ReservationSerializer
+from .autocomplete import get_autocomplete
+from .availability import AvailabilityEngine, end_label
+from .booking import BookingConflict, BookingError, book, month_calendar
+from .schedule import get_schedule
+from .search import get_index, search_queryset
+from utils.email import queue_email
 from utils.validation_utils import is_valid_email
 from products.models import MenuItem
+from products.snapshot import menu_items
 from .models import Restaurant, Table, UserReview, OpeningHour
 
 # ==========================
@@ -28,7 +34,7 @@ from .models import Restaurant, Table, UserReview, OpeningHour
 def homepage_view(request):
     """Display the homepage with menu search and restaurant details."""
     query = request.GET.get("q", "")
-    menu_items = MenuItem.objects.filter(name__icontains=query) if query else MenuItem.objects.all()
+    menu_items = search_queryset(MenuItem.objects.all(), query) if query else MenuItem.objects.all()
     restaurant = Restaurant.objects.first()
 
     # Initialize or read cart from session
@@ -49,9 +55,8 @@ def homepage_view(request):
 
 
 def menu_view(request):
-    """Display the complete menu."""
-    menu_items = MenuItem.objects.all()
-    return render(request, "home/menu.html", {"menu": menu_items})
+    """Display the complete menu (from the versioned menu snapshot)."""
+    return render(request, "home/menu.html", {"menu": menu_items()})
 
 
 def about_view(request):
@@ -82,7 +87,7 @@ def feedback_view(request):
 
 
 def contact_view(request):
-    """Handle contact form submissions and send async email notifications."""
+    """Handle contact form submissions and queue an email notification."""
     if request.method == "POST":
         form = ContactForm(request.POST)
         if form.is_valid():
@@ -99,12 +104,12 @@ def contact_view(request):
                 -- Swaadify Contact Form
             """
 
-            send_email_async(
+            # Delivered by the send_queued_emails worker, not during the request
+            queue_email(
                 subject,
                 message,
-                settings.DEFAULT_FROM_EMAIL,
                 [getattr(settings, 'RESTAURANT_EMAIL', 'admin@example.com')],
-                fail_silently=False,
+                from_email=settings.DEFAULT_FROM_EMAIL,
             )
 
             messages.success(request, "Thank you for contacting us! We’ll get back to you soon.")
@@ -165,12 +170,17 @@ class MenuItemPagination(PageNumberPagination):
 
 
 class MenuItemViewSet(viewsets.ReadOnlyModelViewSet):
-    """API endpoint to list and search menu items by name."""
-    queryset = MenuItem.objects.all().order_by("name")
+    """API endpoint to list and search (?search=) menu items, best matches first."""
+    queryset = MenuItem.objects.select_related("category").order_by("name")
     serializer_class = MenuItemSerializer
     pagination_class = MenuItemPagination
-    filter_backends = [filters.SearchFilter]
-    search_fields = ["name"]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        query = self.request.query_params.get("search", "").strip()
+        if query and self.action == "list":
+            queryset = search_queryset(queryset, query)
+        return queryset
 
 class ContactCreateAPIView(generics.CreateAPIView):
     """
@@ -280,6 +290,113 @@ class MenuItemReviewListView(generics.ListAPIView):
         menu_item_id = self.kwargs.get("menu_item_id")
         return UserReview.objects.filter(menu_item_id=menu_item_id).select_related("user", "menu_item").order_by("-review_date")
 
+class NewsletterSubscribeAPIView(generics.CreateAPIView):
+    """
+    API endpoint to subscribe an email address to the newsletter.
+    POST: {"email": "..."}
+    """
+    serializer_class = NewsletterSubscriptionSerializer
+    permission_classes = [permissions.AllowAny]
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response({"message": "Subscribed to the newsletter."}, status=status.HTTP_201_CREATED)
+
+class ReservationAvailabilityAPIView(APIView):
+    """
+    API endpoint listing free reservation slots (and which tables are free)
+    for a party size, for one day or several consecutive days.
+    GET: ?date=2025-11-01&days=7&party_size=4&duration=90&start=18:00&end=23:00
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        params = ReservationAvailabilityQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        # Tables and all reservations in the range are loaded once
+        engine = AvailabilityEngine(data["date"], days=data["days"])
+        options = {"start_range": data["start"]} if "start" in data else {}
+        by_day = engine.free_slots_by_day(
+            party_size=data["party_size"],
+            duration_minutes=data["duration"],
+            end_range=data.get("end"),
+            schedule=get_schedule(),
+            **options,
+        )
+        return Response(
+            {
+                "party_size": data["party_size"],
+                "duration_minutes": data["duration"],
+                "days": [
+                    {
+                        "date": day,
+                        "slots": [
+                            {"start": start.strftime("%H:%M"), "end": end_label(end), "tables": tables}
+                            for start, end, tables in slots
+                        ],
+                    }
+                    for day, slots in by_day.items()
+                ],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class ReservationBookingAPIView(APIView):
+    """
+    API endpoint to book a table. The smallest free table that seats the
+    party is chosen unless `table_number` is given.
+    POST: {"customer_name": "...", "date": "2025-11-07", "start_time": "19:00",
+           "end_time": "20:30", "party_size": 4}
+    Returns 409 if no suitable table is free.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        serializer = ReservationBookingSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            reservation = book(
+                data["customer_name"],
+                data["date"],
+                data["start_time"],
+                data["end_time"],
+                data["party_size"],
+                table_number=data.get("table_number"),
+            )
+        except BookingConflict as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_409_CONFLICT)
+        except BookingError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(ReservationSerializer(reservation).data, status=status.HTTP_201_CREATED)
+
+
+class ReservationCalendarAPIView(APIView):
+    """
+    API endpoint summarising availability for every day of a month.
+    GET: ?month=2025-11&party_size=4
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        params = ReservationCalendarQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        year, month = map(int, params.validated_data["month"].split("-"))
+        party_size = params.validated_data["party_size"]
+        return Response(
+            {
+                "month": params.validated_data["month"],
+                "party_size": party_size,
+                "days": month_calendar(year, month, party_size),
+            },
+            status=status.HTTP_200_OK,
+        )
+
 class RestaurantInfoView(generics.GenericAPIView):
     """
     API endpoint to retrieve all details about the restaurant.
@@ -327,7 +444,57 @@ class OpeningHourListAPIView(generics.ListAPIView):
     API endpoint to retrieve the restaurant's opening hours.
     """
     queryset = OpeningHour.objects.all()
-    serializer_class = OpeningHourSerializer
+    serializer_class = OpeningHoursSerializer
+
+class MenuItemSearchAPIView(APIView):
+    """
+    API endpoint for ranked, typo-tolerant menu search over item names,
+    descriptions and category names.
+    GET: ?q=chiken tikka&limit=10
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        try:
+            limit = min(max(int(request.query_params.get("limit", 20)), 1), 100)
+        except ValueError:
+            return Response({"detail": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        ranked = get_index().search(query, limit) if query else []
+        items = MenuItem.objects.in_bulk([item_id for item_id, _ in ranked])
+        results = [
+            dict(MenuItemSearchSerializer(items[item_id], context={"request": request}).data, score=score)
+            for item_id, score in ranked
+            if item_id in items
+        ]
+        return Response({"query": query, "count": len(results), "results": results}, status=status.HTTP_200_OK)
+
+
+class MenuAutocompleteAPIView(APIView):
+    """
+    API endpoint suggesting menu items and categories for the search box,
+    most popular first.
+    GET: ?q=chi&limit=8
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get("q", "")
+        try:
+            limit = int(request.query_params.get("limit", 8))
+        except ValueError:
+            return Response({"detail": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        suggestions = get_autocomplete().suggest(query, limit)
+        return Response(
+            {
+                "query": query,
+                "suggestions": [{"text": text, "type": kind, "id": pk} for _, text, kind, pk in suggestions],
+            },
+            status=status.HTTP_200_OK,
+        )
+
 
 class MenuItemPriceRangeView(generics.ListAPIView):
     """
@@ -355,10 +522,8 @@ class MenuItemPriceRangeView(generics.ListAPIView):
         queryset = self.get_queryset()
         if not queryset.exists():
             return Response(
-                {
-                    "message":"No menu items found in the specified price range.",
-                    status=status.HTTP_404_NOT_FOUND
-                }
+                {"message": "No menu items found in the specified price range."},
+                status=status.HTTP_404_NOT_FOUND,
             )
         serializer = self.get_serializer(queryset,many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -1,5 +1,10 @@
-from django.contrib import admin
+import csv
+import time
+
+from django.contrib import admin, messages
+from django.http import HttpResponse
 from .models import Order,OrderStatus,Coupon,OrderItem
+from .utils import create_coupon_campaign
 
 # Register the order model
 admin.site.register(Order)
@@ -22,4 +27,43 @@ class CouponAdmin(admin.ModelAdmin):
     list_display = ("id", "code", "discount", "is_active", "valid_from", "valid_to")
     search_fields = ("code",)
     list_filter = ("is_active", "valid_from", "valid_to")
-    ordering = ("-valid_from",)
\ No newline at end of file
+    ordering = ("-valid_from",)
+    actions = ["generate_campaign"]
+
+    # Codes generated per selected template coupon
+    campaign_size = 1000
+
+    @admin.action(description="Generate a campaign of codes like the selected coupons (CSV)")
+    def generate_campaign(self, request, queryset):
+        """
+        Use each selected coupon as a template (discount and validity window)
+        and bulk-create `campaign_size` new codes for it, returned as CSV.
+        For larger campaigns use the `generate_coupons` management command.
+        """
+        response = HttpResponse(content_type="text/csv")
+        response["Content-Disposition"] = 'attachment; filename="coupon_campaign.csv"'
+        writer = csv.writer(response)
+        writer.writerow(["code", "discount", "valid_from", "valid_to"])
+
+        started = time.perf_counter()
+        created = 0
+        for template in queryset:
+            for batch in create_coupon_campaign(
+                self.campaign_size,
+                template.discount,
+                valid_from=template.valid_from,
+                valid_to=template.valid_to,
+            ):
+                writer.writerows(
+                    (c.code, c.discount, c.valid_from.isoformat(), c.valid_to.isoformat() if c.valid_to else "")
+                    for c in batch
+                )
+                created += len(batch)
+
+        elapsed = time.perf_counter() - started
+        self.message_user(
+            request,
+            f"Created {created} coupons in {elapsed:.2f}s.",
+            messages.SUCCESS,
+        )
+        return response
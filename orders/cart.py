@@ -0,0 +1,183 @@
+# orders/cart.py
+"""
+Race-free cart mutations and checkout.
+
+Quantities are changed with conditional `F()` updates or upserts on the
+(cart, menu_item) unique constraint instead of read-modify-write, and the
+denormalized Cart.item_count/total_amount counters are shifted in the same
+transaction. The cart row is always written first, so concurrent mutations
+of one cart queue up on it instead of deadlocking on item rows.
+
+These helpers do their own counter bookkeeping: they use queryset writes,
+and their item deletes run inside `_counters_adjusted()` so the CartItem
+delete signal in orders.signals doesn't subtract the items a second time.
+"""
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from utils.pricing import from_minor, price_lines, quote, to_basis_points
+
+
+class CheckoutError(Exception):
+    """Raised when a cart cannot be turned into an order."""
+
+
+_state = threading.local()
+
+
+@contextmanager
+def _counters_adjusted():
+    """Mark CartItem deletes in this block as already reflected in the cart counters."""
+    _state.counters_adjusted = True
+    try:
+        yield
+    finally:
+        _state.counters_adjusted = False
+
+
+def counters_adjusted() -> bool:
+    """Whether the current thread is deleting cart items whose counters it adjusts itself."""
+    return getattr(_state, "counters_adjusted", False)
+
+
+def _line_total(menu_item, quantity: int):
+    return from_minor(price_lines([menu_item.pricing_line(quantity)])[0])
+
+
+def add_item(cart, menu_item, quantity: int = 1) -> None:
+    """Atomically add `quantity` of a menu item to the cart."""
+    from .models import Cart, CartItem  # lazy import
+
+    with transaction.atomic():
+        Cart.apply_counter_delta(cart.pk, quantity, _line_total(menu_item, quantity))
+        updated = CartItem.objects.filter(cart=cart, menu_item=menu_item).update(
+            quantity=F("quantity") + quantity
+        )
+        if not updated:
+            try:
+                with transaction.atomic():
+                    CartItem.objects.bulk_create([CartItem(cart=cart, menu_item=menu_item, quantity=quantity)])
+            except IntegrityError:
+                # Another request inserted the row first; add to it instead
+                CartItem.objects.filter(cart=cart, menu_item=menu_item).update(
+                    quantity=F("quantity") + quantity
+                )
+
+
+def set_quantities(cart, quantities: dict, menu_items: dict = None, replace: bool = False) -> None:
+    """
+    Set item quantities for many menu items in one transaction.
+
+    Args:
+        cart: The Cart to update.
+        quantities (dict): {menu_item_id: quantity}; 0 removes the item.
+        menu_items (dict): Optional {menu_item_id: MenuItem} already loaded by the caller.
+        replace (bool): If True, items not listed in `quantities` are removed.
+    """
+    from products.models import MenuItem  # lazy import
+    from .models import Cart, CartItem  # lazy import
+
+    with transaction.atomic():
+        # Lock the cart so the quantities read below stay current
+        Cart.objects.select_for_update().filter(pk=cart.pk).values_list("pk", flat=True).first()
+        current = CartItem.objects.filter(cart=cart)
+        if not replace:
+            current = current.filter(menu_item_id__in=quantities)
+        existing = dict(current.values_list("menu_item_id", "quantity"))
+
+        targets = dict.fromkeys(existing, 0) if replace else {}
+        targets.update(quantities)
+        if menu_items is None or not targets.keys() <= menu_items.keys():
+            menu_items = MenuItem.objects.in_bulk(targets)
+
+        count_delta, amount_delta = 0, 0
+        upserts, removals = [], []
+        for menu_item_id, quantity in targets.items():
+            old_quantity = existing.get(menu_item_id, 0)
+            if quantity == old_quantity:
+                continue
+            menu_item = menu_items[menu_item_id]
+            count_delta += quantity - old_quantity
+            amount_delta += _line_total(menu_item, quantity) - _line_total(menu_item, old_quantity)
+            if quantity:
+                upserts.append(CartItem(cart=cart, menu_item=menu_item, quantity=quantity))
+            else:
+                removals.append(menu_item_id)
+
+        if upserts:
+            CartItem.objects.bulk_create(
+                upserts,
+                update_conflicts=True,
+                unique_fields=["cart", "menu_item"],
+                update_fields=["quantity"],
+            )
+        if removals:
+            with _counters_adjusted():
+                CartItem.objects.filter(cart=cart, menu_item_id__in=removals).delete()
+        Cart.apply_counter_delta(cart.pk, count_delta, amount_delta)
+
+
+def checkout(cart, coupon=None):
+    """
+    Turn the cart into a Pending order in one transaction.
+
+    The cart row is locked, its items are read with their menu items in one
+    query and priced once; the order and all of its items are then inserted
+    (items with a single bulk_create) and the cart is emptied. The number of
+    queries does not depend on the size of the cart.
+
+    Args:
+        cart: The Cart to check out.
+        coupon: Optional validated coupon (Coupon or CouponRecord) applied to the subtotal.
+
+    Returns:
+        Order: The new order, with `order_items` prefetched.
+
+    Raises:
+        CheckoutError: If the cart is empty or holds unavailable items.
+    """
+    from .models import Cart, CartItem, Order, OrderItem  # lazy import
+
+    with transaction.atomic():
+        cart = Cart.objects.select_for_update().get(pk=cart.pk)
+        items = list(CartItem.objects.filter(cart=cart).select_related("menu_item").order_by("id"))
+        if not items:
+            raise CheckoutError("Your cart is empty.")
+        unavailable = [item.menu_item.name for item in items if not item.menu_item.is_available]
+        if unavailable:
+            raise CheckoutError(f"No longer available: {', '.join(unavailable)}")
+
+        coupon_bp = to_basis_points(coupon.discount) if coupon is not None else 0
+        basket = quote((item.menu_item.pricing_line(item.quantity) for item in items), coupon_bp)
+
+        order = Order(
+            customer_id=cart.user_id,
+            order_status="Pending",
+            total_amount=from_minor(basket.total),
+            coupon_code=coupon.code if coupon is not None else "",
+            coupon_discount=coupon.discount if coupon is not None else Decimal("0.00"),
+        )
+        order.save()
+        # bulk_create skips the per-item total signals; the total is already final
+        order_items = OrderItem.objects.bulk_create(
+            [
+                OrderItem(
+                    order=order,
+                    menu_item=item.menu_item,
+                    quantity=item.quantity,
+                    unit_price=item.menu_item.get_final_price(),
+                )
+                for item in items
+            ]
+        )
+
+        with _counters_adjusted():
+            CartItem.objects.filter(cart=cart).delete()
+        Cart.objects.filter(pk=cart.pk).update(item_count=0, total_amount=0)
+
+    order._prefetched_objects_cache = {"order_items": order_items}
+    return order
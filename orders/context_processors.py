@@ -1,7 +1,13 @@
 from .models import Cart
 
 def cart_item_count(request):
+    """
+    Expose the cart badge count to templates.
+
+    Reads the denormalized Cart.item_count with a single indexed lookup and
+    never writes, so rendering a page cannot create carts as a side effect.
+    """
     if request.user.is_authenticated:
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-        return {"cart_item_count": cart.total_items}
+        count = Cart.objects.filter(user_id=request.user.pk).values_list("item_count", flat=True).first()
+        return {"cart_item_count": count or 0}
     return {"cart_item_count": 0}
@@ -0,0 +1,124 @@
+# orders/coupons.py
+"""
+In-process index of coupons keyed by normalized (upper-case) code.
+
+Validation and discount calculation read from this index instead of running
+a case-insensitive `code__iexact` scan per request. The index is loaded with
+one query, refreshed after COUPON_INDEX_TTL_SECONDS (so changes made by other
+processes show up) and invalidated immediately by Coupon save/delete signals
+in this process.
+
+Coupons that expired more than EXPIRED_GRACE ago are left out of the index;
+a code missing from it is looked up among those with one query, so such
+codes are still reported as expired rather than invalid.
+"""
+import threading
+import time
+from datetime import timedelta
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.functions import Upper
+from django.utils import timezone
+
+
+class CouponRecord(NamedTuple):
+    code: str
+    discount: object
+    is_active: bool
+    valid_from: object
+    valid_to: object
+
+
+def normalize_code(code: str) -> str:
+    return (code or "").strip().upper()
+
+
+class CouponIndex:
+    # Coupons that expired longer ago than this are left out of the index
+    # and only looked up when a code is not found in it.
+    EXPIRED_GRACE = timedelta(days=30)
+
+    def __init__(self, ttl: float = None):
+        self.ttl = ttl if ttl is not None else getattr(settings, "COUPON_INDEX_TTL_SECONDS", 60.0)
+        self._lock = threading.Lock()
+        self._coupons = {}
+        self._loaded_at = None
+
+    def invalidate(self) -> None:
+        """Drop the index; the next lookup reloads it."""
+        self._loaded_at = None
+
+    def _load(self) -> dict:
+        from .models import Coupon  # lazy import
+
+        cutoff = timezone.now() - self.EXPIRED_GRACE
+        rows = Coupon.objects.filter(Q(valid_to__isnull=True) | Q(valid_to__gte=cutoff)).values_list(
+            "code", "discount", "is_active", "valid_from", "valid_to"
+        )
+        return {normalize_code(row[0]): CouponRecord(*row) for row in rows}
+
+    def _index(self) -> dict:
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at >= self.ttl:
+            with self._lock:
+                if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl:
+                    self._coupons = self._load()
+                    self._loaded_at = time.monotonic()
+        return self._coupons
+
+    def get(self, code: str) -> Optional[CouponRecord]:
+        return self._index().get(normalize_code(code))
+
+    def _long_expired(self, codes) -> dict:
+        """Coupons left out of the index among normalized `codes`, with one query."""
+        from .models import Coupon  # lazy import
+
+        if not codes:
+            return {}
+        rows = (
+            Coupon.objects.filter(valid_to__lt=timezone.now() - self.EXPIRED_GRACE)
+            .annotate(normalized=Upper("code"))
+            .filter(normalized__in=codes)
+            .values_list("code", "discount", "is_active", "valid_from", "valid_to")
+        )
+        return {normalize_code(row[0]): CouponRecord(*row) for row in rows}
+
+    def validate(self, code: str, now=None):
+        """
+        Check a single code.
+
+        Returns:
+            tuple: (CouponRecord or None, error message or None)
+        """
+        coupon = self.get(code)
+        if coupon is None:
+            coupon = self._long_expired([normalize_code(code)]).get(normalize_code(code))
+        return self._check(coupon, now or timezone.now())
+
+    @staticmethod
+    def _check(coupon: Optional[CouponRecord], now):
+        if coupon is None:
+            return None, "Invalid coupon code."
+        if not coupon.is_active:
+            return coupon, "This coupon is no longer active."
+        if coupon.valid_from and coupon.valid_from > now:
+            return coupon, "This coupon is not yet valid."
+        if coupon.valid_to and coupon.valid_to < now:
+            return coupon, "This coupon has expired."
+        return coupon, None
+
+    def validate_many(self, codes) -> dict:
+        """Validate many codes against one snapshot of the index: {code: (record, error)}."""
+        now = timezone.now()
+        index = self._index()
+        found = {code: index.get(normalize_code(code)) for code in codes}
+        expired = self._long_expired({normalize_code(code) for code, coupon in found.items() if coupon is None})
+        return {
+            code: self._check(coupon or expired.get(normalize_code(code)), now)
+            for code, coupon in found.items()
+        }
+
+
+coupon_index = CouponIndex()
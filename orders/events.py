@@ -0,0 +1,153 @@
+# orders/events.py
+"""
+Order status event fan-out for the server-sent events (SSE) stream.
+
+Each worker process runs a single `OrderEventBroker`. While at least one
+client is subscribed, one background task reads new rows from the
+OrderStatusEvent log (one indexed `id > last_seen` query per interval,
+shared by every connection) and pushes them onto per-order queues.
+Writes made in the same process wake the poller immediately via `notify()`;
+writes from other processes are picked up on the next poll.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(event) -> str:
+    """Render an OrderStatusEvent in text/event-stream format."""
+    return f"id: {event.id}\nevent: status\ndata: {json.dumps(event.as_payload())}\n\n"
+
+
+class OrderEventBroker:
+    def __init__(self, poll_interval: float = None, batch_size: int = 500):
+        self.poll_interval = poll_interval or getattr(settings, "ORDER_EVENTS_POLL_SECONDS", 2.0)
+        self.batch_size = batch_size
+        self._subscribers = {}  # order_id -> set of asyncio.Queue
+        self._last_id = None
+        self._loop = None
+        self._wakeup = None
+        self._task = None
+        self._lock = threading.Lock()
+
+    # ------------------------
+    # Database helpers
+    # ------------------------
+    @staticmethod
+    def _events_for_order(order_id: int, after_id: int) -> list:
+        from .models import OrderStatusEvent  # lazy import
+
+        return list(OrderStatusEvent.objects.filter(order_id=order_id, id__gt=after_id).order_by("id"))
+
+    def _events_since(self, after_id: int, order_ids) -> list:
+        from .models import OrderStatusEvent  # lazy import
+
+        return list(
+            OrderStatusEvent.objects.filter(id__gt=after_id, order_id__in=order_ids)
+            .order_by("id")[: self.batch_size]
+        )
+
+    @staticmethod
+    def latest_event_id() -> int:
+        """Return the newest event ID in the log (0 when empty)."""
+        from .models import OrderStatusEvent  # lazy import
+
+        latest = OrderStatusEvent.objects.order_by("-id").values_list("id", flat=True).first()
+        return latest or 0
+
+    # ------------------------
+    # Subscription
+    # ------------------------
+    async def subscribe(self, order_id: int, last_event_id: int = None, heartbeat: float = None):
+        """
+        Async generator yielding OrderStatusEvent rows for `order_id`.
+
+        Events after `last_event_id` are replayed from the log first; with no
+        `last_event_id`, only changes from now on are delivered. If `heartbeat`
+        is given, None is yielded after that many idle seconds so callers can
+        keep the connection alive.
+        """
+        queue = asyncio.Queue()
+        if last_event_id is None:
+            last_event_id = await sync_to_async(self.latest_event_id)()
+
+        self._register(order_id, queue, last_event_id)
+        try:
+            for event in await sync_to_async(self._events_for_order)(order_id, last_event_id):
+                last_event_id = event.id
+                yield event
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event.id > last_event_id:
+                    last_event_id = event.id
+                    yield event
+        finally:
+            self._unregister(order_id, queue)
+
+    def _register(self, order_id: int, queue, cursor: int) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First subscriber on this event loop (or the old loop went away)
+            with self._lock:
+                self._loop = loop
+                self._wakeup = asyncio.Event()
+            self._task = None
+            self._last_id = None
+        self._subscribers.setdefault(order_id, set()).add(queue)
+        # Make sure the shared poller will not skip anything this subscriber needs
+        self._last_id = cursor if self._last_id is None else min(self._last_id, cursor)
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._poll())
+
+    def _unregister(self, order_id: int, queue) -> None:
+        queues = self._subscribers.get(order_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[order_id]
+
+    # ------------------------
+    # Fan-out
+    # ------------------------
+    def notify(self) -> None:
+        """Wake the poller now. Safe to call from any thread (e.g. on commit)."""
+        with self._lock:
+            loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    async def _poll(self) -> None:
+        while self._subscribers:
+            # Clear before reading so a notify() during the query is not lost
+            self._wakeup.clear()
+            try:
+                events = await sync_to_async(self._events_since)(self._last_id, list(self._subscribers))
+            except Exception:
+                logger.exception("Failed to read order status events")
+                events = []
+
+            for event in events:
+                self._last_id = max(self._last_id, event.id)
+                for queue in self._subscribers.get(event.order_id, ()):
+                    queue.put_nowait(event)
+
+            if len(events) == self.batch_size:
+                continue  # more rows waiting: keep draining
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+        self._last_id = None
+
+
+broker = OrderEventBroker()
@@ -0,0 +1,155 @@
+# orders/idempotency.py
+"""
+`Idempotency-Key` support for order-creating endpoints.
+
+The first request with a given (user, key) claims it by inserting an
+IdempotencyKey row, runs, and stores its response. Retries with the same key
+replay that response with a single lookup instead of creating another order.
+A duplicate that arrives while the first request is still running waits for
+it (woken directly when both run in this process, polling otherwise) and then
+replays its response; if the first request has not finished within
+IDEMPOTENCY_WAIT_SECONDS the duplicate gets 409 and should retry later.
+
+Keys expire after IDEMPOTENCY_KEY_TTL_SECONDS. Responses with a 5xx status
+are not stored, so the request can be retried for real.
+"""
+import functools
+import hashlib
+import json
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+_inflight = {}  # (user id, key) -> threading.Event set when the first request finishes
+_inflight_lock = threading.Lock()
+
+
+def _fingerprint(request) -> str:
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f"{request.method} {request.path}\n{body}".encode()).hexdigest()
+
+
+def _claim(user, key: str, fingerprint: str):
+    """
+    Return (record, created): the live IdempotencyKey for (user, key), or a
+    new in-progress one if there was none.
+    """
+    from .models import IdempotencyKey  # lazy import
+
+    now = timezone.now()
+    record = IdempotencyKey.objects.filter(user=user, key=key).first()
+    if record is not None:
+        if record.expires_at > now:
+            return record, False
+        record.delete()
+
+    ttl = getattr(settings, "IDEMPOTENCY_KEY_TTL_SECONDS", 24 * 60 * 60)
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(
+                user=user,
+                key=key,
+                request_fingerprint=fingerprint,
+                expires_at=now + timedelta(seconds=ttl),
+            )
+        return record, True
+    except IntegrityError:
+        # A concurrent request claimed the key between our lookup and insert
+        return IdempotencyKey.objects.filter(user=user, key=key).first(), False
+
+
+def _wait_for(record, inflight_key):
+    """Wait for an in-progress record to complete; return the latest row (or None)."""
+    from .models import IdempotencyKey  # lazy import
+
+    deadline = time.monotonic() + getattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 10.0)
+    delay = 0.05
+    while not record.is_complete:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        with _inflight_lock:
+            event = _inflight.get(inflight_key)
+        if event is not None:
+            event.wait(remaining)
+        else:
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.5)
+        record = IdempotencyKey.objects.filter(pk=record.pk).first()
+        if record is None:
+            break
+    return record
+
+
+def _replay(record) -> Response:
+    return Response(record.response_body, status=record.status_code, headers={REPLAYED_HEADER: "true"})
+
+
+def idempotent(view_method):
+    """
+    Make a DRF view method honour the `Idempotency-Key` request header.
+    Requests without the header run as usual.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view_method(self, request, *args, **kwargs)
+
+        key = key.strip()
+        if not key or len(key) > 255:
+            return Response(
+                {"detail": f"{HEADER} must be between 1 and 255 characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        fingerprint = _fingerprint(request)
+        inflight_key = (request.user.pk, key)
+        record, created = _claim(request.user, key, fingerprint)
+
+        if not created:
+            if record is not None and record.request_fingerprint != fingerprint:
+                return Response(
+                    {"detail": f"This {HEADER} was already used for a different request."},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            if record is not None:
+                record = _wait_for(record, inflight_key)
+            if record is None or not record.is_complete:
+                return Response(
+                    {"detail": "A request with this Idempotency-Key is still being processed."},
+                    status=status.HTTP_409_CONFLICT,
+                    headers={"Retry-After": "1"},
+                )
+            return _replay(record)
+
+        event = threading.Event()
+        with _inflight_lock:
+            _inflight[inflight_key] = event
+        try:
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code >= 500:
+                record.delete()
+            else:
+                record.status_code = response.status_code
+                record.response_body = response.data
+                record.save(update_fields=["status_code", "response_body"])
+            return response
+        except Exception:
+            record.delete()
+            raise
+        finally:
+            with _inflight_lock:
+                _inflight.pop(inflight_key, None)
+            event.set()
+
+    return wrapper
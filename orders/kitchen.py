@@ -0,0 +1,154 @@
+# orders/kitchen.py
+"""
+In-memory queue of active (Pending/Processing) orders for the kitchen display.
+
+The queue is built from the database once, then kept current incrementally:
+new orders and items are picked up by primary key (`pk > last seen`) and
+status changes are replayed from the OrderStatusEvent log, so a refresh is
+a handful of indexed range queries instead of re-reading every active order.
+A full resync against the database runs every `resync_interval` seconds to
+correct any drift (edited or deleted items, or rows committed out of ID
+order by concurrent transactions).
+"""
+import bisect
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+ACTIVE_STATUSES = ("Pending", "Processing")
+
+
+class KitchenQueue:
+    def __init__(self, sync_interval: float = None, resync_interval: float = None):
+        self.sync_interval = sync_interval if sync_interval is not None else getattr(
+            settings, "KITCHEN_QUEUE_SYNC_SECONDS", 1.0
+        )
+        self.resync_interval = resync_interval if resync_interval is not None else getattr(
+            settings, "KITCHEN_QUEUE_RESYNC_SECONDS", 300.0
+        )
+        self._lock = threading.Lock()
+        self._orders = {}  # order id -> ticket dict
+        self._keys = []  # sorted (created_at, id), oldest first
+        self._max_order_id = 0
+        self._max_item_id = 0
+        self._last_event_id = 0
+        self._synced_at = None
+        self._resynced_at = None
+
+    # ------------------------
+    # Queue maintenance
+    # ------------------------
+    def _add(self, order) -> None:
+        self._orders[order.pk] = {
+            "id": order.pk,
+            "custom_order_id": order.custom_order_id,
+            "status": order.order_status,
+            "created_at": order.created_at,
+            "items": {},
+        }
+        bisect.insort(self._keys, (order.created_at, order.pk))
+
+    def _remove(self, order_id: int) -> None:
+        ticket = self._orders.pop(order_id, None)
+        if ticket is not None:
+            key = (ticket["created_at"], order_id)
+            index = bisect.bisect_left(self._keys, key)
+            if index < len(self._keys) and self._keys[index] == key:
+                del self._keys[index]
+
+    def _add_items(self, items) -> None:
+        for item in items:
+            self._max_item_id = max(self._max_item_id, item.pk)
+            ticket = self._orders.get(item.order_id)
+            if ticket is not None:
+                ticket["items"][item.pk] = {"name": item.menu_item.name, "quantity": item.quantity}
+
+    def resync(self) -> None:
+        """Rebuild the whole queue from the database."""
+        from .models import Order, OrderItem, OrderStatusEvent  # lazy import
+
+        with self._lock:
+            # Take the log and PK positions first so nothing committed while
+            # we read is skipped by the next incremental sync.
+            self._last_event_id = OrderStatusEvent.objects.order_by("-id").values_list("id", flat=True).first() or 0
+            self._max_order_id = Order.objects.order_by("-id").values_list("id", flat=True).first() or 0
+            self._max_item_id = OrderItem.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+            self._orders, self._keys = {}, []
+            active = Order.objects.filter(order_status__in=ACTIVE_STATUSES).only(
+                "id", "custom_order_id", "order_status", "created_at"
+            )
+            for order in active:
+                self._add(order)
+            self._add_items(
+                OrderItem.objects.filter(order__order_status__in=ACTIVE_STATUSES)
+                .select_related("menu_item")
+                .only("id", "order_id", "quantity", "menu_item__name")
+            )
+            self._resynced_at = self._synced_at = time.monotonic()
+
+    def sync(self) -> None:
+        """Apply changes since the last sync: new orders, new items and status changes."""
+        from .models import Order, OrderItem, OrderStatusEvent  # lazy import
+
+        with self._lock:
+            new_orders = list(
+                Order.objects.filter(pk__gt=self._max_order_id).only(
+                    "id", "custom_order_id", "order_status", "created_at"
+                ).order_by("id")
+            )
+            for order in new_orders:
+                self._max_order_id = max(self._max_order_id, order.pk)
+                if order.order_status in ACTIVE_STATUSES:
+                    self._add(order)
+
+            self._add_items(
+                OrderItem.objects.filter(pk__gt=self._max_item_id)
+                .select_related("menu_item")
+                .only("id", "order_id", "quantity", "menu_item__name")
+                .order_by("id")
+            )
+
+            for event in OrderStatusEvent.objects.filter(id__gt=self._last_event_id).order_by("id"):
+                self._last_event_id = event.id
+                ticket = self._orders.get(event.order_id)
+                if event.to_status not in ACTIVE_STATUSES:
+                    self._remove(event.order_id)
+                elif ticket is not None:
+                    ticket["status"] = event.to_status
+            self._synced_at = time.monotonic()
+
+    def refresh(self) -> None:
+        """Sync if stale, and fully resync if the last resync is too old."""
+        now = time.monotonic()
+        if self._resynced_at is None or now - self._resynced_at >= self.resync_interval:
+            self.resync()
+        elif now - self._synced_at >= self.sync_interval:
+            self.sync()
+
+    # ------------------------
+    # Reads
+    # ------------------------
+    def snapshot(self, status: str = None) -> list:
+        """Return active orders, oldest first, optionally filtered by status."""
+        self.refresh()
+        now = timezone.now()
+        with self._lock:
+            tickets = [self._orders[order_id] for _, order_id in self._keys]
+            return [
+                {
+                    "id": ticket["id"],
+                    "custom_order_id": ticket["custom_order_id"],
+                    "status": ticket["status"],
+                    "created_at": ticket["created_at"],
+                    "age_seconds": int((now - ticket["created_at"]).total_seconds()),
+                    "items": list(ticket["items"].values()),
+                }
+                for ticket in tickets
+                if status is None or ticket["status"] == status
+            ]
+
+
+kitchen_queue = KitchenQueue()
@@ -0,0 +1,69 @@
+import csv
+import time
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from orders.utils import create_coupon_campaign
+
+
+class Command(BaseCommand):
+    """
+    Generate a coupon campaign in bulk and stream the codes to a CSV file.
+
+    Example:
+        python manage.py generate_coupons 100000 --discount 15 --valid-days 30 --output campaign.csv
+    """
+    help = "Generate N unique coupon codes in bulk and write them to a CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("count", type=int, help="Number of coupons to create")
+        parser.add_argument("--discount", required=True, help="Discount percentage, e.g. 10.00")
+        parser.add_argument("--valid-days", type=int, default=None, help="Days until the coupons expire")
+        parser.add_argument("--length", type=int, default=10, help="Length of each code (max 15)")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Codes per insert batch")
+        parser.add_argument("--output", default="coupons.csv", help="CSV file to write codes to")
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        if count <= 0:
+            raise CommandError("count must be a positive number.")
+        if not 4 <= options["length"] <= 15:
+            raise CommandError("length must be between 4 and 15.")
+        try:
+            discount = Decimal(options["discount"])
+        except InvalidOperation:
+            raise CommandError(f"Invalid discount: {options['discount']}")
+        if not Decimal("0") < discount <= Decimal("100"):
+            raise CommandError("discount must be between 0 and 100.")
+
+        valid_from = timezone.now()
+        valid_to = valid_from + timedelta(days=options["valid_days"]) if options["valid_days"] else None
+
+        started = time.perf_counter()
+        created = 0
+        with open(options["output"], "w", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["code", "discount", "valid_from", "valid_to"])
+            for batch in create_coupon_campaign(
+                count,
+                discount,
+                valid_from=valid_from,
+                valid_to=valid_to,
+                length=options["length"],
+                batch_size=options["batch_size"],
+            ):
+                writer.writerows(
+                    (c.code, c.discount, c.valid_from.isoformat(), c.valid_to.isoformat() if c.valid_to else "")
+                    for c in batch
+                )
+                created += len(batch)
+                self.stdout.write(f"  {created}/{count} coupons created")
+
+        elapsed = time.perf_counter() - started
+        rate = created / elapsed if elapsed else created
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {created} coupons in {elapsed:.2f}s ({rate:,.0f} codes/s) -> {options['output']}"
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    """
+    Delete expired Idempotency-Key records. Expired keys are already ignored
+    (and replaced on reuse); this just keeps the table small.
+
+    Example:
+        python manage.py purge_idempotency_keys
+    """
+    help = "Delete expired idempotency keys."
+
+    def handle(self, *args, **options):
+        deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency keys."))
@@ -0,0 +1,27 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.utils import rebuild_sales_rollups
+
+
+class Command(BaseCommand):
+    """
+    Backfill (or repair) the hourly/daily sales rollups from the Order table.
+
+    Example:
+        python manage.py rebuild_sales_rollups --start 2025-10-01 --end 2025-11-01
+    """
+    help = "Recompute SalesRollup rows from orders for whole days in [start, end)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=date.fromisoformat, default=None, help="First day (YYYY-MM-DD)")
+        parser.add_argument("--end", type=date.fromisoformat, default=None, help="Day after the last one (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        start, end = options["start"], options["end"]
+        if start and end and start >= end:
+            raise CommandError("--start must be before --end.")
+
+        written = rebuild_sales_rollups(start, end)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt sales rollups: {written} rows written."))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:08
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_unit_price(apps, schema_editor):
+    OrderItem = apps.get_model("orders", "OrderItem")
+    MenuItem = apps.get_model("products", "MenuItem")
+    OrderItem.objects.filter(unit_price__isnull=True).update(
+        unit_price=Subquery(
+            MenuItem.objects.filter(pk=OuterRef("menu_item_id")).values("price")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_alter_orderitem_quantity'),
+        ('products', '0011_menuitem_discount_percentage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='unit_price',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Menu item price captured when the item was ordered', max_digits=8, null=True),
+        ),
+        migrations.RunPython(backfill_unit_price, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:12
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDay, TruncHour
+
+
+def backfill_sales_rollups(apps, schema_editor):
+    # Same aggregation as orders.utils.rebuild_sales_rollups, over every order
+    Order = apps.get_model("orders", "Order")
+    SalesRollup = apps.get_model("orders", "SalesRollup")
+    rows = []
+    for granularity, trunc in (("hour", TruncHour), ("day", TruncDay)):
+        aggregates = (
+            Order.objects.annotate(period=trunc("created_at"))
+            .values("period", "order_status")
+            .annotate(order_count=Count("id"), revenue=Sum("total_amount"))
+            .order_by()
+        )
+        rows.extend(
+            SalesRollup(
+                granularity=granularity,
+                period_start=row["period"],
+                order_status=row["order_status"],
+                order_count=row["order_count"],
+                revenue=row["revenue"] or Decimal("0.00"),
+            )
+            for row in aggregates
+        )
+    SalesRollup.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0011_orderitem_unit_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily')], max_length=4)),
+                ('period_start', models.DateTimeField(help_text='Start of the hour/day bucket (local time)')),
+                ('order_status', models.CharField(choices=[('Pending', 'Pending'), ('Processing', 'Processing'), ('Delivered', 'Delivered'), ('Cancelled', 'Cancelled')], max_length=20)),
+                ('order_count', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Sales Rollup',
+                'verbose_name_plural': 'Sales Rollups',
+                'ordering': ['granularity', 'period_start', 'order_status'],
+                'constraints': [models.UniqueConstraint(fields=('granularity', 'period_start', 'order_status'), name='unique_sales_rollup_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill_sales_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:21
+
+from decimal import Decimal
+from collections import defaultdict
+
+from django.db import migrations, models
+
+from utils.pricing import discounted_unit_price, from_minor, to_basis_points, to_minor
+
+
+def backfill_cart_counters(apps, schema_editor):
+    Cart = apps.get_model("orders", "Cart")
+    CartItem = apps.get_model("orders", "CartItem")
+    counts, totals = defaultdict(int), defaultdict(int)
+    rows = CartItem.objects.values_list("cart_id", "quantity", "menu_item__price", "menu_item__discount_percentage")
+    for cart_id, quantity, price, discount in rows:
+        discount_bp = to_basis_points(discount) if discount and 0 < discount <= 100 else 0
+        counts[cart_id] += quantity
+        totals[cart_id] += discounted_unit_price(to_minor(price), discount_bp) * quantity
+    for cart_id, count in counts.items():
+        Cart.objects.filter(pk=cart_id).update(item_count=count, total_amount=from_minor(totals[cart_id]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0015_order_order_status_created_idx'),
+        ('products', '0011_menuitem_discount_percentage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='total_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10),
+        ),
+        migrations.RunPython(backfill_cart_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:23
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_cart_items(apps, schema_editor):
+    # Fold duplicate (cart, menu_item) rows into the oldest one
+    CartItem = apps.get_model("orders", "CartItem")
+    duplicates = (
+        CartItem.objects.values("cart_id", "menu_item_id")
+        .annotate(rows=Count("id"), keep=Min("id"), total=Sum("quantity"))
+        .filter(rows__gt=1)
+    )
+    for row in duplicates:
+        CartItem.objects.filter(pk=row["keep"]).update(quantity=row["total"])
+        CartItem.objects.filter(cart_id=row["cart_id"], menu_item_id=row["menu_item_id"]).exclude(
+            pk=row["keep"]
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0016_cart_counters'),
+        ('products', '0011_menuitem_discount_percentage'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_cart_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'menu_item'), name='unique_cart_menu_item'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:02
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0018_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='coupon_code',
+            field=models.CharField(blank=True, help_text='Coupon applied to this order', max_length=15),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='coupon_discount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Discount percentage of the applied coupon, as of checkout', max_digits=5),
+        ),
+    ]
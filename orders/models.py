@@ -1,10 +1,13 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 from decimal import Decimal
 from products.models import MenuItem
-from .utils import generate_unique_order_id, calculate_discount
+from utils.pricing import from_minor, price_lines, quote, to_basis_points, to_minor
+from .utils import ORDER_ID_ATTEMPTS, generate_unique_order_id, calculate_discount
 
 class OrderStatus(models.Model):
     
@@ -102,6 +105,14 @@ class Order(models.Model):
         ("Cancelled", "Cancelled"),
     ]
 
+    # Legal status transitions: current status -> statuses it may move to
+    STATUS_TRANSITIONS = {
+        "Pending": {"Processing", "Delivered", "Cancelled"},
+        "Processing": {"Delivered", "Cancelled"},
+        "Delivered": set(),
+        "Cancelled": set(),
+    }
+
     custom_order_id = models.CharField(
         max_length=12,
         unique=True,
@@ -133,20 +144,65 @@ class Order(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Coupon applied at checkout, kept so recomputed totals keep its discount
+    coupon_code = models.CharField(max_length=15, blank=True, help_text="Coupon applied to this order")
+    coupon_discount = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        help_text="Discount percentage of the applied coupon, as of checkout"
+    )
+
     # ✅ Attach the new custom manager here
     objects = OrderManager()
 
+    class Meta:
+        indexes = [
+            # Keyset pagination for staff lists and customer history
+            models.Index(fields=["-created_at", "-id"], name="order_created_id_idx"),
+            models.Index(fields=["customer", "-created_at", "-id"], name="order_customer_created_idx"),
+            # Active-order (kitchen) lookups by status, oldest first
+            models.Index(fields=["order_status", "created_at"], name="order_status_created_idx"),
+        ]
+
     def __str__(self):
         return f"Order #{self.custom_order_id or self.id} by {self.customer.username}"
 
+    @classmethod
+    def valid_statuses(cls) -> list:
+        """Return all status values an order can hold."""
+        return [choice[0] for choice in cls.STATUS_CHOICES]
+
+    @classmethod
+    def allowed_predecessors(cls, status: str) -> list:
+        """Return the statuses an order may move to `status` from."""
+        return [current for current, targets in cls.STATUS_TRANSITIONS.items() if status in targets]
+
+    def can_transition_to(self, status: str) -> bool:
+        """Check whether this order may move from its current status to `status`."""
+        return status in self.STATUS_TRANSITIONS.get(self.order_status, set())
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the persisted status/total so signal handlers can apply
+        # incremental changes to the sales rollups.
+        loaded = dict(zip(field_names, values))
+        instance._saved_status = loaded.get("order_status")
+        instance._saved_total = loaded.get("total_amount")
+        return instance
+
     def calculate_total(self, coupon=None, apply_coupon: bool = True) -> Decimal:
         """
         Calculate the total price of the order by summing its order_items,
         then applying an order-level discount (if provided or attached).
 
+        This is the full recompute path; regular writes keep `total_amount`
+        up to date incrementally as order items change (see orders.signals).
+
         Args:
             coupon: Optional - Coupon instance or coupon code string to apply.
-                    If None and the Order has an attribute 'coupon', that will be used.
+                    If None, the discount stored at checkout (coupon_discount) is used.
             apply_coupon: If False, do not apply any discount.
 
         Returns:
@@ -156,45 +212,124 @@ class Order(models.Model):
         if not self.pk:
             return Decimal("0.00")
 
-        # Sum item totals (menu item price * quantity)
-        subtotal = sum(
-            (item.item_total for item in self.order_items.all()),
-            Decimal("0.00"),
+        # Price all items in one query and one integer (paise) pass, at the
+        # same prices as OrderItem.item_total
+        items = OrderItem.objects.filter(order=self).select_related("menu_item").only(
+            "quantity", "unit_price", "menu_item__price", "menu_item__discount_percentage"
         )
-
-        # Determine coupon to use
-        coupon_to_use = coupon
-        if apply_coupon and coupon_to_use is None:
-            # If Order has a coupon FK/attribute, prefer that
-            coupon_to_use = getattr(self, "coupon", None)
-
-        discount_amount = Decimal("0.00")
-        if apply_coupon and coupon_to_use:
-            try:
-                discount_amount = calculate_discount(subtotal, coupon=coupon_to_use)
-            except Exception:
-                # On any error during discount calc, fall back to zero discount
-                discount_amount = Decimal("0.00")
-
-        total = (subtotal - discount_amount).quantize(Decimal("0.01"))
+        lines = [(to_minor(item.effective_unit_price), item.quantity) for item in items]
+
+        if apply_coupon and coupon is None and self.coupon_discount:
+            # Same arithmetic as checkout, so the stored discount is kept exactly
+            total = from_minor(quote(lines, to_basis_points(self.coupon_discount)).total)
+        else:
+            subtotal = from_minor(quote(lines).subtotal)
+            discount_amount = Decimal("0.00")
+            if apply_coupon and coupon:
+                try:
+                    discount_amount = calculate_discount(subtotal, coupon=coupon)
+                except Exception:
+                    # On any error during discount calc, fall back to zero discount
+                    discount_amount = Decimal("0.00")
+            total = (subtotal - discount_amount).quantize(Decimal("0.01"))
 
         # Update model field (but do not auto-save here to avoid side effects)
         self.total_amount = total
 
         return total
 
+    def recalculate_total(self, coupon=None, apply_coupon: bool = True) -> Decimal:
+        """
+        Explicitly recompute the order total from its items and persist it.
+
+        Use this to repair drift (e.g. after raw SQL edits); normal item
+        writes never need it.
+
+        Returns:
+            Decimal: The persisted total amount.
+        """
+        self.calculate_total(coupon=coupon, apply_coupon=apply_coupon)
+        self.save(update_fields=["total_amount"])
+        return self.total_amount
+
+    @staticmethod
+    def apply_total_delta(order_id: int, delta: Decimal) -> None:
+        """Atomically shift an order's stored total by `delta`."""
+        if delta:
+            Order.objects.filter(pk=order_id).update(
+                total_amount=F("total_amount") + delta
+            )
+
     def save(self, *args, **kwargs):
         # Assign a unique order ID if missing
-        if not self.custom_order_id:
+        allocated = not self.custom_order_id
+        if allocated:
             self.custom_order_id = generate_unique_order_id()
 
-        # Save the order first to ensure PK exists for reverse FK
-        super().save(*args, **kwargs)
+        # Totals are maintained by OrderItem writes, so no recompute here.
+        # A full save of an existing order must not overwrite the stored
+        # total with a possibly stale in-memory value, so the total is only
+        # written when it was changed on this instance (e.g. in the admin).
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            skip = self.get_deferred_fields()
+            if "total_amount" not in skip and self.total_amount == getattr(self, "_saved_total", None):
+                skip = skip | {"total_amount"}
+            if skip:
+                kwargs["update_fields"] = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.attname not in skip and field.name not in skip
+                ]
+        if not (allocated and self._state.adding):
+            super().save(*args, **kwargs)
+            return
+
+        for attempt in range(1, ORDER_ID_ATTEMPTS + 1):
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                # Retry only if the allocated ID was taken (by another process sharing our node)
+                if attempt == ORDER_ID_ATTEMPTS or not Order.objects.filter(custom_order_id=self.custom_order_id).exists():
+                    raise
+                self.custom_order_id = generate_unique_order_id()
+
+
+class OrderStatusEvent(models.Model):
+    """
+    Append-only log of order status changes.
+    The auto-incrementing ID doubles as the SSE event ID clients resume from.
+    """
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name="status_events",
+        help_text="The order whose status changed"
+    )
+    from_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES, blank=True)
+    to_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
 
-        # Recalculate total if there are order items
-        total = self.calculate_total()
-        if total != self.total_amount:
-            Order.objects.filter(pk=self.pk).update(total_amount=total)
+    class Meta:
+        verbose_name = "Order Status Event"
+        verbose_name_plural = "Order Status Events"
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["order", "id"], name="order_status_event_idx"),
+        ]
+
+    def __str__(self):
+        return f"Order #{self.order_id}: {self.from_status or '-'} -> {self.to_status}"
+
+    def as_payload(self) -> dict:
+        """Return the JSON-serializable event body sent to subscribers."""
+        return {
+            "event_id": self.id,
+            "order_id": self.order_id,
+            "from_status": self.from_status,
+            "status": self.to_status,
+            "changed_at": self.created_at.isoformat(),
+        }
 
 
 class OrderItem(models.Model):
@@ -214,29 +349,98 @@ class OrderItem(models.Model):
         help_text="The menu item included in this order"
     )
     quantity = models.PositiveIntegerField(default=1, help_text="Quantity of this menu item")
+    unit_price = models.DecimalField(
+        max_digits=8,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text="Menu item price captured when the item was ordered"
+    )
 
     def __str__(self):
         return f"{self.quantity} x {self.menu_item.name} (Order #{self.order.id})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what this row contributed to its order's total so that
+        # later saves/deletes can apply only the difference.
+        loaded = dict(zip(field_names, values))
+        if loaded.get("unit_price") is not None and "quantity" in loaded:
+            instance._saved_order_id = loaded.get("order_id")
+            instance._saved_total = loaded["unit_price"] * loaded["quantity"]
+        return instance
+
+    @property
+    def effective_unit_price(self) -> Decimal:
+        """The price snapshot, or the menu item's discounted price for rows without one."""
+        return self.unit_price if self.unit_price is not None else self.menu_item.get_final_price()
+
     @property
     def item_total(self):
         """Return total price for this menu item."""
-        return self.menu_item.price * self.quantity
+        return from_minor(price_lines([(to_minor(self.effective_unit_price), self.quantity)])[0])
+
+    def save(self, *args, **kwargs):
+        # Snapshot the (discounted) price so later menu changes don't alter the order
+        if self.unit_price is None:
+            self.unit_price = self.menu_item.get_final_price()
+        super().save(*args, **kwargs)
 
 
 class Cart(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    # Denormalized counters for the navbar badge (see orders.context_processors);
+    # kept in step with CartItem writes by orders.signals.
+    item_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"))
 
     def __str__(self):
         return f"Cart of {self.user}"
 
+    @staticmethod
+    def apply_counter_delta(cart_id: int, count_delta: int, amount_delta: Decimal) -> None:
+        """Atomically shift a cart's stored item count and total."""
+        if count_delta or amount_delta:
+            Cart.objects.filter(pk=cart_id).update(
+                item_count=F("item_count") + count_delta,
+                total_amount=F("total_amount") + amount_delta,
+            )
+
+    @classmethod
+    def refresh_counters(cls, cart_ids) -> None:
+        """
+        Recompute the stored counters of the given carts from their items.
+
+        Used when menu prices change and to repair drift; regular cart
+        writes update the counters incrementally.
+        """
+        carts = list(cls.objects.filter(pk__in=cart_ids).prefetch_related("items__menu_item"))
+        for cart in carts:
+            cart.item_count = sum(item.quantity for item in cart.items.all())
+            cart.total_amount = cart.total_price
+        cls.objects.bulk_update(carts, ["item_count", "total_amount"])
+
+    def _items_with_menu(self):
+        # Reuse prefetched items when available, otherwise join menu items
+        if "items" in getattr(self, "_prefetched_objects_cache", {}):
+            return list(self.items.all())
+        return list(self.items.select_related("menu_item"))
+
+    def quote(self, coupon_bp: int = 0):
+        """Price the cart with utils.pricing (amounts in paise)."""
+        return quote(
+            (item.menu_item.pricing_line(item.quantity) for item in self._items_with_menu()),
+            coupon_bp,
+        )
+
     @property
     def total_items(self):
-        return sum(i.quantity for i in self.items.all())
+        return self.item_count
 
     @property
     def total_price(self):
-        return sum(i.menu_item.price * i.quantity for i in self.items.all())
+        return from_minor(self.quote().total)
 
 
 class CartItem(models.Model):
@@ -244,12 +448,27 @@ class CartItem(models.Model):
     menu_item = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["cart", "menu_item"], name="unique_cart_menu_item"),
+        ]
+
     def __str__(self):
         return f"{self.menu_item.name} ({self.quantity})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the persisted cart/quantity so signal handlers can apply
+        # only the difference to the cart counters.
+        loaded = dict(zip(field_names, values))
+        instance._saved_cart_id = loaded.get("cart_id")
+        instance._saved_quantity = loaded.get("quantity")
+        return instance
+
     @property
     def subtotal(self):
-        return self.menu_item.price * self.quantity
+        return from_minor(price_lines([self.menu_item.pricing_line(self.quantity)])[0])
 
 
 class Coupon(models.Model):
@@ -278,3 +497,67 @@ class Coupon(models.Model):
 
     def __str__(self):
         return f"{self.code} ({self.discount}% off)"
+
+
+class SalesRollup(models.Model):
+    """
+    Pre-aggregated order count and revenue per period and order status.
+    Maintained incrementally as orders are written (see orders.signals),
+    and rebuilt with the `rebuild_sales_rollups` management command.
+    """
+    HOUR = "hour"
+    DAY = "day"
+    GRANULARITY_CHOICES = [
+        (HOUR, "Hourly"),
+        (DAY, "Daily"),
+    ]
+
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES)
+    period_start = models.DateTimeField(help_text="Start of the hour/day bucket (local time)")
+    order_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    order_count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        verbose_name = "Sales Rollup"
+        verbose_name_plural = "Sales Rollups"
+        ordering = ["granularity", "period_start", "order_status"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["granularity", "period_start", "order_status"],
+                name="unique_sales_rollup_bucket",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_granularity_display()} {self.period_start:%Y-%m-%d %H:%M} {self.order_status}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    First response to an order-creating request sent with an
+    `Idempotency-Key` header, replayed for retries of the same request
+    (see orders.idempotency). `status_code` is empty while the first
+    request is still running.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="idempotency_keys")
+    key = models.CharField(max_length=255)
+    request_fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = "Idempotency Key"
+        verbose_name_plural = "Idempotency Keys"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="unique_idempotency_key_per_user"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key}"
+
+    @property
+    def is_complete(self) -> bool:
+        return self.status_code is not None
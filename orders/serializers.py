@@ -1,6 +1,10 @@
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from .models import Order, OrderItem,OrderStatus
+from .models import Cart, CartItem, Order, OrderItem,OrderStatus
+from .utils import ORDER_ID_ATTEMPTS, generate_unique_order_ids, record_sales_bulk
 from products.models import MenuItem
+from utils.pricing import from_minor, quote_many
 
 class MenuItemSerializer(serializers.ModelSerializer):
     class Meta:
@@ -9,14 +13,11 @@ class MenuItemSerializer(serializers.ModelSerializer):
 
 class OrderItemSerializer(serializers.ModelSerializer):
     menu_item_name = serializers.CharField(source="menu_item.name", read_only=True)
-    item_total = serializers.SerializerMethodField()
+    item_total = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
 
     class Meta:
         model = OrderItem
-        fields = ["menu_item_name", "quantity", "item_total"]
-
-    def get_item_total(self, obj):
-        return obj.get_item_total()
+        fields = ["menu_item", "menu_item_name", "quantity", "unit_price", "item_total"]
 
 class OrderSerializer(serializers.ModelSerializer):
     class Meta:
@@ -30,13 +31,17 @@ class OrderStatusSerializer(serializers.ModelSerializer):
         fields = ["id", "name"]
 
 class OrderDetailSerializer(serializers.ModelSerializer):
+    """
+    Full order view with customer and line items.
+    Expects `customer` selected and `order_items__menu_item` prefetched.
+    """
     order_items = OrderItemSerializer(many=True, read_only=True)
     customer = serializers.StringRelatedField(read_only=True)
-    order_status = OrderStatusSerializer(read_only=True)
 
     class Meta:
         model = Order
-        fields = ["id", "customer", "total_amount", "order_status", "created_at", "order_items"]
+        fields = ["id", "custom_order_id", "customer", "total_amount", "order_status", "created_at", "order_items"]
+        read_only_fields = fields
         
 class OrderStatusUpdateSerializer(serializers.Serializer):
     """
@@ -58,6 +63,220 @@ class OrderStatusUpdateSerializer(serializers.Serializer):
             raise serializers.ValidationError({
                 "new_status": f"Invalid status. Allowed values: {', '.join(valid_statuses)}"
             })
+        if not order.can_transition_to(data["new_status"]):
+            raise serializers.ValidationError({
+                "new_status": f"Cannot change status from '{order.order_status}' to '{data['new_status']}'."
+            })
 
         data["order"] = order
-        return data
\ No newline at end of file
+        return data
+
+
+class BulkOrderStatusUpdateSerializer(serializers.Serializer):
+    """
+    Serializer for moving many orders to one status at once.
+    """
+    order_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=500,
+    )
+    new_status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+
+
+class BulkOrderItemSerializer(serializers.Serializer):
+    """A single line item inside a bulk-ingested order."""
+    menu_item = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+
+class BulkOrderSerializer(serializers.Serializer):
+    """A single order inside a bulk ingestion payload."""
+    customer = serializers.IntegerField(min_value=1, required=False)
+    order_status = serializers.ChoiceField(choices=Order.STATUS_CHOICES, default="Pending")
+    items = BulkOrderItemSerializer(many=True, allow_empty=False)
+
+
+class BulkOrderCreateSerializer(serializers.Serializer):
+    """
+    Validates and inserts many orders at once.
+    Menu items and customers are resolved with one query each, and all
+    orders and items are written with bulk_create in one transaction.
+    """
+    orders = BulkOrderSerializer(many=True, allow_empty=False, max_length=1000)
+
+    def validate(self, data):
+        request = self.context["request"]
+        orders = data["orders"]
+
+        # Resolve every referenced menu item in a single query
+        menu_item_ids = {item["menu_item"] for order in orders for item in order["items"]}
+        menu_items = MenuItem.objects.in_bulk(menu_item_ids)
+        missing = sorted(menu_item_ids - menu_items.keys())
+        if missing:
+            raise serializers.ValidationError(
+                {"orders": f"Invalid menu item IDs: {', '.join(map(str, missing))}"}
+            )
+        unavailable = sorted(pk for pk, item in menu_items.items() if not item.is_available)
+        if unavailable:
+            raise serializers.ValidationError(
+                {"orders": f"Unavailable menu item IDs: {', '.join(map(str, unavailable))}"}
+            )
+
+        # Only staff may ingest orders on behalf of other customers
+        customer_ids = {order["customer"] for order in orders if "customer" in order}
+        if customer_ids - {request.user.pk}:
+            if not request.user.is_staff:
+                raise serializers.ValidationError(
+                    {"orders": "You may only create orders for yourself."}
+                )
+            unknown = customer_ids - set(
+                User.objects.filter(pk__in=customer_ids).values_list("pk", flat=True)
+            )
+            if unknown:
+                raise serializers.ValidationError(
+                    {"orders": f"Invalid customer IDs: {', '.join(map(str, sorted(unknown)))}"}
+                )
+
+        data["menu_items"] = menu_items
+        return data
+
+    def create(self, validated_data):
+        request = self.context["request"]
+        menu_items = validated_data["menu_items"]
+        payloads = validated_data["orders"]
+        order_ids = generate_unique_order_ids(len(payloads))
+
+        quotes = quote_many(
+            [menu_items[item["menu_item"]].pricing_line(item["quantity"]) for item in payload["items"]]
+            for payload in payloads
+        )
+        orders = [
+            Order(
+                custom_order_id=custom_order_id,
+                customer_id=payload.get("customer", request.user.pk),
+                order_status=payload["order_status"],
+                total_amount=from_minor(order_quote.total),
+            )
+            for payload, custom_order_id, order_quote in zip(payloads, order_ids, quotes)
+        ]
+
+        with transaction.atomic():
+            for attempt in range(1, ORDER_ID_ATTEMPTS + 1):
+                try:
+                    with transaction.atomic():
+                        Order.objects.bulk_create(orders, batch_size=500)
+                    break
+                except IntegrityError:
+                    # An allocated ID was already taken: retry the batch with fresh IDs
+                    if attempt == ORDER_ID_ATTEMPTS or not Order.objects.filter(
+                        custom_order_id__in=[order.custom_order_id for order in orders]
+                    ).exists():
+                        raise
+                    for order, custom_order_id in zip(orders, generate_unique_order_ids(len(orders))):
+                        order.pk = None
+                        order.custom_order_id = custom_order_id
+            OrderItem.objects.bulk_create(
+                [
+                    OrderItem(
+                        order=order,
+                        menu_item_id=item["menu_item"],
+                        quantity=item["quantity"],
+                        unit_price=menu_items[item["menu_item"]].get_final_price(),
+                    )
+                    for order, payload in zip(orders, payloads)
+                    for item in payload["items"]
+                ],
+                batch_size=500,
+            )
+            # bulk_create skips signals, so feed the sales rollups directly
+            record_sales_bulk(orders)
+        return orders
+
+    def to_representation(self, orders):
+        return {
+            "orders": [
+                {
+                    "id": order.pk,
+                    "custom_order_id": order.custom_order_id,
+                    "total_amount": str(order.total_amount),
+                }
+                for order in orders
+            ]
+        }
+
+
+class CartItemSerializer(serializers.ModelSerializer):
+    menu_item_name = serializers.CharField(source="menu_item.name", read_only=True)
+    unit_price = serializers.DecimalField(source="menu_item.get_final_price", max_digits=10, decimal_places=2, read_only=True)
+    subtotal = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = CartItem
+        fields = ["menu_item", "menu_item_name", "quantity", "unit_price", "subtotal"]
+
+
+class CartSerializer(serializers.ModelSerializer):
+    items = CartItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Cart
+        fields = ["item_count", "total_amount", "items"]
+
+
+class CartQuantitySerializer(serializers.Serializer):
+    menu_item = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=0, max_value=1000)
+
+
+class CartBulkUpdateSerializer(serializers.Serializer):
+    """
+    Sets quantities for many menu items at once (0 removes an item).
+    With `replace`, items not listed are removed, so a client can sync its
+    whole cart in one request.
+    """
+    items = CartQuantitySerializer(many=True, max_length=200)
+    replace = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        quantities = {}
+        for item in data["items"]:
+            if item["menu_item"] in quantities:
+                raise serializers.ValidationError(
+                    {"items": f"Duplicate menu item ID: {item['menu_item']}"}
+                )
+            quantities[item["menu_item"]] = item["quantity"]
+
+        # Resolve every referenced menu item in a single query
+        menu_items = MenuItem.objects.in_bulk(quantities)
+        missing = sorted(quantities.keys() - menu_items.keys())
+        if missing:
+            raise serializers.ValidationError(
+                {"items": f"Invalid menu item IDs: {', '.join(map(str, missing))}"}
+            )
+        unavailable = sorted(
+            pk for pk, item in menu_items.items() if quantities[pk] and not item.is_available
+        )
+        if unavailable:
+            raise serializers.ValidationError(
+                {"items": f"Unavailable menu item IDs: {', '.join(map(str, unavailable))}"}
+            )
+
+        data["quantities"] = quantities
+        data["menu_items"] = menu_items
+        return data
+
+
+class CheckoutSerializer(serializers.Serializer):
+    """Optional coupon for a cart checkout, resolved from the coupon index."""
+    coupon_code = serializers.CharField(max_length=15, required=False, allow_blank=True)
+
+    def validate_coupon_code(self, value):
+        from .coupons import coupon_index  # lazy import
+
+        if not value:
+            return None
+        coupon, error = coupon_index.validate(value)
+        if error:
+            raise serializers.ValidationError(error)
+        return coupon
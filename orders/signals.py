@@ -1,7 +1,15 @@
-from django.db.models.signals import post_save, post_migrate
+from decimal import Decimal
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, post_migrate
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import Cart, OrderStatus
+from products.models import MenuItem
+from utils.pricing import from_minor, price_lines
+from .models import Cart, CartItem, Coupon, Order, OrderItem, OrderStatus, OrderStatusEvent
+from .cart import counters_adjusted
+from .coupons import coupon_index
+from .events import broker
+from .utils import record_sales
 from . import DEFAULT_STATUSES
 User = get_user_model()
 
@@ -15,3 +23,167 @@ def create_default_order_statuses(sender, **kwargs):
     if sender.name == "orders":
         for status in DEFAULT_STATUSES:
             OrderStatus.objects.get_or_create(name=status)
+
+
+@receiver(post_save, sender=Coupon)
+@receiver(post_delete, sender=Coupon)
+def invalidate_coupon_index(sender, **kwargs):
+    # Drop now, and again after commit in case a reader reloaded in between
+    coupon_index.invalidate()
+    transaction.on_commit(coupon_index.invalidate)
+
+
+@receiver(post_save, sender=Order)
+def log_status_change(sender, instance, created, **kwargs):
+    """
+    Append to the order status event log whenever order_status changes, and
+    wake SSE subscribers once the change is committed.
+    (Must run before update_sales_rollups, which refreshes `_saved_status`.)
+    """
+    old_status = getattr(instance, "_saved_status", None)
+    if created or not old_status or old_status == instance.order_status:
+        return
+    OrderStatusEvent.objects.create(order=instance, from_status=old_status, to_status=instance.order_status)
+    transaction.on_commit(broker.notify)
+
+
+@receiver(post_save, sender=Order)
+def update_sales_rollups(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Keep SalesRollup in step with order creation, status changes and
+    explicit total updates.
+    """
+    total_written = created or update_fields is None or "total_amount" in update_fields
+    if created:
+        record_sales(instance.created_at, instance.order_status, 1, instance.total_amount)
+    else:
+        old_status = getattr(instance, "_saved_status", None)
+        old_total = getattr(instance, "_saved_total", None)
+        if old_total is None:
+            old_total = instance.total_amount
+
+        if old_status and old_status != instance.order_status:
+            record_sales(instance.created_at, old_status, -1, -old_total)
+            record_sales(instance.created_at, instance.order_status, 1, old_total)
+        if total_written and instance.total_amount != old_total:
+            record_sales(instance.created_at, instance.order_status, 0, instance.total_amount - old_total)
+
+    instance._saved_status = instance.order_status
+    if total_written:
+        instance._saved_total = instance.total_amount
+
+
+@receiver(post_delete, sender=Order)
+def remove_order_sales(sender, instance, **kwargs):
+    record_sales(
+        instance.created_at,
+        getattr(instance, "_saved_status", None) or instance.order_status,
+        -1,
+        -getattr(instance, "_saved_total", instance.total_amount),
+    )
+
+
+def _apply_item_delta(instance, order_id, delta):
+    """Shift the order total and its sales rollup by `delta` (the change in item totals)."""
+    if not delta:
+        return
+    cached = OrderItem.order.is_cached(instance) and instance.order.pk == order_id
+    if cached:
+        order = instance.order
+    else:
+        order = Order.objects.only("created_at", "order_status", "coupon_discount").get(pk=order_id)
+
+    if order.coupon_discount:
+        # The coupon discounts the subtotal as a whole, so re-price the order
+        with transaction.atomic():
+            locked = Order.objects.select_for_update().only("total_amount", "coupon_discount").get(pk=order_id)
+            old_total = locked.total_amount
+            delta = locked.calculate_total() - old_total
+            Order.objects.filter(pk=order_id).update(total_amount=locked.total_amount)
+        if not delta:
+            return
+    else:
+        Order.apply_total_delta(order_id, delta)
+
+    if cached:
+        # Keep the already-loaded order in step with the database
+        order.total_amount += delta
+        order._saved_total = getattr(order, "_saved_total", order.total_amount - delta) + delta
+    record_sales(order.created_at, order.order_status, 0, delta)
+
+
+@receiver(post_save, sender=OrderItem)
+def apply_order_item_delta(sender, instance, created, **kwargs):
+    """
+    Incrementally maintain Order.total_amount when an item is added or changed.
+    Only the difference from the previously saved row is applied.
+    """
+    new_total = instance.item_total
+    old_total = Decimal("0.00") if created else getattr(instance, "_saved_total", Decimal("0.00"))
+    old_order_id = None if created else getattr(instance, "_saved_order_id", instance.order_id)
+
+    if old_order_id is not None and old_order_id != instance.order_id:
+        # Item moved between orders: take it off the old one entirely
+        _apply_item_delta(instance, old_order_id, -old_total)
+        old_total = Decimal("0.00")
+
+    _apply_item_delta(instance, instance.order_id, new_total - old_total)
+
+    instance._saved_order_id = instance.order_id
+    instance._saved_total = new_total
+
+
+@receiver(post_delete, sender=OrderItem)
+def remove_order_item_total(sender, instance, origin=None, **kwargs):
+    """Subtract a deleted item from its order, unless the order itself is going away."""
+    if isinstance(origin, Order) or getattr(origin, "model", None) is Order:
+        return
+    _apply_item_delta(instance, instance.order_id, -getattr(instance, "_saved_total", instance.item_total))
+
+
+def _cart_line_total(instance, quantity) -> Decimal:
+    """Price `quantity` of a cart item's menu item at its current price."""
+    if not quantity:
+        return Decimal("0.00")
+    return from_minor(price_lines([instance.menu_item.pricing_line(quantity)])[0])
+
+
+@receiver(post_save, sender=CartItem)
+def apply_cart_item_delta(sender, instance, created, **kwargs):
+    """Incrementally maintain Cart.item_count/total_amount when an item is added or changed."""
+    old_quantity = 0 if created else getattr(instance, "_saved_quantity", 0) or 0
+    old_cart_id = None if created else getattr(instance, "_saved_cart_id", instance.cart_id)
+
+    if old_cart_id is not None and old_cart_id != instance.cart_id:
+        # Item moved between carts: take it off the old one entirely
+        Cart.apply_counter_delta(old_cart_id, -old_quantity, -_cart_line_total(instance, old_quantity))
+        old_quantity = 0
+
+    Cart.apply_counter_delta(
+        instance.cart_id,
+        instance.quantity - old_quantity,
+        _cart_line_total(instance, instance.quantity) - _cart_line_total(instance, old_quantity),
+    )
+    instance._saved_cart_id = instance.cart_id
+    instance._saved_quantity = instance.quantity
+
+
+@receiver(post_delete, sender=CartItem)
+def remove_cart_item_counters(sender, instance, origin=None, **kwargs):
+    """Subtract a deleted item from its cart, unless the cart itself is going away."""
+    if isinstance(origin, Cart) or getattr(origin, "model", None) is Cart or counters_adjusted():
+        # Cart deletes need no bookkeeping; orders.cart adjusts the counters
+        # for its own deletes
+        return
+    quantity = getattr(instance, "_saved_quantity", instance.quantity) or 0
+    Cart.apply_counter_delta(instance.cart_id, -quantity, -_cart_line_total(instance, quantity))
+
+
+@receiver(post_save, sender=MenuItem)
+def refresh_cart_totals_for_menu_item(sender, instance, created, **kwargs):
+    """Re-price carts holding a menu item after its price or discount changes."""
+    update_fields = kwargs.get("update_fields")
+    if created or (update_fields and not {"price", "discount_percentage"} & set(update_fields)):
+        return
+    cart_ids = CartItem.objects.filter(menu_item=instance).values_list("cart_id", flat=True)
+    Cart.refresh_counters(list(cart_ids))
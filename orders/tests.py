@@ -1,9 +1,41 @@
 # orders/tests.py
-from django.test import TestCase
+import asyncio
+import csv
+import os
+import tempfile
+from unittest import mock
+from io import StringIO
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from datetime import timedelta
 from decimal import Decimal
 from account.models import User
+from home.models import MenuCategory
 from products.models import MenuItem
-from .models import Order, OrderItem, OrderStatus
+from utils.pricing import quote, quote_many, to_basis_points
+from .models import Cart, CartItem, Coupon, IdempotencyKey, Order, OrderItem, OrderStatus, SalesRollup
+from . import cart as cart_ops
+from .context_processors import cart_item_count
+from .coupons import coupon_index
+from .idempotency import _fingerprint
+from .kitchen import KitchenQueue
+from .utils import (
+    TimeOrderedOrderIdAllocator,
+    bulk_update_order_status,
+    calculate_discount,
+    calculate_order_total,
+    get_daily_sales_total,
+    get_sales_totals,
+    rebuild_sales_rollups,
+    update_order_status,
+)
 
 # orders/tests.py
 
@@ -14,10 +46,745 @@ class OrderModelTest(TestCase):
         # Prevent duplicate unique constraint error
         self.status, _ = OrderStatus.objects.get_or_create(name="Pending")
 
-        self.menu_item1 = MenuItem.objects.create(name="Pizza", price=Decimal("200.00"))
-        self.menu_item2 = MenuItem.objects.create(name="Burger", price=Decimal("100.00"))
+        self.category = MenuCategory.objects.create(name="Mains")
+        self.menu_item1 = MenuItem.objects.create(name="Pizza", price=Decimal("200.00"), category=self.category)
+        self.menu_item2 = MenuItem.objects.create(name="Burger", price=Decimal("100.00"), category=self.category)
 
-        self.order = Order.objects.create(customer=self.user, order_status=self.status)
+        self.order = Order.objects.create(customer=self.user, order_status=self.status.name)
 
         OrderItem.objects.create(order=self.order, menu_item=self.menu_item1, quantity=2)
         OrderItem.objects.create(order=self.order, menu_item=self.menu_item2, quantity=3)
+
+    def test_total_is_maintained_as_items_are_added(self):
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_amount, Decimal("700.00"))
+
+    def test_total_follows_item_updates_and_deletes(self):
+        item = OrderItem.objects.get(order=self.order, menu_item=self.menu_item1)
+        item.quantity = 1
+        item.save()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_amount, Decimal("500.00"))
+
+        OrderItem.objects.filter(menu_item=self.menu_item2).delete()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_amount, Decimal("200.00"))
+
+    def test_save_without_item_changes_skips_recompute(self):
+        with self.assertNumQueries(1):
+            self.order.save(update_fields=["order_status"])
+
+    def test_explicit_total_edit_is_saved_and_rolled_up(self):
+        order = Order.objects.get(pk=self.order.pk)
+        order.total_amount = Decimal("650.00")
+        order.save()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_amount, Decimal("650.00"))
+        self.assertEqual(get_daily_sales_total(timezone.localdate(order.created_at)), 650.0)
+
+        # Unchanged in memory: a full save keeps the stored total
+        OrderItem.objects.create(order=self.order, menu_item=self.menu_item2, quantity=1)
+        order.order_status = "Processing"
+        order.save()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_amount, Decimal("750.00"))
+
+    def test_save_of_partially_loaded_order_writes_loaded_fields_only(self):
+        order = Order.objects.only("id", "order_status", "created_at").get(pk=self.order.pk)
+        order.order_status = "Processing"
+        with CaptureQueriesContext(connection) as queries:
+            order.save()
+        update = next(q["sql"] for q in queries.captured_queries if q["sql"].startswith('UPDATE "orders_order"'))
+        self.assertNotIn("customer_id", update)
+        self.assertNotIn("total_amount", update)
+        self.order.refresh_from_db()
+        self.assertEqual((self.order.order_status, self.order.total_amount), ("Processing", Decimal("700.00")))
+
+    def test_item_price_is_snapshotted(self):
+        self.menu_item1.price = Decimal("999.00")
+        self.menu_item1.save()
+        self.assertEqual(self.order.recalculate_total(), Decimal("700.00"))
+
+    def test_rows_without_a_price_snapshot_use_the_discounted_price(self):
+        self.menu_item1.discount_percentage = Decimal("10.00")
+        self.menu_item1.save()
+        OrderItem.objects.filter(order=self.order, menu_item=self.menu_item1).update(unit_price=None)
+        item = OrderItem.objects.get(order=self.order, menu_item=self.menu_item1)
+        self.assertEqual(item.item_total, Decimal("360.00"))
+        self.assertEqual(self.order.calculate_total(), Decimal("660.00"))
+
+    def test_recalculate_total_repairs_drift(self):
+        Order.objects.filter(pk=self.order.pk).update(total_amount=Decimal("1.00"))
+        self.assertEqual(self.order.recalculate_total(), Decimal("700.00"))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_amount, Decimal("700.00"))
+
+
+class BulkOrderIngestionTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create(username="pos", is_staff=True)
+        self.customer = User.objects.create(username="diner")
+        category = MenuCategory.objects.create(name="Mains")
+        self.pizza = MenuItem.objects.create(name="Pizza", price=Decimal("200.00"), category=category)
+        self.burger = MenuItem.objects.create(name="Burger", price=Decimal("100.00"), category=category)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        self.url = "/api/orders/api/orders/bulk/"
+
+    def test_bulk_create_inserts_orders_and_items(self):
+        payload = {"orders": [
+            {"items": [{"menu_item": self.pizza.pk, "quantity": 2}]},
+            {"customer": self.customer.pk, "items": [
+                {"menu_item": self.pizza.pk, "quantity": 1},
+                {"menu_item": self.burger.pk, "quantity": 3},
+            ]},
+        ]}
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        created = response.data["orders"]
+        self.assertEqual([o["total_amount"] for o in created], ["400.00", "500.00"])
+        self.assertEqual(OrderItem.objects.count(), 3)
+        order = Order.objects.get(pk=created[1]["id"])
+        self.assertEqual(order.customer, self.customer)
+        self.assertEqual(order.recalculate_total(), Decimal("500.00"))
+
+    def test_unknown_menu_item_rejects_whole_batch(self):
+        payload = {"orders": [
+            {"items": [{"menu_item": self.pizza.pk}]},
+            {"items": [{"menu_item": 9999}]},
+        ]}
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_unavailable_menu_item_rejects_whole_batch(self):
+        self.burger.is_available = False
+        self.burger.save()
+        payload = {"orders": [
+            {"items": [{"menu_item": self.pizza.pk}]},
+            {"items": [{"menu_item": self.burger.pk}]},
+        ]}
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Unavailable menu item IDs", str(response.data))
+        self.assertFalse(Order.objects.exists())
+
+    def test_customers_cannot_order_for_others(self):
+        self.client.force_authenticate(self.customer)
+        payload = {"orders": [{"customer": self.staff.pk, "items": [{"menu_item": self.pizza.pk}]}]}
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, 400)
+
+
+class TimeOrderedOrderIdAllocatorTest(TestCase):
+    def test_ids_are_unique_sorted_and_fit_the_column(self):
+        allocator = TimeOrderedOrderIdAllocator(node_id=3)
+        with self.assertNumQueries(0):
+            ids = allocator.allocate_many(5000)
+
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(ids, sorted(ids))
+        self.assertTrue(all(len(i) == 12 for i in ids))
+
+    def test_nodes_never_collide(self):
+        a = TimeOrderedOrderIdAllocator(node_id=1).allocate_many(1000)
+        b = TimeOrderedOrderIdAllocator(node_id=2).allocate_many(1000)
+        self.assertFalse(set(a) & set(b))
+
+    def test_node_is_validated_or_drawn_per_process(self):
+        for node in (512, -1, "worker-1"):
+            with self.assertRaises(ImproperlyConfigured):
+                TimeOrderedOrderIdAllocator(node_id=node)
+        with override_settings(ORDER_ID_NODE=None):
+            nodes = {TimeOrderedOrderIdAllocator().node_id for _ in range(20)}
+        self.assertTrue(all(0 <= node < 512 for node in nodes))
+        self.assertGreater(len(nodes), 1)  # not one node for every process
+
+    def test_taken_ids_are_reallocated(self):
+        customer = User.objects.create(username="dup")
+        taken = Order.objects.create(customer=customer).custom_order_id
+        with mock.patch("orders.models.generate_unique_order_id", side_effect=[taken, "0ZZZZZZZZZZ1"]):
+            order = Order.objects.create(customer=customer)
+        self.assertEqual(order.custom_order_id, "0ZZZZZZZZZZ1")
+
+        category = MenuCategory.objects.create(name="Mains")
+        pizza = MenuItem.objects.create(name="Pizza", price=Decimal("200.00"), category=category)
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username="pos", is_staff=True))
+        with mock.patch(
+            "orders.serializers.generate_unique_order_ids", side_effect=[[taken], ["0ZZZZZZZZZZ2"]]
+        ):
+            response = client.post(
+                "/api/orders/api/orders/bulk/", {"orders": [{"items": [{"menu_item": pizza.pk}]}]}, format="json"
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["orders"][0]["custom_order_id"], "0ZZZZZZZZZZ2")
+
+
+class CouponCampaignTest(TestCase):
+    def test_command_creates_unique_codes_and_writes_csv(self):
+        Coupon.objects.create(code="EXISTING01", discount=Decimal("5.00"))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "codes.csv")
+            call_command(
+                "generate_coupons", "2500", "--discount", "15", "--batch-size", "1000",
+                "--output", path, stdout=StringIO(),
+            )
+            with open(path, newline="") as handle:
+                rows = list(csv.DictReader(handle))
+
+        self.assertEqual(len(rows), 2500)
+        self.assertEqual(len({row["code"] for row in rows}), 2500)
+        self.assertEqual(Coupon.objects.filter(discount=Decimal("15")).count(), 2500)
+
+
+class SalesRollupTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="diner")
+        category = MenuCategory.objects.create(name="Mains")
+        self.pizza = MenuItem.objects.create(name="Pizza", price=Decimal("200.00"), category=category)
+
+        self.order = Order.objects.create(customer=self.user)
+        OrderItem.objects.create(order=self.order, menu_item=self.pizza, quantity=2)
+        second = Order.objects.create(customer=self.user)
+        OrderItem.objects.create(order=second, menu_item=self.pizza, quantity=1)
+        self.today = self.order.created_at.date()
+
+    def test_rollups_follow_item_and_status_changes(self):
+        self.order.order_status = "Delivered"
+        self.order.save(update_fields=["order_status"])
+
+        (day,) = get_sales_totals(self.today, self.today + timedelta(days=1))
+        self.assertEqual(day["order_count"], 2)
+        self.assertEqual(day["gross_revenue"], Decimal("600.00"))
+        self.assertEqual(day["revenue_by_status"], {"Delivered": Decimal("400.00"), "Pending": Decimal("200.00")})
+        self.assertEqual(get_daily_sales_total(self.today), 600.0)
+
+    def test_range_query_is_a_single_query(self):
+        with self.assertNumQueries(1):
+            get_sales_totals(self.today, self.today + timedelta(days=31), granularity="hour")
+
+    def test_rebuild_matches_incremental_rollups(self):
+        incremental = sorted(SalesRollup.objects.values_list("granularity", "period_start", "order_status", "order_count", "revenue"))
+        SalesRollup.objects.all().delete()
+        rebuild_sales_rollups()
+        rebuilt = sorted(SalesRollup.objects.values_list("granularity", "period_start", "order_status", "order_count", "revenue"))
+        self.assertEqual(incremental, rebuilt)
+
+
+class OrderCursorPaginationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="diner")
+        Order.objects.bulk_create([Order(customer=self.user, custom_order_id=f"ORD{i:04d}") for i in range(45)])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _walk(self, url):
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(order["id"] for order in response.data["results"])
+            url = response.data["next"]
+        return seen
+
+    def test_history_pages_cover_every_order_once_newest_first(self):
+        seen = self._walk("/api/orders/api/orders/history/")
+        expected = list(Order.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_orders_created_in_the_same_instant_are_paged_by_id(self):
+        Order.objects.update(created_at=timezone.now())
+        seen = self._walk("/api/orders/api/orders/history/?page_size=10")
+        self.assertEqual(seen, list(Order.objects.order_by("-id").values_list("id", flat=True)))
+
+        # And back again from the last page
+        url = "/api/orders/api/orders/history/?page_size=10"
+        for _ in range(4):
+            url = self.client.get(url).data["next"]
+        back = []
+        while url:
+            response = self.client.get(url)
+            back[:0] = [order["id"] for order in response.data["results"]]
+            url = response.data["previous"]
+        self.assertEqual(back, seen)
+
+    def test_list_is_cursor_paginated(self):
+        response = self.client.get("/api/orders/api/orders/?page_size=10")
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertIn("cursor=", response.data["next"])
+
+
+class OrderDetailTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="diner")
+        category = MenuCategory.objects.create(name="Mains")
+        self.order = Order.objects.create(customer=self.user)
+        for i in range(30):
+            item = MenuItem.objects.create(name=f"Dish {i}", price=Decimal("10.00"), category=category)
+            OrderItem.objects.create(order=self.order, menu_item=item, quantity=2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_retrieve_uses_fixed_number_of_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/orders/api/orders/{self.order.pk}/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["customer"], "diner")
+        self.assertEqual(len(response.data["order_items"]), 30)
+        self.assertEqual(response.data["order_items"][0]["item_total"], "20.00")
+        self.assertEqual(response.data["total_amount"], "600.00")
+
+    def test_other_customers_cannot_retrieve(self):
+        self.client.force_authenticate(User.objects.create(username="other"))
+        response = self.client.get(f"/api/orders/api/orders/{self.order.pk}/")
+        self.assertEqual(response.status_code, 404)
+
+
+class BulkOrderStatusTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create(username="kitchen", is_staff=True)
+        self.pending = Order.objects.create(customer=self.staff)
+        self.processing = Order.objects.create(customer=self.staff, order_status="Processing")
+        self.delivered = Order.objects.create(customer=self.staff, order_status="Delivered")
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        self.url = "/api/orders/api/orders/bulk-status/"
+
+    def test_reports_per_order_outcomes(self):
+        ids = [self.pending.pk, self.processing.pk, self.delivered.pk, 9999]
+        response = self.client.post(self.url, {"order_ids": ids, "new_status": "Processing"}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["updated"], 1)
+        self.assertEqual(
+            [r["result"] for r in response.data["results"]],
+            ["updated", "unchanged", "invalid_transition", "not_found"],
+        )
+        self.pending.refresh_from_db()
+        self.delivered.refresh_from_db()
+        self.assertEqual(self.pending.order_status, "Processing")
+        self.assertEqual(self.delivered.order_status, "Delivered")
+
+    def test_delivered_orders_cannot_go_back_to_pending(self):
+        response = self.client.post(
+            self.url, {"order_ids": [self.delivered.pk], "new_status": "Pending"}, format="json"
+        )
+        self.assertEqual(response.data["results"][0]["result"], "invalid_transition")
+
+    def test_rollups_follow_bulk_moves(self):
+        self.client.post(self.url, {"order_ids": [self.pending.pk], "new_status": "Cancelled"}, format="json")
+        today = self.pending.created_at.date()
+        (day,) = get_sales_totals(today, today + timedelta(days=1))
+        self.assertEqual(day["order_count"], 3)
+        self.assertEqual(
+            SalesRollup.objects.get(granularity="day", order_status="Cancelled").order_count, 1
+        )
+        self.assertEqual(
+            SalesRollup.objects.get(granularity="day", order_status="Pending").order_count, 0
+        )
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(User.objects.create(username="diner"))
+        response = self.client.post(self.url, {"order_ids": [self.pending.pk], "new_status": "Delivered"}, format="json")
+        self.assertEqual(response.status_code, 403)
+
+    def test_single_update_endpoint_enforces_transitions(self):
+        response = self.client.post(
+            "/api/orders/update-status/",
+            {"order_id": self.delivered.pk, "new_status": "Pending"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class OrderStatusEventTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="diner")
+        self.order = Order.objects.create(customer=self.user)
+
+    def test_status_changes_are_logged(self):
+        self.order.order_status = "Processing"
+        self.order.save(update_fields=["order_status"])
+        self.order.save(update_fields=["order_status"])  # no change, no event
+        bulk_update_order_status([self.order.pk], "Delivered")
+
+        self.assertEqual(
+            list(self.order.status_events.values_list("from_status", "to_status")),
+            [("Pending", "Processing"), ("Processing", "Delivered")],
+        )
+
+    async def test_subscribers_resume_and_receive_new_events(self):
+        from asgiref.sync import sync_to_async
+        from .events import OrderEventBroker
+
+        first = await sync_to_async(update_order_status)(self.order.pk, "Processing")
+        self.assertTrue(first["success"])
+
+        stream = OrderEventBroker(poll_interval=0.05).subscribe(self.order.pk, last_event_id=0)
+        replayed = await asyncio.wait_for(anext(stream), timeout=2)
+        self.assertEqual(replayed.to_status, "Processing")
+
+        await sync_to_async(update_order_status)(self.order.pk, "Delivered")
+        pushed = await asyncio.wait_for(anext(stream), timeout=2)
+        self.assertEqual(pushed.to_status, "Delivered")
+        self.assertGreater(pushed.id, replayed.id)
+        await stream.aclose()
+
+    async def test_stream_endpoint_sends_snapshot_then_changes(self):
+        from asgiref.sync import sync_to_async
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(f"/api/orders/{self.order.pk}/status/stream/")
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b"retry: 3000\n\n")
+        self.assertIn(b'"status": "Pending"', await anext(chunks))
+
+        await sync_to_async(update_order_status)(self.order.pk, "Cancelled")
+        event = await asyncio.wait_for(anext(chunks), timeout=5)
+        self.assertIn(b"event: status", event)
+        self.assertIn(b'"status": "Cancelled"', event)
+
+
+class KitchenQueueTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="diner")
+        category = MenuCategory.objects.create(name="Mains")
+        self.pizza = MenuItem.objects.create(name="Pizza", price=Decimal("200.00"), category=category)
+        self.first = Order.objects.create(customer=self.user)
+        OrderItem.objects.create(order=self.first, menu_item=self.pizza, quantity=2)
+        Order.objects.create(customer=self.user, order_status="Delivered")
+        self.queue = KitchenQueue(sync_interval=0, resync_interval=3600)
+
+    def test_builds_once_then_applies_changes_incrementally(self):
+        (ticket,) = self.queue.snapshot()
+        self.assertEqual(ticket["id"], self.first.pk)
+        self.assertEqual(ticket["items"], [{"name": "Pizza", "quantity": 2}])
+
+        second = Order.objects.create(customer=self.user)
+        OrderItem.objects.create(order=second, menu_item=self.pizza, quantity=1)
+        update_order_status(self.first.pk, "Processing")
+
+        with self.assertNumQueries(3):
+            tickets = self.queue.snapshot()
+        self.assertEqual([(t["id"], t["status"]) for t in tickets], [(self.first.pk, "Processing"), (second.pk, "Pending")])
+
+        update_order_status(self.first.pk, "Delivered")
+        self.assertEqual([t["id"] for t in self.queue.snapshot()], [second.pk])
+
+    def test_resync_repairs_drift(self):
+        self.queue.snapshot()
+        Order.objects.filter(pk=self.first.pk).update(order_status="Cancelled")  # bypasses the event log
+        self.queue.resync()
+        self.assertEqual(self.queue.snapshot(), [])
+
+    def test_api_is_staff_only(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.get("/api/orders/kitchen/queue/").status_code, 403)
+
+        client.force_authenticate(User.objects.create(username="chef", is_staff=True))
+        response = client.get("/api/orders/kitchen/queue/?status=Pending")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 1)
+
+
+class CouponIndexTest(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        Coupon.objects.create(code="SAVE10", discount=Decimal("10.00"))
+        Coupon.objects.create(code="OLD5", discount=Decimal("5.00"), valid_to=now - timedelta(days=1))
+        Coupon.objects.create(code="OFF20", discount=Decimal("20.00"), is_active=False)
+        coupon_index.invalidate()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username="diner"))
+
+    def test_hot_path_needs_no_queries_once_loaded(self):
+        coupon_index.get("warmup")
+        with self.assertNumQueries(0):
+            self.assertEqual(calculate_discount(Decimal("200.00"), coupon=" save10 "), Decimal("20.00"))
+            self.assertEqual(coupon_index.validate("old5")[1], "This coupon has expired.")
+
+    def test_long_expired_codes_are_still_reported_as_expired(self):
+        Coupon.objects.create(code="Ancient", discount=Decimal("5.00"), valid_to=timezone.now() - timedelta(days=90))
+        coupon_index.invalidate()
+        self.assertIsNone(coupon_index.get("ANCIENT"))
+        self.assertEqual(coupon_index.validate("ancient")[1], "This coupon has expired.")
+        with self.assertNumQueries(1):
+            results = coupon_index.validate_many(["ancient", "nope", "save10"])
+        self.assertEqual(
+            {code: error for code, (_, error) in results.items()},
+            {"ancient": "This coupon has expired.", "nope": "Invalid coupon code.", "save10": None},
+        )
+
+    def test_saves_invalidate_the_index(self):
+        coupon_index.get("warmup")
+        Coupon.objects.filter(code="SAVE10").first().delete()
+        self.assertIsNone(coupon_index.get("SAVE10"))
+
+    def test_single_and_batch_endpoints(self):
+        response = self.client.post("/api/orders/api/coupon/validate/", {"code": "off20"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["detail"], "This coupon is no longer active.")
+
+        response = self.client.post(
+            "/api/orders/api/coupon/validate/batch/",
+            {"codes": ["SAVE10", "OLD5", "NOPE"]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r["valid"] for r in response.data["results"]], [True, False, False])
+        self.assertEqual(response.data["results"][2]["detail"], "Invalid coupon code.")
+
+
+class PricingEngineTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="pricer", password="pass")
+        category = MenuCategory.objects.create(name="Mains")
+        # 12.5% off 99.99 -> 87.49125, rounded half up to 87.49
+        self.dosa = MenuItem.objects.create(
+            name="Dosa", price=Decimal("99.99"), discount_percentage=Decimal("12.50"), category=category
+        )
+        self.tea = MenuItem.objects.create(name="Tea", price=Decimal("0.10"), category=category)
+
+    def test_quote_is_exact_in_paise(self):
+        # 0.10 * 3 is not exact in binary floating point
+        result = quote([(10, 3), (9999, 1, 1250)], coupon_bp=to_basis_points("10"))
+        self.assertEqual(result.line_totals, [30, 8749])
+        self.assertEqual(result.subtotal, 8779)
+        self.assertEqual(result.coupon_discount, 878)
+        self.assertEqual(result.total, 7901)
+
+    def test_quote_many_prices_each_basket_like_quote(self):
+        baskets = [[(10, 3), (9999, 1, 1250)], [(9999, 2, 5000)], []]
+        quotes = quote_many(baskets, [1000, 0, 2500])
+        self.assertEqual(quotes, [quote(baskets[0], 1000), quote(baskets[1]), quote([], 2500)])
+        self.assertEqual(quotes[1].line_totals, [9998])  # 50% of 99.99 rounds up to 50.00 off, leaving 49.99
+
+    def test_menu_cart_and_order_agree(self):
+        self.assertEqual(self.dosa.get_final_price(), Decimal("87.49"))
+
+        cart = Cart.objects.get(user=self.user)
+        CartItem.objects.create(cart=cart, menu_item=self.dosa, quantity=3)
+        CartItem.objects.create(cart=cart, menu_item=self.tea, quantity=3)
+        self.assertEqual(cart.total_price, Decimal("262.77"))
+
+        order = Order.objects.create(customer=self.user, order_status="Pending")
+        OrderItem.objects.create(order=order, menu_item=self.dosa, quantity=3)
+        OrderItem.objects.create(order=order, menu_item=self.tea, quantity=3)
+        order.refresh_from_db()
+        self.assertEqual(order.total_amount, Decimal("262.77"))
+        self.assertEqual(order.calculate_total(), Decimal("262.77"))
+
+    def test_discount_and_order_total_helpers_return_decimals(self):
+        coupon = Coupon.objects.create(code="TENOFF", discount=Decimal("10.00"))
+        self.assertEqual(calculate_discount(Decimal("0.05"), coupon), Decimal("0.01"))
+        self.assertEqual(
+            calculate_order_total([{"price": 0.1, "quantity": 3}, {"price": Decimal("0.20"), "quantity": 1}]),
+            Decimal("0.50"),
+        )
+
+
+class CartCounterTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="shopper", password="pass")
+        category = MenuCategory.objects.create(name="Mains")
+        self.pizza = MenuItem.objects.create(name="Pizza", price=Decimal("200.00"), category=category)
+        self.cart = Cart.objects.get(user=self.user)
+
+    def test_counters_follow_item_writes(self):
+        item = CartItem.objects.create(cart=self.cart, menu_item=self.pizza, quantity=2)
+        item.quantity = 5
+        item.save()
+        self.cart.refresh_from_db()
+        self.assertEqual((self.cart.item_count, self.cart.total_amount), (5, Decimal("1000.00")))
+
+        CartItem.objects.get(pk=item.pk).delete()
+        self.cart.refresh_from_db()
+        self.assertEqual((self.cart.item_count, self.cart.total_amount), (0, Decimal("0.00")))
+
+    def test_queryset_delete_updates_counters(self):
+        CartItem.objects.create(cart=self.cart, menu_item=self.pizza, quantity=2)
+        CartItem.objects.filter(cart=self.cart).delete()
+        self.cart.refresh_from_db()
+        self.assertEqual((self.cart.item_count, self.cart.total_amount), (0, Decimal("0.00")))
+
+    def test_menu_price_change_reprices_carts(self):
+        CartItem.objects.create(cart=self.cart, menu_item=self.pizza, quantity=2)
+        self.pizza.price = Decimal("150.00")
+        self.pizza.save()
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.total_amount, Decimal("300.00"))
+
+    def test_context_processor_reads_without_writes(self):
+        CartItem.objects.create(cart=self.cart, menu_item=self.pizza, quantity=3)
+        request = RequestFactory().get("/")
+        request.user = self.user
+        with self.assertNumQueries(1):
+            self.assertEqual(cart_item_count(request), {"cart_item_count": 3})
+
+        self.cart.delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(cart_item_count(request), {"cart_item_count": 0})
+        self.assertFalse(Cart.objects.filter(user=self.user).exists())
+
+
+class CartMutationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="syncer", password="pass")
+        category = MenuCategory.objects.create(name="Mains")
+        self.pizza = MenuItem.objects.create(name="Pizza", price=Decimal("200.00"), category=category)
+        self.burger = MenuItem.objects.create(name="Burger", price=Decimal("100.00"), category=category)
+        self.cart = Cart.objects.get(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_add_item_increments_in_place(self):
+        cart_ops.add_item(self.cart, self.pizza)
+        cart_ops.add_item(self.cart, self.pizza, quantity=2)
+        self.assertEqual(CartItem.objects.get(cart=self.cart, menu_item=self.pizza).quantity, 3)
+        self.cart.refresh_from_db()
+        self.assertEqual((self.cart.item_count, self.cart.total_amount), (3, Decimal("600.00")))
+
+    def test_bulk_endpoint_sets_quantities_in_one_request(self):
+        cart_ops.add_item(self.cart, self.pizza)
+        response = self.client.post(
+            "/api/orders/api/cart/bulk/",
+            {"items": [{"menu_item": self.pizza.pk, "quantity": 0}, {"menu_item": self.burger.pk, "quantity": 4}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["item_count"], 4)
+        self.assertEqual(response.data["total_amount"], "400.00")
+        self.assertEqual([item["menu_item"] for item in response.data["items"]], [self.burger.pk])
+
+    def test_bulk_replace_removes_unlisted_items(self):
+        cart_ops.add_item(self.cart, self.pizza)
+        cart_ops.set_quantities(self.cart, {self.burger.pk: 2}, replace=True)
+        self.assertEqual(list(self.cart.items.values_list("menu_item_id", "quantity")), [(self.burger.pk, 2)])
+        self.cart.refresh_from_db()
+        self.assertEqual((self.cart.item_count, self.cart.total_amount), (2, Decimal("200.00")))
+
+    def test_bulk_endpoint_rejects_unknown_items(self):
+        response = self.client.post(
+            "/api/orders/api/cart/bulk/", {"items": [{"menu_item": 9999, "quantity": 1}]}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.cart.items.exists())
+
+
+class CheckoutTest(TestCase):
+    url = "/api/orders/api/orders/checkout/"
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="buyer", password="pass")
+        self.category = MenuCategory.objects.create(name="Mains")
+        self.pizza = MenuItem.objects.create(name="Pizza", price=Decimal("200.00"), category=self.category)
+        self.cart = Cart.objects.get(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _fill_cart(self, size):
+        dishes = MenuItem.objects.bulk_create(
+            [MenuItem(name=f"Dish {i}", price=Decimal("10.00"), category=self.category) for i in range(size)]
+        )
+        cart_ops.set_quantities(self.cart, {dish.pk: 2 for dish in dishes})
+
+    def test_checkout_creates_order_and_clears_cart(self):
+        Coupon.objects.create(code="SAVE10", discount=Decimal("10.00"))
+        cart_ops.add_item(self.cart, self.pizza, quantity=3)
+
+        response = self.client.post(self.url, {"coupon_code": "save10"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["total_amount"], "540.00")
+        self.assertEqual(response.data["order_items"][0]["quantity"], 3)
+
+        order = Order.objects.get(pk=response.data["id"])
+        self.assertEqual(order.calculate_total(coupon="SAVE10"), Decimal("540.00"))
+        self.cart.refresh_from_db()
+        self.assertEqual((self.cart.item_count, self.cart.items.count()), (0, 0))
+
+    def test_coupon_discount_survives_recalculation_and_item_changes(self):
+        Coupon.objects.create(code="SAVE10", discount=Decimal("10.00"))
+        cart_ops.add_item(self.cart, self.pizza, quantity=3)
+        order = cart_ops.checkout(self.cart, coupon=coupon_index.get("SAVE10"))
+        self.assertEqual((order.coupon_code, order.coupon_discount), ("SAVE10", Decimal("10.00")))
+        self.assertEqual(order.recalculate_total(), Decimal("540.00"))
+
+        item = OrderItem.objects.create(order=order, menu_item=self.pizza, quantity=1)
+        self.assertEqual(item.order.total_amount, Decimal("720.00"))
+        order.refresh_from_db()
+        self.assertEqual(order.total_amount, Decimal("720.00"))
+        self.assertEqual(get_daily_sales_total(timezone.localdate(order.created_at)), 720.0)
+        self.assertEqual(order.calculate_total(apply_coupon=False), Decimal("800.00"))
+
+    def test_query_count_does_not_grow_with_cart_size(self):
+        # Warm up so both measured checkouts hit existing sales rollup rows
+        self._fill_cart(1)
+        self.client.post(self.url, {}, format="json")
+
+        self._fill_cart(2)
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.client.post(self.url, {}, format="json").status_code, 201)
+        self._fill_cart(25)
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(self.client.post(self.url, {}, format="json").status_code, 201)
+        self.assertEqual(len(small), len(large))
+
+    def test_empty_cart_is_rejected(self):
+        response = self.client.post(self.url, {}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+
+class IdempotencyKeyTest(TestCase):
+    url = "/api/orders/api/orders/"
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="retrier", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_retry_replays_first_response(self):
+        first = self.client.post(self.url, {"order_status": "Pending"}, format="json", HTTP_IDEMPOTENCY_KEY="abc")
+        self.assertEqual(first.status_code, 201)
+        with self.assertNumQueries(1):
+            retry = self.client.post(self.url, {"order_status": "Pending"}, format="json", HTTP_IDEMPOTENCY_KEY="abc")
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.filter(customer=self.user).count(), 1)
+
+    def test_reused_key_with_different_body_is_rejected(self):
+        self.client.post(self.url, {"order_status": "Pending"}, format="json", HTTP_IDEMPOTENCY_KEY="abc")
+        response = self.client.post(self.url, {"order_status": "Processing"}, format="json", HTTP_IDEMPOTENCY_KEY="abc")
+        self.assertEqual(response.status_code, 422)
+
+    def test_expired_key_runs_again(self):
+        self.client.post(self.url, {"order_status": "Pending"}, format="json", HTTP_IDEMPOTENCY_KEY="abc")
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        response = self.client.post(self.url, {"order_status": "Pending"}, format="json", HTTP_IDEMPOTENCY_KEY="abc")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Order.objects.filter(customer=self.user).count(), 2)
+
+    @override_settings(IDEMPOTENCY_WAIT_SECONDS=0.1)
+    def test_duplicate_of_in_flight_request_is_not_executed(self):
+        # The first request claimed the key but has not stored a response yet
+        request = Request(APIRequestFactory().post(self.url, {"order_status": "Pending"}, format="json"), parsers=[JSONParser()])
+        IdempotencyKey.objects.create(
+            user=self.user,
+            key="abc",
+            request_fingerprint=_fingerprint(request),
+            expires_at=timezone.now() + timedelta(minutes=5),
+        )
+        response = self.client.post(self.url, {"order_status": "Pending"}, format="json", HTTP_IDEMPOTENCY_KEY="abc")
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Order.objects.exists())
+
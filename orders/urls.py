@@ -5,10 +5,14 @@ from .views import (
     add_to_cart,
     update_cart,
     remove_from_cart,
+    CartBulkUpdateView,
     CouponValidationView,
+    CouponBatchValidationView,
     OrderViewSet,
     UpdateOrderStatusAPIView,
+    KitchenQueueView,
     get_order_status,
+    order_status_stream,
 )
 
 # DRF Router for Orders API
@@ -28,7 +32,11 @@ urlpatterns = [
     # API Routes (Orders & Coupons)
     # ==========================
     path("api/", include(router.urls)),
+    path("api/cart/bulk/", CartBulkUpdateView.as_view(), name="cart-bulk-update"),
     path("api/coupon/validate/", CouponValidationView.as_view(), name="coupon-validate"),
+    path("api/coupon/validate/batch/", CouponBatchValidationView.as_view(), name="coupon-validate-batch"),
     path("update-status/",UpdateOrderStatusAPIView.as_view(), name="update_order_status_api"),
+    path("kitchen/queue/", KitchenQueueView.as_view(), name="kitchen-queue"),
     path("<int:order_id>/status/", get_order_status, name="get_order_status"),
+    path("<int:order_id>/status/stream/", order_status_stream, name="order_status_stream"),
 ]
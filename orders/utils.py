@@ -1,43 +1,374 @@
 # orders/utils.py
-import string , secrets, logging
-from datetime import date
+import string , secrets, logging, os, threading, time
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from django.db.models import Sum
-from django.core.exceptions import ObjectDoesNotExist
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django.db.models import F, Sum
+from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
+from utils.pricing import from_minor, percentage_of, price_lines, to_basis_points, to_minor
 
 # Coupon code utility
 def generate_coupon_code(length: int = 10) -> str:
+    return next(generate_coupon_code_batches(1, length=length))[0]
+
+def generate_coupon_code_batches(count: int, length: int = 10, batch_size: int = 5000):
+    """
+    Yield lists of new, unused coupon codes totalling `count` codes.
+
+    Codes are generated in memory and checked against existing coupons with
+    one `code__in` query per batch, instead of one `exists()` per code.
+    """
     from .models import Coupon  # lazy import
 
     alphabet = string.ascii_uppercase + string.digits
-    while True:
-        code = "".join(secrets.choice(alphabet) for _ in range(length))
-        if not Coupon.objects.filter(code=code).exists():
-            return code
+    remaining = count
+    while remaining > 0:
+        size = min(batch_size, remaining)
+        codes = set()
+        while len(codes) < size:
+            candidates = {
+                "".join(secrets.choice(alphabet) for _ in range(length))
+                for _ in range(size - len(codes))
+            } - codes
+            taken = set(Coupon.objects.filter(code__in=candidates).values_list("code", flat=True))
+            codes |= candidates - taken
+        remaining -= size
+        yield list(codes)
+
+def create_coupon_campaign(count: int, discount, valid_from=None, valid_to=None,
+                           length: int = 10, batch_size: int = 5000):
+    """
+    Create `count` coupons sharing the same discount and validity window.
+
+    Yields each batch of created Coupon instances as soon as it has been
+    inserted with bulk_create, so callers can stream codes out without
+    holding the whole campaign in memory.
+    """
+    from .coupons import coupon_index
+    from .models import Coupon  # lazy import
+
+    valid_from = valid_from or timezone.now()
+    for codes in generate_coupon_code_batches(count, length=length, batch_size=batch_size):
+        while True:
+            coupons = [
+                Coupon(code=code, discount=discount, valid_from=valid_from, valid_to=valid_to)
+                for code in codes
+            ]
+            try:
+                with transaction.atomic():
+                    Coupon.objects.bulk_create(coupons)
+                break
+            except IntegrityError:
+                # Another writer claimed one of our codes in the meantime: re-draw it
+                size = len(codes)
+                taken = set(Coupon.objects.filter(code__in=codes).values_list("code", flat=True))
+                codes = [code for code in codes if code not in taken]
+                while len(codes) < size:
+                    fresh = next(generate_coupon_code_batches(size - len(codes), length=length))
+                    codes = list(dict.fromkeys(codes + fresh))
+        # bulk_create skips the Coupon signals, so refresh the index ourselves
+        coupon_index.invalidate()
+        transaction.on_commit(coupon_index.invalidate)
+        yield coupons
+
+# ==========================
+# Order ID allocation
+# ==========================
+
+class OrderIdAllocator:
+    """
+    Base class for pluggable `Order.custom_order_id` allocators.
+    Select one with the ORDER_ID_ALLOCATOR setting (dotted path).
+    """
+
+    def allocate(self) -> str:
+        raise NotImplementedError
+
+    def allocate_many(self, count: int) -> list:
+        return [self.allocate() for _ in range(count)]
+
+
+class TimeOrderedOrderIdAllocator(OrderIdAllocator):
+    """
+    Roughly time-ordered 12-character IDs with no DB lookup.
+
+    Each ID packs 60 bits, Crockford base32 encoded (fixed width, so IDs sort
+    lexicographically in creation order):
+        - 41 bits: milliseconds since EPOCH_MS (good for ~69 years)
+        - 9 bits: node ID (0-511)
+        - 10 bits: per-millisecond sequence (1024 IDs/ms per node)
+
+    IDs are collision-free between processes with distinct node IDs. Set
+    ORDER_ID_NODE per worker process to guarantee that; when it is unset each
+    process draws its own node from its PID and random bits, so two processes
+    share a node only by chance, and the rare duplicate ID is caught by the
+    unique column and re-allocated (see ORDER_ID_ATTEMPTS).
+    """
+    ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+    EPOCH_MS = 1735689600000  # 2025-01-01T00:00:00Z
+    NODE_BITS = 9
+    SEQUENCE_BITS = 10
+    LENGTH = 12
+
+    def __init__(self, node_id: int = None):
+        """
+        Args:
+            node_id (int): This worker's node ID; defaults to ORDER_ID_NODE.
+
+        Raises:
+            ImproperlyConfigured: If the node ID is not an integer in 0-511.
+        """
+        if node_id is None:
+            node_id = getattr(settings, "ORDER_ID_NODE", None)
+        if node_id in (None, ""):
+            # Per process, so pre-forked workers sharing the settings still differ
+            node_id = (os.getpid() ^ secrets.randbits(self.NODE_BITS)) % (1 << self.NODE_BITS)
+        try:
+            node_id = int(node_id)
+        except (TypeError, ValueError):
+            node_id = -1
+        if not 0 <= node_id < (1 << self.NODE_BITS):
+            raise ImproperlyConfigured(f"ORDER_ID_NODE must be an integer from 0 to {(1 << self.NODE_BITS) - 1}.")
+        self.node_id = node_id
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _next_value(self) -> int:
+        with self._lock:
+            now_ms = max(int(time.time() * 1000) - self.EPOCH_MS, self._last_ms)
+            if now_ms == self._last_ms:
+                self._sequence = (self._sequence + 1) & ((1 << self.SEQUENCE_BITS) - 1)
+                if self._sequence == 0:
+                    # Sequence exhausted for this millisecond: borrow the next one
+                    now_ms += 1
+            else:
+                self._sequence = 0
+            self._last_ms = now_ms
+            return (
+                (now_ms << (self.NODE_BITS + self.SEQUENCE_BITS))
+                | (self.node_id << self.SEQUENCE_BITS)
+                | self._sequence
+            )
+
+    def encode(self, value: int) -> str:
+        chars = []
+        for _ in range(self.LENGTH):
+            value, index = divmod(value, 32)
+            chars.append(self.ALPHABET[index])
+        return "".join(reversed(chars))
+
+    def allocate(self) -> str:
+        return self.encode(self._next_value())
+
+
+class RandomOrderIdAllocator(OrderIdAllocator):
+    """
+    Legacy allocator: random IDs verified against the database.
+    Costs at least one query per ID; kept for deployments that prefer it.
+    """
+
+    def __init__(self, length: int = 8):
+        self.length = length
+
+    def _candidates(self, count: int) -> set:
+        characters = string.ascii_uppercase + string.digits
+        return {"".join(secrets.choice(characters) for _ in range(self.length)) for _ in range(count)}
+
+    def allocate(self) -> str:
+        return self.allocate_many(1)[0]
+
+    def allocate_many(self, count: int) -> list:
+        from .models import Order  # lazy import
+
+        ids = set()
+        while len(ids) < count:
+            candidates = self._candidates(count - len(ids)) - ids
+            taken = set(
+                Order.objects.filter(custom_order_id__in=candidates)
+                .values_list("custom_order_id", flat=True)
+            )
+            ids |= candidates - taken
+        return list(ids)
+
+
+_order_id_allocator = None
+
+# Inserts retried with fresh IDs when an allocated ID turns out to be taken
+ORDER_ID_ATTEMPTS = 3
+
+def get_order_id_allocator() -> OrderIdAllocator:
+    """Return the process-wide allocator configured by ORDER_ID_ALLOCATOR."""
+    global _order_id_allocator
+    # A forked worker builds its own, so it doesn't reuse its parent's node
+    if _order_id_allocator is None or getattr(_order_id_allocator, "pid", os.getpid()) != os.getpid():
+        path = getattr(settings, "ORDER_ID_ALLOCATOR", "orders.utils.TimeOrderedOrderIdAllocator")
+        _order_id_allocator = import_string(path)()
+    return _order_id_allocator
 
 # Unique order id utility
-def generate_unique_order_id(length: int = 8) -> str:
-    from .models import Order  # lazy import
+def generate_unique_order_id() -> str:
+    return get_order_id_allocator().allocate()
 
-    characters = string.ascii_uppercase + string.digits
-    while True:
-        order_id = "".join(secrets.choice(characters) for _ in range(length))
-        if not Order.objects.filter(custom_order_id=order_id).exists():
-            return order_id
+def generate_unique_order_ids(count: int) -> list:
+    """Allocate `count` order IDs in one call (ascending for time-ordered allocators)."""
+    return get_order_id_allocator().allocate_many(count)
+
+# ==========================
+# Sales rollups
+# ==========================
+
+def _rollup_buckets(moment):
+    """Return the (granularity, period_start) buckets an order timestamp falls in."""
+    from .models import SalesRollup  # lazy import
+
+    hour = timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+    return ((SalesRollup.HOUR, hour), (SalesRollup.DAY, hour.replace(hour=0)))
+
+def _bump_rollup(granularity, period_start, order_status, order_count, revenue):
+    from .models import SalesRollup  # lazy import
+
+    lookup = {"granularity": granularity, "period_start": period_start, "order_status": order_status}
+    changes = {"order_count": F("order_count") + order_count, "revenue": F("revenue") + revenue}
+    if SalesRollup.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            SalesRollup.objects.create(**lookup, order_count=order_count, revenue=revenue)
+    except IntegrityError:
+        # A concurrent writer created the bucket first
+        SalesRollup.objects.filter(**lookup).update(**changes)
+
+def record_sales(created_at, order_status: str, order_count: int = 0, revenue=Decimal("0.00")) -> None:
+    """
+    Apply an incremental change to the hourly and daily sales rollups of the
+    order created at `created_at` with status `order_status`.
+    """
+    if not order_count and not revenue:
+        return
+    for granularity, period_start in _rollup_buckets(created_at):
+        _bump_rollup(granularity, period_start, order_status, order_count, revenue)
+
+def _bump_rollups(changes) -> None:
+    """Apply (created_at, order_status, count, revenue) changes with one upsert per bucket."""
+    buckets = {}
+    for created_at, order_status, order_count, revenue in changes:
+        for granularity, period_start in _rollup_buckets(created_at):
+            key = (granularity, period_start, order_status)
+            count, total = buckets.get(key, (0, Decimal("0.00")))
+            buckets[key] = (count + order_count, total + revenue)
+    for (granularity, period_start, order_status), (count, revenue) in buckets.items():
+        if count or revenue:
+            _bump_rollup(granularity, period_start, order_status, count, revenue)
+
+def record_sales_bulk(orders) -> None:
+    """Add many newly created orders to the rollups with one upsert per bucket."""
+    _bump_rollups((order.created_at, order.order_status, 1, order.total_amount) for order in orders)
+
+def record_status_changes(orders, new_status: str) -> None:
+    """Move many orders (with their previous `order_status`) to `new_status` in the rollups."""
+    changes = []
+    for order in orders:
+        changes.append((order.created_at, order.order_status, -1, -order.total_amount))
+        changes.append((order.created_at, new_status, 1, order.total_amount))
+    _bump_rollups(changes)
+
+def rebuild_sales_rollups(start: date = None, end: date = None) -> int:
+    """
+    Recompute the rollups from the Order table for whole days in [start, end).
+    Missing bounds mean "from the first order" / "through the last order".
+
+    Returns:
+        int: Number of rollup rows written.
+    """
+    from django.db.models import Count
+    from django.db.models.functions import TruncDay, TruncHour
+    from .models import Order, SalesRollup  # lazy import
+
+    orders = Order.objects.all()
+    rollups = SalesRollup.objects.all()
+    if start:
+        start_at = timezone.make_aware(datetime.combine(start, datetime.min.time()))
+        orders = orders.filter(created_at__gte=start_at)
+        rollups = rollups.filter(period_start__gte=start_at)
+    if end:
+        end_at = timezone.make_aware(datetime.combine(end, datetime.min.time()))
+        orders = orders.filter(created_at__lt=end_at)
+        rollups = rollups.filter(period_start__lt=end_at)
+
+    rows = []
+    for granularity, trunc in ((SalesRollup.HOUR, TruncHour), (SalesRollup.DAY, TruncDay)):
+        aggregates = (
+            orders.annotate(period=trunc("created_at"))
+            .values("period", "order_status")
+            .annotate(order_count=Count("id"), revenue=Sum("total_amount"))
+            .order_by()
+        )
+        rows.extend(
+            SalesRollup(
+                granularity=granularity,
+                period_start=row["period"],
+                order_status=row["order_status"],
+                order_count=row["order_count"],
+                revenue=row["revenue"] or Decimal("0.00"),
+            )
+            for row in aggregates
+        )
+
+    with transaction.atomic():
+        rollups.delete()
+        SalesRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+def get_sales_totals(start: date, end: date, granularity: str = "day") -> list:
+    """
+    Return per-period sales for [start, end) read from the rollups in one query.
+
+    Args:
+        start, end: Dates (or aware datetimes) bounding the range.
+        granularity: "hour" or "day".
+
+    Returns:
+        list of dicts: {"period_start", "order_count", "gross_revenue", "revenue_by_status"}
+    """
+    from .models import SalesRollup  # lazy import
+
+    if granularity not in dict(SalesRollup.GRANULARITY_CHOICES):
+        raise ValueError("granularity must be 'hour' or 'day'.")
+
+    def as_datetime(value):
+        if isinstance(value, datetime):
+            return value
+        return timezone.make_aware(datetime.combine(value, datetime.min.time()))
+
+    periods = {}
+    for rollup in SalesRollup.objects.filter(
+        granularity=granularity,
+        period_start__gte=as_datetime(start),
+        period_start__lt=as_datetime(end),
+    ).order_by("period_start"):
+        period = periods.setdefault(rollup.period_start, {
+            "period_start": rollup.period_start,
+            "order_count": 0,
+            "gross_revenue": Decimal("0.00"),
+            "revenue_by_status": {},
+        })
+        period["order_count"] += rollup.order_count
+        period["gross_revenue"] += rollup.revenue
+        period["revenue_by_status"][rollup.order_status] = rollup.revenue
+    return list(periods.values())
 
 # Daily sales helper
 def get_daily_sales_total(target_date: date) -> float:
-    from .models import Order  # lazy import
-
     if not isinstance(target_date, date):
         raise ValueError("The 'target_date' must be a datetime.date instance.")
 
-    result = (
-        Order.objects.filter(created_at__date=target_date)
-        .aggregate(total_sum=Sum("total_amount"))
-        .get("total_sum")
-    )
-    return float(result or 0)
+    totals = get_sales_totals(target_date, target_date + timedelta(days=1), granularity="day")
+    return float(totals[0]["gross_revenue"]) if totals else 0.0
 
 # Discount utility (NEW)
 
@@ -53,8 +384,7 @@ def calculate_discount(amount: Decimal, coupon=None) -> Decimal:
     Returns:
         Decimal: Discount amount (not the final total). Returns Decimal('0.00') if no valid discount.
     """
-    from .models import Coupon  # lazy import to avoid circular imports
-    from django.utils import timezone
+    from .coupons import coupon_index  # lazy import to avoid circular imports
 
     if amount is None:
         return Decimal("0.00")
@@ -71,7 +401,7 @@ def calculate_discount(amount: Decimal, coupon=None) -> Decimal:
     if coupon is None:
         return Decimal("0.00")
     if isinstance(coupon, str):
-        coupon_obj = Coupon.objects.filter(code__iexact=coupon).first()
+        coupon_obj = coupon_index.get(coupon)
     else:
         # assume it's a Coupon instance
         coupon_obj = coupon
@@ -90,17 +420,15 @@ def calculate_discount(amount: Decimal, coupon=None) -> Decimal:
     if valid_to and valid_to < now:
         return Decimal("0.00")
 
-    # Calculate percentage discount
+    # Calculate percentage discount in paise / basis points
     try:
-        discount_pct = Decimal(coupon_obj.discount) / Decimal("100")
+        minor = to_minor(amount)
+        discount_bp = to_basis_points(coupon_obj.discount)
     except Exception:
         return Decimal("0.00")
 
-    discount_amount = (amount * discount_pct).quantize(Decimal("0.01"))
     # Cap discount to not exceed the amount
-    if discount_amount > amount:
-        return amount
-    return discount_amount
+    return from_minor(min(percentage_of(minor, discount_bp), minor))
 
 # Initialize logger for this module
 logger = logging.getLogger(__name__)
@@ -125,20 +453,81 @@ def update_order_status(order_id: int, new_status: str) -> dict:
         return {"success": False, "message": f"Order with ID {order_id} not found."}
 
     # Validate that the new status is valid
-    valid_statuses = [choice[0] for choice in Order.STATUS_CHOICES]
+    valid_statuses = Order.valid_statuses()
     if new_status not in valid_statuses:
         logger.error(f"Invalid status '{new_status}' provided for Order ID {order_id}.")
         return {"success": False, "message": f"Invalid status. Allowed values: {', '.join(valid_statuses)}"}
 
+    if not order.can_transition_to(new_status):
+        return {"success": False, "message": f"Cannot change status from '{order.order_status}' to '{new_status}'."}
+
     # Update and save the new status
     old_status = order.order_status
     order.order_status = new_status
-    order.save(update_fields=["status"])
+    order.save(update_fields=["order_status"])
 
     logger.info(f"Order ID {order_id} status changed from '{old_status}' to '{new_status}'.")
 
     return {"success": True, "message": f"Order status updated to '{new_status}'."}
 
+def bulk_update_order_status(order_ids, new_status: str) -> list:
+    """
+    Move many orders to `new_status` at once, enforcing Order.STATUS_TRANSITIONS.
+
+    The change itself is one conditional
+    `UPDATE ... WHERE id IN (...) AND order_status IN (allowed predecessors)`.
+
+    Returns:
+        list of dicts, one per requested ID, in request order:
+            {"order_id": 1, "result": "updated"}
+            {"order_id": 2, "result": "not_found"}
+            {"order_id": 3, "result": "unchanged", "current_status": "Processing"}
+            {"order_id": 4, "result": "invalid_transition", "current_status": "Delivered"}
+    """
+    from .events import broker
+    from .models import Order, OrderStatusEvent  # lazy import
+
+    if new_status not in Order.valid_statuses():
+        raise ValueError(f"Invalid status. Allowed values: {', '.join(Order.valid_statuses())}")
+
+    order_ids = list(dict.fromkeys(order_ids))
+    predecessors = Order.allowed_predecessors(new_status)
+
+    with transaction.atomic():
+        current = {
+            order.pk: order
+            for order in Order.objects.select_for_update()
+            .filter(pk__in=order_ids)
+            .only("id", "order_status", "created_at", "total_amount")
+        }
+        movable = [order for order in current.values() if order.order_status in predecessors]
+        if movable:
+            Order.objects.filter(
+                pk__in=[order.pk for order in movable],
+                order_status__in=predecessors,
+            ).update(order_status=new_status)
+            record_status_changes(movable, new_status)
+            OrderStatusEvent.objects.bulk_create([
+                OrderStatusEvent(order_id=order.pk, from_status=order.order_status, to_status=new_status)
+                for order in movable
+            ])
+            transaction.on_commit(broker.notify)
+
+    results = []
+    for order_id in order_ids:
+        order = current.get(order_id)
+        if order is None:
+            results.append({"order_id": order_id, "result": "not_found"})
+        elif order.order_status in predecessors:
+            results.append({"order_id": order_id, "result": "updated"})
+        elif order.order_status == new_status:
+            results.append({"order_id": order_id, "result": "unchanged", "current_status": order.order_status})
+        else:
+            results.append({"order_id": order_id, "result": "invalid_transition", "current_status": order.order_status})
+
+    logger.info(f"Bulk status change to '{new_status}': {len(movable)} of {len(order_ids)} orders updated.")
+    return results
+
 # orders/utils.py
 
 def calculate_order_total(order_items):
@@ -155,26 +544,21 @@ def calculate_order_total(order_items):
             ]
 
     Returns:
-        float: The total cost of all order items.
+        Decimal: The total cost of all order items, exact to the paisa.
     
     Notes:
-        - Handles empty lists gracefully (returns 0.0).
+        - Handles empty lists gracefully (returns Decimal('0.00')).
         - Ignores invalid items (missing 'price' or 'quantity').
         - Useful for cart total or order summary before saving.
     """
-
-    if not order_items:
-        return 0.0  # Return 0 if order list is empty
-
-    total = 0.0
-
-    for item in order_items:
+    lines = []
+    for item in order_items or ():
         # Safely extract price and quantity with defaults
         price = item.get("price", 0)
         quantity = item.get("quantity", 0)
 
         # Ensure valid numeric types
-        if isinstance(price, (int, float)) and isinstance(quantity, int):
-            total += price * quantity
+        if isinstance(price, (int, float, Decimal)) and not isinstance(price, bool) and isinstance(quantity, int):
+            lines.append((to_minor(price), quantity))
 
-    return round(total, 2)  # Round for clean output
+    return from_minor(sum(price_lines(lines)))
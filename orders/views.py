@@ -1,6 +1,10 @@
 # ==========================
 # Built-in & Third-Party Imports
 # ==========================
+import json
+from asgiref.sync import sync_to_async
+from django.db.models import Prefetch
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
@@ -11,9 +15,16 @@ from rest_framework.views import APIView
 # ==========================
 # Local Imports
 # ==========================
-from .models import Cart, CartItem, Order, Coupon
+from .models import Cart, CartItem, Order, OrderItem
 from products.models import MenuItem
-from .serializers import OrderSerializer,OrderStatusUpdateSerializer
+from .serializers import OrderSerializer,OrderDetailSerializer,OrderStatusUpdateSerializer,BulkOrderCreateSerializer,BulkOrderStatusUpdateSerializer,CartBulkUpdateSerializer,CartSerializer,CheckoutSerializer
+from . import cart as cart_ops
+from .utils import bulk_update_order_status
+from .events import broker, format_sse
+from .kitchen import ACTIVE_STATUSES, kitchen_queue
+from .coupons import coupon_index
+from .pagination import OrderCursorPagination
+from .idempotency import idempotent
 
 
 # ==========================
@@ -23,7 +34,7 @@ from .serializers import OrderSerializer,OrderStatusUpdateSerializer
 @login_required
 def cart_view(request):
     """Display the user's shopping cart."""
-    cart, _ = Cart.objects.get_or_create(user=request.user)
+    cart, _ = Cart.objects.prefetch_related("items__menu_item").get_or_create(user=request.user)
     return render(request, "cart.html", {"cart": cart})
 
 
@@ -32,12 +43,7 @@ def add_to_cart(request, item_id):
     """Add a menu item to the user's cart."""
     cart, _ = Cart.objects.get_or_create(user=request.user)
     item = get_object_or_404(MenuItem, id=item_id)
-
-    cart_item, created = CartItem.objects.get_or_create(cart=cart, menu_item=item)
-    if not created:
-        cart_item.quantity += 1
-    cart_item.save()
-
+    cart_ops.add_item(cart, item)
     return redirect("cart")
 
 
@@ -45,7 +51,7 @@ def add_to_cart(request, item_id):
 def update_cart(request, item_id):
     """Update the quantity of a cart item or remove it if quantity is zero."""
     cart, _ = Cart.objects.get_or_create(user=request.user)
-    cart_item = get_object_or_404(CartItem, cart=cart, menu_item_id=item_id)
+    cart_item = get_object_or_404(CartItem.objects.select_related("menu_item"), cart=cart, menu_item_id=item_id)
 
     if request.method == "POST":
         try:
@@ -53,11 +59,7 @@ def update_cart(request, item_id):
         except ValueError:
             qty = 1
 
-        if qty > 0:
-            cart_item.quantity = qty
-            cart_item.save()
-        else:
-            cart_item.delete()
+        cart_ops.set_quantities(cart, {item_id: max(qty, 0)}, menu_items={item_id: cart_item.menu_item})
 
     return redirect("cart")
 
@@ -66,11 +68,36 @@ def update_cart(request, item_id):
 def remove_from_cart(request, item_id):
     """Remove an item from the user's cart."""
     cart, _ = Cart.objects.get_or_create(user=request.user)
-    cart_item = get_object_or_404(CartItem, cart=cart, menu_item_id=item_id)
-    cart_item.delete()
+    cart_item = get_object_or_404(CartItem.objects.select_related("menu_item"), cart=cart, menu_item_id=item_id)
+    cart_ops.set_quantities(cart, {item_id: 0}, menu_items={item_id: cart_item.menu_item})
     return redirect("cart")
 
 
+class CartBulkUpdateView(APIView):
+    """
+    POST api/cart/bulk/ — set quantities for many menu items in one request
+    and one transaction. Returns the resulting cart.
+
+    Body: {"items": [{"menu_item": 1, "quantity": 2}, ...], "replace": false}
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = CartBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        cart, _ = Cart.objects.get_or_create(user=request.user)
+        cart_ops.set_quantities(
+            cart,
+            serializer.validated_data["quantities"],
+            menu_items=serializer.validated_data["menu_items"],
+            replace=serializer.validated_data["replace"],
+        )
+
+        cart = Cart.objects.prefetch_related("items__menu_item").get(pk=cart.pk)
+        return Response(CartSerializer(cart).data, status=status.HTTP_200_OK)
+
+
 # ==========================
 # API Views (Orders & Coupons)
 # ==========================
@@ -82,6 +109,7 @@ class OrderViewSet(viewsets.ModelViewSet):
     """
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OrderCursorPagination
 
     def get_queryset(self):
         """
@@ -89,18 +117,101 @@ class OrderViewSet(viewsets.ModelViewSet):
         Staff/Admins see all orders.
         """
         user = self.request.user
-        return (
-            Order.objects.all().order_by("-created_at")
+        queryset = (
+            Order.objects.all().order_by("-created_at", "-id")
             if user.is_staff
-            else Order.objects.filter(customer=user).order_by("-created_at")
+            else Order.objects.filter(customer=user).order_by("-created_at", "-id")
         )
+        if self.action == "retrieve":
+            # Order + customer in one query, items + menu items in a second
+            queryset = queryset.select_related("customer").prefetch_related(
+                Prefetch("order_items", queryset=OrderItem.objects.select_related("menu_item").order_by("id"))
+            )
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == "retrieve":
+            return OrderDetailSerializer
+        return super().get_serializer_class()
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        serializer.save(customer=self.request.user)
 
     @action(detail=False, methods=["get"], url_path="history")
     def history(self, request):
-        """Return the logged-in user's order history."""
-        orders = self.get_queryset()
-        serializer = self.get_serializer(orders, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        """Return the logged-in user's order history, one cursor page at a time."""
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    @idempotent
+    def bulk_create(self, request):
+        """
+        Ingest many orders (with their items) in a single request.
+        Example request (POST):
+            {
+                "orders": [
+                    {"items": [{"menu_item": 1, "quantity": 2}]},
+                    {"customer": 7, "items": [{"menu_item": 3, "quantity": 1}]}
+                ]
+            }
+        """
+        serializer = BulkOrderCreateSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"], url_path="checkout")
+    @idempotent
+    def checkout(self, request):
+        """
+        Turn the user's cart into a Pending order and empty the cart.
+        Send an Idempotency-Key header to make retries safe.
+        Example request (POST):
+            {"coupon_code": "SAVE10"}   # optional
+        """
+        serializer = CheckoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        cart, _ = Cart.objects.get_or_create(user=request.user)
+        try:
+            order = cart_ops.checkout(cart, coupon=serializer.validated_data.get("coupon_code"))
+        except cart_ops.CheckoutError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        order.customer = request.user
+        return Response(OrderDetailSerializer(order).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"], url_path="bulk-status", permission_classes=[permissions.IsAdminUser])
+    def bulk_status(self, request):
+        """
+        Move many orders to one status in a single conditional update.
+        Illegal transitions (e.g. Delivered -> Pending) are skipped and reported.
+        Example request (POST):
+            {
+                "order_ids": [12, 13, 14],
+                "new_status": "Processing"
+            }
+        """
+        serializer = BulkOrderStatusUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        new_status = serializer.validated_data["new_status"]
+        results = bulk_update_order_status(serializer.validated_data["order_ids"], new_status)
+
+        return Response(
+            {
+                "new_status": new_status,
+                "updated": sum(1 for r in results if r["result"] == "updated"),
+                "results": results,
+            },
+            status=status.HTTP_200_OK,
+        )
 
     @action(detail=True, methods=["delete"], url_path="cancel")
     def cancel_order(self, request, pk=None):
@@ -155,31 +266,15 @@ class CouponValidationView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        coupon = Coupon.objects.filter(code__iexact=code).first()
-        if not coupon:
+        coupon, error = coupon_index.validate(code)
+        if coupon is None:
             return Response(
-                {"detail": "Invalid coupon code."},
+                {"detail": error},
                 status=status.HTTP_404_NOT_FOUND,
             )
-
-        now = timezone.now()
-
-        # Validation checks
-        if not coupon.is_active:
+        if error:
             return Response(
-                {"detail": "This coupon is no longer active."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        if coupon.valid_from and coupon.valid_from > now:
-            return Response(
-                {"detail": "This coupon is not yet valid."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        if coupon.valid_to and coupon.valid_to < now:
-            return Response(
-                {"detail": "This coupon has expired."},
+                {"detail": error},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
@@ -198,6 +293,41 @@ class CouponValidationView(APIView):
             status=status.HTTP_200_OK,
         )
 
+class CouponBatchValidationView(APIView):
+    """
+    API endpoint to validate many coupon codes in one call.
+    Example request (POST):
+        {"codes": ["SAVE10", "WELCOME5"]}
+    """
+
+    max_codes = 500
+
+    def post(self, request, *args, **kwargs):
+        codes = request.data.get("codes")
+        if not isinstance(codes, list) or not codes:
+            return Response(
+                {"detail": "A non-empty list of coupon codes is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(codes) > self.max_codes:
+            return Response(
+                {"detail": f"At most {self.max_codes} codes can be validated at once."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = []
+        for code, (coupon, error) in coupon_index.validate_many(str(c).strip() for c in codes).items():
+            result = {"code": code, "valid": error is None}
+            if error:
+                result["detail"] = error
+            else:
+                result["discount"] = float(coupon.discount)
+                result["valid_to"] = coupon.valid_to
+            results.append(result)
+
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
 class UpdateOrderStatusAPIView(APIView):
     """
     API endpoint to update an order's status.
@@ -230,6 +360,26 @@ class UpdateOrderStatusAPIView(APIView):
             status=status.HTTP_200_OK,
         )
     
+class KitchenQueueView(APIView):
+    """
+    API endpoint for the kitchen display: active orders, oldest first.
+    Served from the in-memory kitchen queue rather than re-querying orders.
+    Example: GET /api/orders/kitchen/queue/?status=Pending
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        status_filter = request.query_params.get("status")
+        if status_filter and status_filter not in ACTIVE_STATUSES:
+            return Response(
+                {"detail": f"status must be one of: {', '.join(ACTIVE_STATUSES)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        tickets = kitchen_queue.snapshot(status=status_filter)
+        return Response({"count": len(tickets), "orders": tickets}, status=status.HTTP_200_OK)
+
+
 @api_view(["GET"])
 def get_order_status(request, order_id):
     """
@@ -250,3 +400,52 @@ def get_order_status(request, order_id):
         },
         status=status.HTTP_200_OK,
     )
+
+
+# ==========================
+# Streaming Views (ASGI)
+# ==========================
+
+async def order_status_stream(request, order_id):
+    """
+    Server-sent event stream of status changes for one order.
+
+    Sends the current status first, then one `status` event per change.
+    Reconnecting clients resume via the standard `Last-Event-ID` header
+    (or `?last_event_id=`) and receive every change they missed.
+    Serve under ASGI (restaurant_management.asgi) for long-lived connections.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    # Fresh clients get a snapshot; take the log position *before* reading it
+    # so no change between the snapshot and the subscription is lost.
+    send_snapshot = last_event_id is None
+    if send_snapshot:
+        last_event_id = await sync_to_async(broker.latest_event_id)()
+
+    order = await Order.objects.only("id", "customer_id", "order_status").filter(pk=order_id).afirst()
+    if order is None:
+        return JsonResponse({"error": f"Order with ID {order_id} not found."}, status=404)
+    if order.customer_id != user.pk and not user.is_staff:
+        return JsonResponse({"detail": "You do not have permission to view this order."}, status=403)
+
+    async def stream():
+        yield "retry: 3000\n\n"
+        if send_snapshot:
+            snapshot = {"order_id": order.id, "status": order.order_status}
+            yield f"event: snapshot\ndata: {json.dumps(snapshot)}\n\n"
+        async for event in broker.subscribe(order.id, last_event_id, heartbeat=15):
+            yield format_sse(event) if event is not None else ": keep-alive\n\n"
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # disable proxy buffering (nginx)
+    return response
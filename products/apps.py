@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'products'
+
+    def ready(self):
+        from django.core import checks
+        import products.signals
+        from products.snapshot import check_shared_cache
+
+        checks.register(check_shared_cache)
@@ -0,0 +1,20 @@
+# Creates the table of the database cache configured in settings.CACHES
+# (menu snapshots, see products.snapshot); a no-op for other cache backends.
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    call_command("createcachetable", database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_menuitem_discount_percentage'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,6 @@
 from django.db import models
 from decimal import Decimal
-from home.utils import calculate_discount  
+from utils.pricing import discounted_unit_price, from_minor, to_basis_points, to_minor
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -63,16 +63,27 @@ class MenuItem(models.Model):
             Decimal: The discounted price (if applicable).
         """
         # Ensure discount is within valid range
-        if self.discount_percentage <= 0:
+        if not self.discount_bp:
             return self.price
 
-        # Use reusable utility function to calculate discount
-        final_price = calculate_discount(
-            float(self.price),
-            float(self.discount_percentage)
+        # Use the shared fixed-point pricing engine (exact paise arithmetic)
+        return from_minor(
+            discounted_unit_price(to_minor(self.price), self.discount_bp)
         )
 
-        # Return as Decimal to stay consistent with model field type
-        return Decimal(final_price).quantize(Decimal("0.01"))
+    @property
+    def price_minor(self) -> int:
+        """Base price in minor units (paise)."""
+        return to_minor(self.price)
 
+    @property
+    def discount_bp(self) -> int:
+        """Item discount in basis points (0 when no discount applies)."""
+        # Out-of-range discounts are ignored, matching get_final_price()
+        if not self.discount_percentage or not 0 < self.discount_percentage <= 100:
+            return 0
+        return to_basis_points(self.discount_percentage)
 
+    def pricing_line(self, quantity: int) -> tuple:
+        """Return a (unit_price, quantity, discount_bp) line for utils.pricing."""
+        return (self.price_minor, quantity, self.discount_bp)
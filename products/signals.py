@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from home.models import MenuCategory
+from .models import MenuItem
+from .snapshot import bump_menu_version
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+@receiver(post_save, sender=MenuCategory)
+@receiver(post_delete, sender=MenuCategory)
+def bump_menu_snapshot_version(sender, **kwargs):
+    # After commit, so no snapshot of the new version is built from uncommitted data
+    transaction.on_commit(bump_menu_version)
@@ -0,0 +1,165 @@
+# products/snapshot.py
+"""
+Versioned menu snapshots.
+
+The menu (MenuItem + home.MenuCategory) changes a few times a day but is read
+on every page load, so reads are served from snapshots built once per menu
+version instead of being re-queried and re-serialized per request.
+
+The version lives in the cache and is bumped after every committed
+MenuItem/MenuCategory write (see products.signals). Snapshots are cached
+under keys that include the version, so a bump makes every old snapshot
+unreachable at once and nothing has to be deleted. The cache must be shared
+by every process (settings.CACHES uses the database cache, whose table
+products migration 0012 creates): with a per-process cache, a bump would
+only reach the process that made the write.
+
+Each process re-reads the version at most every MENU_VERSION_CHECK_SECONDS
+(default 2), so other processes see a menu change within that time and a
+request in between needs no cache round trip at all.
+
+JSON snapshots are stored as the exact response bytes together with a strong
+ETag (a hash of those bytes), one per scheme and host since they contain
+absolute image URLs. A client that already has them gets `304 Not Modified`,
+and any other request is a dictionary lookup and a header comparison.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from rest_framework.renderers import JSONRenderer
+
+VERSION_KEY = "menu:version"
+
+# Snapshots already fetched by this process: {versioned key: value}
+_local = {}
+# (version, time.monotonic() when it was read) as last seen by this process
+_version = (None, 0.0)
+
+
+def _read_version() -> int:
+    global _version
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from the clock so a lost version key never reuses old snapshot keys
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(VERSION_KEY)
+    _version = (version, time.monotonic())
+    return version
+
+
+def menu_version() -> int:
+    """Current menu version, re-read at most every MENU_VERSION_CHECK_SECONDS."""
+    version, read_at = _version
+    if version is None or time.monotonic() - read_at >= getattr(settings, "MENU_VERSION_CHECK_SECONDS", 2):
+        version = _read_version()
+    return version
+
+
+def bump_menu_version() -> None:
+    """Invalidate every menu snapshot (call after a committed menu write)."""
+    global _version
+    try:
+        _version = (cache.incr(VERSION_KEY), time.monotonic())
+    except ValueError:
+        _read_version()  # the key was missing; starting it afresh is a bump too
+
+
+def reset_snapshots() -> None:
+    """Forget this process's snapshots and version (e.g. after clearing the cache)."""
+    global _version
+    _local.clear()
+    _version = (None, 0.0)
+
+
+def _cached(name: str, build):
+    """The snapshot `name` for the current menu version, building it if needed."""
+    key = f"menu:snapshot:{menu_version()}:{name}"
+    value = _local.get(key)
+    if value is None:
+        value = cache.get(key)
+        if value is None:
+            value = build()
+            cache.set(key, value, getattr(settings, "MENU_SNAPSHOT_TTL", 24 * 60 * 60))
+        if len(_local) > 64:
+            _local.clear()  # old versions are never read again
+        _local[key] = value
+    return value
+
+
+def _digest(data) -> str:
+    if isinstance(data, str):
+        data = data.encode()
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def json_snapshot(request, name: str, build_data):
+    """
+    Rendered JSON snapshot for the scheme and host of `request`.
+
+    Args:
+        request: The request being served; passed on to `build_data`.
+        name (str): Cache-key-safe snapshot name.
+        build_data (callable): Takes the request and returns the data to
+            render (serializer.data, serialized with the request in context).
+
+    Returns:
+        tuple: (etag, body bytes)
+    """
+    def build():
+        body = JSONRenderer().render(build_data(request))
+        return f'"{_digest(body)}"', body
+
+    return _cached(f"{name}:{_digest(request.build_absolute_uri('/'))}", build)
+
+
+def _etag_matches(request, etag: str) -> bool:
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def snapshot_response(request, name: str, build_data) -> HttpResponse:
+    """Serve a JSON snapshot, or 304 if the client's copy is current."""
+    etag, body = json_snapshot(request, name, build_data)
+    if _etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"  # always revalidate; it's cheap
+    return response
+
+
+def category_key(category_name: str) -> str:
+    """Snapshot name for one category (matched case-insensitively)."""
+    return "category:" + _digest(category_name.strip().lower())
+
+
+def menu_items():
+    """Every menu item with its category, as of the current menu version."""
+    from .models import MenuItem  # lazy import
+
+    return _cached("items:objects", lambda: list(MenuItem.objects.select_related("category")))
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """Warn when the snapshot cache is local to each process."""
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    if backend.endswith(("LocMemCache", "DummyCache")):
+        return [
+            checks.Warning(
+                "The default cache is not shared between processes, so menu "
+                "snapshots are only invalidated in the process that changed the menu.",
+                hint="Configure a shared cache backend (database, Redis or Memcached) in CACHES.",
+                id="products.W001",
+            )
+        ]
+    return []
@@ -1,3 +1,77 @@
-from django.test import TestCase
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
 
-# Create your tests here.
+from home.models import MenuCategory
+from home.views import menu_view
+from .models import MenuItem
+from .snapshot import reset_snapshots
+from .views import MenuItemsByCategoryAPIView, MenuItemView
+
+
+class MenuSnapshotTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_snapshots()
+        self.addCleanup(cache.clear)
+        self.addCleanup(reset_snapshots)
+        self.user = User.objects.create_user("diner", password="pw")
+        self.pizza = MenuCategory.objects.create(name="Pizza")
+        MenuItem.objects.create(name="Margherita", price="300.00", category=self.pizza, image="menu/margherita.jpg")
+
+    def get(self, view, path, etag=None, **params):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        request = APIRequestFactory().get(path, params, **headers)
+        force_authenticate(request, user=self.user)
+        return view.as_view()(request)
+
+    def test_menu_served_from_snapshot_with_etag(self):
+        first = self.get(MenuItemView, "/api/products/MenuItems/")
+        self.assertEqual(first.status_code, 200)
+        self.assertIn(b"Margherita", first.content)
+        self.assertIn(b'"http://testserver/media/menu/margherita.jpg"', first.content)
+        etag = first["ETag"]
+
+        with self.assertNumQueries(0):
+            again = self.get(MenuItemView, "/api/products/MenuItems/")
+            not_modified = self.get(MenuItemView, "/api/products/MenuItems/", etag=f'W/{etag}, "other"')
+        self.assertEqual(again.content, first.content)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MenuItem.objects.create(name="Farmhouse", price="400.00", category=self.pizza)
+        changed = self.get(MenuItemView, "/api/products/MenuItems/", etag=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertIn(b"Farmhouse", changed.content)
+        self.assertNotEqual(changed["ETag"], etag)
+
+    def test_version_bumped_elsewhere_is_seen_after_the_check_interval(self):
+        etag = self.get(MenuItemView, "/api/products/MenuItems/")["ETag"]
+        MenuItem.objects.filter(name="Margherita").update(name="Marinara")  # no signal: as if another process wrote
+        cache.incr("menu:version")
+        self.assertEqual(self.get(MenuItemView, "/api/products/MenuItems/")["ETag"], etag)
+        with override_settings(MENU_VERSION_CHECK_SECONDS=0):
+            response = self.get(MenuItemView, "/api/products/MenuItems/")
+        self.assertIn(b"Marinara", response.content)
+
+    def test_category_snapshot_and_rename(self):
+        response = self.get(MenuItemsByCategoryAPIView, "/api/products/menu-items/by-category/", category=" PIZZA ")
+        self.assertIn(b"Margherita", response.content)
+        again = self.get(MenuItemsByCategoryAPIView, "/api/products/menu-items/by-category/", etag=response["ETag"], category="pizza")
+        self.assertEqual(again.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pizza.name = "Pizzas"
+            self.pizza.save()
+        response = self.get(MenuItemsByCategoryAPIView, "/api/products/menu-items/by-category/", category="pizza")
+        self.assertEqual(response.content, b"[]")
+
+    def test_menu_page_reads_the_snapshot(self):
+        request = RequestFactory().get("/menu/")
+        request.user = AnonymousUser()
+        menu_view(request)
+        with self.assertNumQueries(0):
+            response = menu_view(request)
+        self.assertContains(response, "Margherita")
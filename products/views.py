@@ -5,12 +5,16 @@ from rest_framework import status,permissions
 
 from .models import MenuItem
 from .serializers import MenuItemSerializer,MenuItemAvailabilitySerializer
+from .snapshot import category_key, snapshot_response
 # Create your views here.
 class MenuItemView(APIView):
     def get(self, request):
-        MenuItems = MenuItem.objects.all()
-        serializer = MenuItemSerializer(MenuItems, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Served from the versioned menu snapshot, with ETag/304 support
+        return snapshot_response(
+            request,
+            "items",
+            lambda request: MenuItemSerializer(MenuItem.objects.all(), many=True, context={"request": request}).data,
+        )
 
     def post(self, request):
         serializer = MenuItemSerializer(data=request.data)
@@ -47,10 +51,14 @@ class MenuItemsByCategoryAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        menu_items = MenuItem.objects.filter(category__name__iexact=category_name)
-        serializer = MenuItemSerializer(menu_items, many=True)
-
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        category_name = category_name.strip()
+        return snapshot_response(
+            request,
+            category_key(category_name),
+            lambda request: MenuItemSerializer(
+                MenuItem.objects.filter(category__name__iexact=category_name), many=True, context={"request": request}
+            ).data,
+        )
     
 class UpdateMenuItemAPIView(APIView):
     """
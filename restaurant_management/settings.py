@@ -135,6 +135,15 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+# Cache shared by every worker process (menu snapshots, see products.snapshot).
+# The table is created by products migration 0012 (`createcachetable`).
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "django_cache",
+    }
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -143,6 +152,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Restaurant Details
 RESTAURANT_NAME = "Swaadify"
 RESTAURANT_PHONE = "+91 12345 67890"
+# Timezone the opening hours are given in (see home.schedule); set it to the
+# restaurant's local zone, e.g. RESTAURANT_TIME_ZONE=Asia/Kolkata
+RESTAURANT_TIME_ZONE = os.environ.get("RESTAURANT_TIME_ZONE", TIME_ZONE)
+
+# Order ID allocation (see orders.utils.OrderIdAllocator)
+ORDER_ID_ALLOCATOR = "orders.utils.TimeOrderedOrderIdAllocator"
+# Optional node 0-511, unique per worker process; when unset each process
+# picks its own (see orders.utils.TimeOrderedOrderIdAllocator)
+ORDER_ID_NODE = os.environ.get("ORDER_ID_NODE")
 
 ALLOWED_HOSTS = ['*']  # Or your actual host/domain
 
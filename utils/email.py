@@ -1,15 +1,159 @@
 # utils/email.py
+"""
+Outgoing email.
+
+Requests never talk to SMTP directly: `queue_email` writes one OutboundEmail
+row (a single INSERT) and the `send_queued_emails` management command
+delivers the queue in batches over one reused mail connection, retrying
+failures with exponential backoff (see `deliver_queued_emails`).
+"""
 import logging
-from django.core.mail import send_mail, BadHeaderError
+import time
+from datetime import timedelta
+from django.core.mail import BadHeaderError, EmailMessage, get_connection
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+
+def queue_email(subject: str, body: str, recipient_list: list, from_email: str = None):
+    """
+    Add an email to the outbox for the background worker to deliver.
+
+    Args:
+        subject (str): The email subject line.
+        body (str): The body of the email (plain text).
+        recipient_list (list): List of recipient email addresses.
+        from_email (str, optional): Sender's email address. Defaults to settings.DEFAULT_FROM_EMAIL.
+
+    Returns:
+        OutboundEmail: The queued message.
+    """
+    from home.models import OutboundEmail  # lazy import
+
+    if "\n" in subject or "\r" in subject:
+        raise BadHeaderError("Header values can't contain newlines.")
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(recipient_list),
+    )
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    base = getattr(settings, "EMAIL_OUTBOX_BACKOFF_SECONDS", 30)
+    cap = getattr(settings, "EMAIL_OUTBOX_MAX_BACKOFF_SECONDS", 3600)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), cap))
+
+
+def _claim_batch(batch_size: int, lease: timedelta) -> list:
+    """
+    Lock and lease the next due messages so concurrent workers skip them.
+    Returns the claimed OutboundEmail rows with `attempts` already bumped.
+    """
+    from home.models import OutboundEmail  # lazy import
+
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboundEmail.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        OutboundEmail.objects.filter(pk__in=ids).update(
+            attempts=F("attempts") + 1, next_attempt_at=now + lease
+        )
+    return list(OutboundEmail.objects.filter(pk__in=ids).order_by("id"))
+
+
+def deliver_queued_emails(batch_size: int = 100, max_attempts: int = 5, connection=None) -> dict:
+    """
+    Send one batch of due outbox messages over a single mail connection.
+
+    A `connection` passed in is opened if it isn't already and left open for
+    the caller's next batch (the caller closes it); without one, a connection
+    is opened and closed for this batch. A connection that fails is closed,
+    so the next batch reconnects.
+
+    Failed messages are rescheduled with exponential backoff, and marked
+    failed once they have been tried `max_attempts` times.
+
+    Returns:
+        dict: {'claimed', 'sent', 'retried', 'failed', 'seconds'} for this batch.
+    """
+    from home.models import OutboundEmail  # lazy import
+
+    started = time.monotonic()
+    lease = timedelta(seconds=getattr(settings, "EMAIL_OUTBOX_LEASE_SECONDS", 300))
+    batch = _claim_batch(batch_size, lease)
+    metrics = {"claimed": len(batch), "sent": 0, "retried": 0, "failed": 0, "seconds": 0.0}
+    if not batch:
+        return metrics
+
+    sent_ids, unsent = [], []
+    owned = connection is None
+    connection = connection or get_connection()
+    try:
+        connection.open()  # no-op while it is already open
+        for email in batch:
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email,
+                to=email.to,
+                connection=connection,
+            )
+            try:
+                message.send()
+                sent_ids.append(email.pk)
+            except Exception as exc:
+                logger.warning("Failed to send outbound email %s: %s", email.pk, exc)
+                email.last_error = str(exc)
+                unsent.append(email)
+    except Exception as exc:
+        # Could not reach the mail server: the rest of the batch is retried
+        logger.exception("Mail connection failed while delivering the outbox")
+        done = set(sent_ids) | {email.pk for email in unsent}
+        for email in batch:
+            if email.pk not in done:
+                email.last_error = str(exc)
+                unsent.append(email)
+        connection.close()
+    finally:
+        if owned:
+            connection.close()
+
+    now = timezone.now()
+    if sent_ids:
+        OutboundEmail.objects.filter(pk__in=sent_ids).update(
+            status=OutboundEmail.SENT, sent_at=now, last_error=""
+        )
+    for email in unsent:
+        if email.attempts >= max_attempts:
+            email.status = OutboundEmail.FAILED
+            metrics["failed"] += 1
+        else:
+            email.next_attempt_at = now + _retry_delay(email.attempts)
+            metrics["retried"] += 1
+    if unsent:
+        OutboundEmail.objects.bulk_update(unsent, ["status", "next_attempt_at", "last_error"])
+
+    metrics["sent"] = len(sent_ids)
+    metrics["seconds"] = time.monotonic() - started
+    return metrics
+
 def send_order_confirmation_email(order_id: int, customer_email: str, order_details: str) -> dict:
     """
-    Sends an order confirmation email to the customer.
+    Queues an order confirmation email to the customer (see queue_email).
 
     Args:
         order_id (int): ID of the order.
@@ -33,18 +177,9 @@ def send_order_confirmation_email(order_id: int, customer_email: str, order_deta
             f"Best regards,\n"
             f"{settings.DEFAULT_FROM_EMAIL}"
         )
-        from_email = settings.DEFAULT_FROM_EMAIL
-        recipient_list = [customer_email]
-
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=from_email,
-            recipient_list=recipient_list,
-            fail_silently=False
-        )
+        queue_email(subject=subject, body=message, recipient_list=[customer_email])
 
-        return {'success': True, 'message': 'Order confirmation email sent successfully.'}
+        return {'success': True, 'message': 'Order confirmation email queued for delivery.'}
 
     except ValidationError:
         error_msg = f"Invalid email address: {customer_email}"
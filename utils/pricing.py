@@ -0,0 +1,100 @@
+# utils/pricing.py
+"""
+Fixed-point pricing engine shared by menu items, carts and orders.
+
+All arithmetic is done on integers in minor currency units (paise), with
+percentages expressed in basis points (1% == 100 bp). Amounts are converted
+from/to Decimal only at the edges, so there is no float rounding anywhere.
+
+Rounding: every percentage is applied with round-half-up to the nearest
+paisa. Item discounts are applied to the unit price before multiplying by
+quantity; coupon discounts are applied to the basket subtotal and never
+exceed it.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Iterable, List, NamedTuple, Sequence
+
+MINOR_UNITS = 100  # paise per rupee
+BASIS_POINTS = 10000  # basis points per 100%
+_CENT = Decimal("0.01")
+
+
+class Line(NamedTuple):
+    """A priced line: unit price in paise, quantity and item discount in bp."""
+    unit_price: int
+    quantity: int
+    discount_bp: int = 0
+
+
+class Quote(NamedTuple):
+    """Result of pricing a basket, all amounts in paise."""
+    subtotal: int
+    coupon_discount: int
+    total: int
+    line_totals: List[int]
+
+
+# ------------------------
+# Conversions
+# ------------------------
+def to_minor(amount) -> int:
+    """Convert a Decimal/str/int amount in rupees to integer paise (round half up)."""
+    if not isinstance(amount, Decimal):
+        amount = Decimal(str(amount))
+    return int((amount * MINOR_UNITS).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def from_minor(minor: int) -> Decimal:
+    """Convert integer paise back to a 2-decimal Decimal amount in rupees."""
+    return (Decimal(minor) / MINOR_UNITS).quantize(_CENT)
+
+
+def to_basis_points(percentage) -> int:
+    """Convert a percentage (e.g. Decimal('12.5')) to basis points (1250)."""
+    if not isinstance(percentage, Decimal):
+        percentage = Decimal(str(percentage))
+    bp = int((percentage * 100).to_integral_value(rounding=ROUND_HALF_UP))
+    if not 0 <= bp <= BASIS_POINTS:
+        raise ValueError("Discount percentage must be between 0 and 100.")
+    return bp
+
+
+# ------------------------
+# Core arithmetic
+# ------------------------
+def percentage_of(minor: int, bp: int) -> int:
+    """Return `bp` basis points of `minor` paise, rounded half up."""
+    return (minor * bp + BASIS_POINTS // 2) // BASIS_POINTS
+
+
+def discounted_unit_price(unit_price: int, discount_bp: int) -> int:
+    """Apply an item-level percentage discount to a unit price in paise."""
+    return unit_price - percentage_of(unit_price, discount_bp)
+
+
+def price_lines(lines: Iterable[Sequence[int]]) -> List[int]:
+    """
+    Price many lines.
+
+    Args:
+        lines: Iterable of (unit_price, quantity[, discount_bp]) in paise/bp.
+
+    Returns:
+        list[int]: Line totals in paise, in input order.
+    """
+    return [discounted_unit_price(line[0], line[2] if len(line) > 2 else 0) * line[1] for line in lines]
+
+
+def quote(lines: Iterable[Sequence[int]], coupon_bp: int = 0) -> Quote:
+    """Price one basket and apply an optional coupon (in basis points)."""
+    line_totals = price_lines(lines)
+    subtotal = sum(line_totals)
+    coupon_discount = min(percentage_of(subtotal, coupon_bp), subtotal) if coupon_bp else 0
+    return Quote(subtotal, coupon_discount, subtotal - coupon_discount, line_totals)
+
+
+def quote_many(baskets: Iterable[Iterable[Sequence[int]]], coupon_bps: Iterable[int] = None) -> List[Quote]:
+    """Price many baskets (e.g. carts or orders), each with its coupon from `coupon_bps`."""
+    baskets = list(baskets)
+    coupon_bps = list(coupon_bps) if coupon_bps is not None else [0] * len(baskets)
+    return [quote(lines, bp) for lines, bp in zip(baskets, coupon_bps)]